@@ -0,0 +1,85 @@
+"""Throughput of the embed classifier used by VirtualFisher._check_interaction.
+
+Usage: python -m benchmarks.bench_classifier [iterations]
+
+Runs every embed in benchmarks/corpus/embeds.json through ``EmbedClassifier`` and
+through the if-chain plus per-handler ``re.search`` calls it replaced, and prints the
+time per embed for both. The old chain only knew five message types; the classifier also
+recognises catch, sold, cooldown and verified replies.
+"""
+import json
+import os
+import re
+import sys
+import time
+
+os.environ.setdefault("TELEGRAM_TOKEN", "benchmark")
+os.environ.setdefault("CHAT_ID", "0")
+
+from modules.classifier import EmbedClassifier
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus", "embeds.json")
+
+
+def legacy_classify(title: str | None, description: str | None) -> list[tuple[str, dict]]:
+    """The if-chain from before the classifier, including the handlers' own searches."""
+    events = []
+    if description is not None and "working" in description.lower():
+        total_fish = re.search(r"total of \*\*(\d+)\*\* fish", description)
+        events.append(("worker_fish", {"total_fish": int(total_fish.group(1))} if total_fish else {}))
+    if title is not None and ("anti-bot" in title.lower() or
+                              "code" in description.lower() or
+                              "verify" in description.lower()):
+        code = re.search(r"Code: \*\*(\w+)\*\*", description)
+        events.append(("anti_bot", {"code": code.group(1)} if code else {}))
+    if description is not None and "hired" in description.lower():
+        minutes = re.search(r"the next \*\*(\d+)\*\* minutes", description)
+        events.append(("worker_hired", {"minutes": int(minutes.group(1))} if minutes else {}))
+        return events
+    if description is not None and ("emerald" in description.lower() or "gold" in description.lower()):
+        values = {}
+        emerald_fish = re.search(r"You got (\d+) Emerald Fish", description)
+        gold_fish = re.search(r"You got (\d+) Gold Fish", description)
+        if emerald_fish:
+            values["emerald_fish"] = int(emerald_fish.group(1))
+        if gold_fish:
+            values["gold_fish"] = int(gold_fish.group(1))
+        events.append(("exotic_fish", values))
+    if description is not None and ("$" in description.lower() or "sold" in description.lower()):
+        money = re.search(r"\*\*?\$([\d,]+)\*\*?", description)
+        events.append(("money", {"money": int(money.group(1).replace(",", ""))} if money else {}))
+    return events
+
+
+def _bench(name: str, iterations: int, corpus: list[dict], classify, repeat: int = 5) -> float:
+    # Best of ``repeat`` runs, the minimum is the least disturbed by whatever else the machine does
+    elapsed = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            for embed in corpus:
+                classify(embed["title"], embed["description"])
+        elapsed = min(elapsed, time.perf_counter() - start)
+    per_embed = elapsed / (iterations * len(corpus)) * 1e6
+    print(f"{name:<10} {iterations * len(corpus):>8} embeds  {per_embed:>7.2f}us/embed  "
+          f"{iterations * len(corpus) / elapsed:>10.0f} embeds/s")
+    return per_embed
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    with open(CORPUS, "r", encoding="utf-8") as file:
+        corpus = json.load(file)
+
+    classifier = EmbedClassifier()
+    for embed in corpus:
+        print(f"{(embed['title'] or '-'):<10} {classifier.classify(embed['title'], embed['description'])}")
+    print()
+
+    legacy = _bench("if-chain", iterations, corpus, legacy_classify)
+    new = _bench("classifier", iterations, corpus, classifier.classify)
+    print(f"\nspeedup {legacy / new:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Compare per-query latency of the storage backends.
+
+Usage: python -m benchmarks.bench_database [iterations]
+
+The SQLite backend always runs against a temporary file. The MySQL backend runs only
+when DB_HOST is set in the environment (or .env), using the same settings as the bot.
+"""
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import dotenv
+
+from database.database import Database
+from database.sqlite import SQLiteDatabase
+
+BENCH_USER_ID = 1
+
+
+async def _timed(iterations: int, operation) -> list[float]:
+    samples = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        await operation(i)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def _report(backend: str, name: str, samples: list[float]):
+    samples = sorted(samples)
+    p50 = samples[len(samples) // 2] * 1e6
+    p95 = samples[int(len(samples) * 0.95) - 1] * 1e6
+    print(f"{backend:<7} {name:<14} n={len(samples):<6} mean={statistics.fmean(samples) * 1e6:>9.1f}us "
+          f"p50={p50:>9.1f}us p95={p95:>9.1f}us")
+
+
+async def bench(backend: str, db, iterations: int):
+    start = time.perf_counter()
+    await db.connect()
+    print(f"{backend:<7} {'connect':<14} {(time.perf_counter() - start) * 1e3:.2f}ms")
+
+    await db.execute("DELETE FROM virtualfisher WHERE user_id = %s", (BENCH_USER_ID,))
+    await db.execute("DELETE FROM settings WHERE user_id = %s", (BENCH_USER_ID,))
+    await db.execute("DELETE FROM user WHERE user_id = %s", (BENCH_USER_ID,))
+    await db.execute("INSERT INTO user (user_id, global_name) VALUES (%s, %s)", (BENCH_USER_ID, "bench"))
+    await db.execute("INSERT INTO virtualfisher (user_id) VALUES (%s)", (BENCH_USER_ID,))
+
+    _report(backend, "fetch one", await _timed(iterations, lambda i: db.fetch(
+        "SELECT * FROM virtualfisher WHERE user_id = %s", (BENCH_USER_ID,), one=True)))
+    _report(backend, "execute", await _timed(iterations, lambda i: db.execute(
+        "UPDATE virtualfisher SET trips = %s WHERE user_id = %s", (i, BENCH_USER_ID))))
+    _report(backend, "queue_update", await _timed(iterations, lambda i: db.queue_update(
+        "virtualfisher", BENCH_USER_ID, {"trips": i, "balance": i * 10})))
+
+    await db.execute("DELETE FROM virtualfisher WHERE user_id = %s", (BENCH_USER_ID,))
+    await db.execute("DELETE FROM user WHERE user_id = %s", (BENCH_USER_ID,))
+    await db.close()
+
+
+async def main(iterations: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        await bench("sqlite", SQLiteDatabase(path=os.path.join(tmp, "bench.sqlite3")), iterations)
+
+    dotenv.load_dotenv(".env")
+    if os.getenv("DB_HOST"):
+        await bench("mysql", Database(
+            host=os.getenv("DB_HOST"),
+            port=int(os.getenv("DB_PORT") or 3306),
+            user=os.getenv("DB_USERNAME"),
+            password=os.getenv("DB_PASSWORD"),
+            database=os.getenv("DB_NAME"),
+            health_check_interval=0,
+        ), iterations)
+    else:
+        print("mysql   skipped, DB_HOST is not set")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000))
@@ -0,0 +1,185 @@
+"""Throughput of ``Bot.parse``, the dispatcher every gateway message goes through.
+
+Usage: python -m benchmarks.bench_dispatch [iterations] [latency_ms]
+
+Times the dispatcher against the one it replaced on three kinds of traffic: messages from
+other users (nearly everything the account sees), our own chat without the prefix, and our
+own commands. Delete and typing return at once in the throughput runs; the last run gives
+them ``latency_ms`` of simulated round trip and reports how long a command waits to start.
+Commands of the new dispatcher go through the ``CommandRunner``, whose queue is sized to
+hold a whole run so nothing is dropped. That backlog (a job, a Context and a pending hide
+task per command) is drained only after each timed run, so the garbage collector walking it
+weighs on the own-commands figure more the more iterations run.
+"""
+import asyncio
+import os
+import sys
+import time
+
+os.environ.setdefault("TELEGRAM_TOKEN", "benchmark")
+os.environ.setdefault("CHAT_ID", "0")
+
+from discord.ext import commands
+
+from modules.bot import Bot, logger as bot_logger
+from modules.command_runner import CommandRunner
+
+USER_ID = 1
+OTHER_ID = 2
+
+
+class FakeUser:
+    def __init__(self, user_id: int):
+        self.id = user_id
+
+
+class FakeChannel:
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.id = 10
+
+    async def typing(self):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    async def send(self, content: str):
+        pass
+
+
+class FakeMessage:
+    def __init__(self, author_id: int, content: str, channel: FakeChannel):
+        self.id = 100
+        self.author = FakeUser(author_id)
+        self.guild = object()
+        self.content = content
+        self.channel = channel
+        self._state = None
+
+    async def delete(self):
+        if self.channel.latency:
+            await asyncio.sleep(self.channel.latency)
+
+    async def reply(self, content: str):
+        pass
+
+
+class Commands(commands.Cog):
+    def __init__(self):
+        self.calls = 0
+        self.started_at = 0.0
+
+    @commands.command(aliases=["e"])
+    async def echo(self, ctx: commands.Context, *args: str):
+        self.calls += 1
+        self.started_at = time.perf_counter()
+
+
+async def legacy_parse(self: Bot, message):
+    if not message.guild:
+        return
+
+    if message.author.id == self.user.id:
+        if message.content.startswith(self.command_prefix):
+            try:
+                await message.delete()
+                parts = message.content[1:].split()
+                command_name = parts[0]
+                bot_logger.info(f"Get Command With Command Name: {self.command_prefix}{command_name}")
+                await message.channel.typing()
+                command = self.get_command(command_name)
+                ctx = await self.get_context(message)
+                if command:
+                    try:
+                        args = parts[1] if len(parts) > 1 else ''
+                        if args:
+                            await command(ctx, args)
+                        else:
+                            await command(ctx)
+                    except Exception as e:
+                        bot_logger.error(f"Receiving an error when attempting to send a command: {e}")
+                else:
+                    await message.reply("There is no command with that name!")
+            except Exception as e:
+                bot_logger.info(f"Error when processing message. Message received {message.content} with error {e}")
+
+
+async def _bench(name: str, bot: Bot, parse, messages: list, iterations: int, repeat: int = 5) -> float:
+    # Best of ``repeat`` runs, the minimum is the least disturbed by whatever else the machine does
+    elapsed = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            for message in messages:
+                await parse(bot, message)
+        elapsed = min(elapsed, time.perf_counter() - start)
+        await _drain(bot)
+    rate = iterations * len(messages) / elapsed
+    print(f"{name:<24} {iterations * len(messages):>8} messages  {rate:>12,.0f} msg/s")
+    return rate
+
+
+async def _drain(bot: Bot):
+    # Let the background delete/typing tasks and the queued commands of the new dispatcher
+    # finish outside the timing
+    await asyncio.gather(*bot._background_tasks)
+    while True:
+        metrics = bot.command_runner.metrics()
+        if not metrics["running"] and not metrics["queued"]:
+            return
+        await asyncio.sleep(0)
+
+
+async def _start_latency(bot: Bot, parse, cog: Commands, channel: FakeChannel, runs: int = 5) -> float:
+    total = 0.0
+    for _ in range(runs):
+        start = time.perf_counter()
+        await parse(bot, FakeMessage(USER_ID, "!echo a b", channel))
+        await _drain(bot)
+        total += cog.started_at - start
+    return total / runs * 1000
+
+
+async def run(iterations: int, latency: float):
+    bot_logger.disabled = True
+    legacy_bot = Bot(command_prefix="!", database_conn=None, telegram_notif=None, help_command=None)
+    new_bot = Bot(command_prefix="!", database_conn=None, telegram_notif=None, help_command=None)
+    for bot in (legacy_bot, new_bot):
+        # Filled on login, ``self.user`` reads it
+        bot._connection.user = FakeUser(USER_ID)
+    legacy_cog, new_cog = Commands(), Commands()
+    await legacy_bot.add_cog(legacy_cog)
+    await new_bot.add_cog(new_cog)
+    await new_bot.setup_hook()
+    new_bot.command_runner = CommandRunner(global_limit=4, per_command_limit=4, max_queue=iterations * 3)
+
+    channel = FakeChannel()
+    traffic = {
+        "other users": [FakeMessage(OTHER_ID, content, channel)
+                        for content in ("hello", "!echo a", "/fish", "gg", "a longer message from someone else")],
+        "own chat": [FakeMessage(USER_ID, content, channel) for content in ("hello", "brb", "ok")],
+        "own commands": [FakeMessage(USER_ID, content, channel) for content in ("!echo", "!e a b c", "!echo 1")],
+    }
+    for kind, messages in traffic.items():
+        print(kind)
+        legacy = await _bench("  sequential (old)", legacy_bot, legacy_parse, messages, iterations)
+        new = await _bench("  fast-reject (new)", new_bot, Bot.parse, messages, iterations)
+        print(f"  speedup {new / legacy:.2f}x\n")
+
+    if legacy_cog.calls and new_cog.calls:
+        slow = FakeChannel(latency)
+        legacy = await _start_latency(legacy_bot, legacy_parse, legacy_cog, slow)
+        new = await _start_latency(new_bot, Bot.parse, new_cog, slow)
+        print(f"command start with {latency * 1000:.0f}ms delete/typing: "
+              f"old {legacy:.1f}ms, new {new:.1f}ms")
+    await legacy_bot.close()
+    await new_bot.close()
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    latency = float(sys.argv[2]) / 1000 if len(sys.argv) > 2 else 0.05
+    asyncio.run(run(iterations, latency))
+
+
+if __name__ == "__main__":
+    main()
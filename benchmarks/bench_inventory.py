@@ -0,0 +1,119 @@
+"""Throughput of the inventory parser used by getvf and scrapvf.
+
+Usage: python -m benchmarks.bench_inventory [iterations]
+
+Checks ``parse_inventory`` against the expected records in benchmarks/corpus/inventory.json,
+then times it against the two parsers it replaced: the five ``re.search`` calls of getvf
+and the ``startswith``/``split("**")`` line walk of scrapvf.
+"""
+import json
+import os
+import re
+import sys
+import time
+
+os.environ.setdefault("TELEGRAM_TOKEN", "benchmark")
+os.environ.setdefault("CHAT_ID", "0")
+
+from modules.inventory import parse_inventory
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus", "inventory.json")
+
+
+def legacy_getvf(description: str) -> dict:
+    money_match = re.search(r"Balance: \*\*?\$([\d,]+)\*\*?", description)
+    clan_match = re.search(r"Clan: \*\*(\w+)\*\*", description)
+    biome_match = re.search(r"Current biome: <:\w+:\d+> \*\*(\w+)\*\*", description)
+    gold_fish_match = re.search(r"\*\*([\d,]+)\*\* <:\w+:\d+> Gold Fish", description)
+    emerald_fish_match = re.search(r"\*\*([\d,]+)\*\* <:\w+:\d+> Emerald Fish", description)
+    return {
+        "balance": int(money_match.group(1).replace(",", "") if money_match else 0),
+        "clan": clan_match.group(1) if clan_match else "",
+        "biome": biome_match.group(1) if biome_match else "",
+        "gold_fish": int(gold_fish_match.group(1).replace(",", "")) if gold_fish_match else None,
+        "emerald_fish": int(emerald_fish_match.group(1).replace(",", "")) if emerald_fish_match else None,
+    }
+
+
+def legacy_scrapvf(description: str) -> dict:
+    vf_data = {"clan": "", "balance": "", "level": "", "xp": "", "current_rod": "", "current_biome": "",
+               "pet": "", "bait": "", "fish_inventory": {}, "exotic_fish": {}, "special": {}}
+    current_section = None
+    for line in description.split('\n'):
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith("Clan:"):
+            vf_data["clan"] = line.split("**")[1]
+        elif line.startswith("Balance:"):
+            vf_data["balance"] = line.split("**")[1].replace(".", "")
+        elif line.startswith("**Level"):
+            parts = line.split(",")
+            vf_data["level"] = parts[0].split("**")[1]
+            if len(parts) > 1:
+                vf_data["xp"] = parts[1].strip()
+        elif line.startswith("Currently using"):
+            vf_data["current_rod"] = line.split("**")[1]
+        elif line.startswith("Current biome:"):
+            vf_data["current_biome"] = line.split("**")[1]
+        elif line.startswith("Pet:"):
+            vf_data["pet"] = line.split("**")[1]
+        elif line.startswith("Bait:"):
+            bait_parts = line.split("**")
+            if len(bait_parts) >= 2:
+                vf_data["bait"] = bait_parts[1]
+        elif line == "**Fish Inventory**":
+            current_section = "fish_inventory"
+        elif line == "**Exotic Fish**":
+            current_section = "exotic_fish"
+        elif line == "**Special**":
+            current_section = "special"
+        elif line.startswith("Fish Value:"):
+            vf_data["fish_value"] = line.split("**")[1]
+        elif current_section and line.startswith("**") and "**" in line[2:]:
+            parts = line.split("**")
+            if len(parts) >= 3:
+                fish_name = parts[2].strip()
+                fish_name = ' '.join(fish_name.split()[1:]) if fish_name.split() else fish_name
+                vf_data[current_section][fish_name] = parts[1]
+    return vf_data
+
+
+def _bench(name: str, iterations: int, corpus: list[dict], parse, repeat: int = 5) -> float:
+    # Best of ``repeat`` runs, the minimum is the least disturbed by whatever else the machine does
+    elapsed = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            for embed in corpus:
+                parse(embed["description"])
+        elapsed = min(elapsed, time.perf_counter() - start)
+    per_embed = elapsed / (iterations * len(corpus)) * 1e6
+    print(f"{name:<14} {iterations * len(corpus):>8} embeds  {per_embed:>7.2f}us/embed")
+    return per_embed
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    with open(CORPUS, "r", encoding="utf-8") as file:
+        corpus = json.load(file)
+
+    failures = 0
+    for index, embed in enumerate(corpus):
+        parsed = parse_inventory(embed["description"]).to_dict()
+        wrong = {key: (parsed[key], value) for key, value in embed["expected"].items() if parsed[key] != value}
+        if wrong:
+            failures += 1
+            print(f"embed {index}: got/expected {wrong}")
+    print(f"{len(corpus) - failures}/{len(corpus)} embeds parsed as expected\n")
+
+    getvf = _bench("getvf regexes", iterations, corpus, legacy_getvf)
+    scrapvf = _bench("scrapvf lines", iterations, corpus, legacy_scrapvf)
+    single = _bench("single pass", iterations, corpus, parse_inventory)
+    print(f"\nspeedup {getvf / single:.2f}x over getvf, {scrapvf / single:.2f}x over scrapvf "
+          f"({(getvf + scrapvf) / single:.2f}x over running both)")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,416 @@
+"""Headless stand-in for the VirtualFisher game bot, for soak tests and throughput benchmarks.
+
+Usage: python -m benchmarks.sim_virtualfisher [--seconds N] [--speed X] [--anti-bot P] ...
+
+``VirtualFisherSimulator`` plays the game side: its slash commands answer fish, sell, buy and
+verify with the embeds the real bot sends (catch, crate, sold, hired, working, cooldown and
+anti-bot code or image), honouring per-command cooldowns, a reply latency and an anti-bot
+frequency. Replies are delivered through ``InteractionRegistry.feed``
+and ``AntiBotWatcher.feed`` like gateway events, so the real cog, scheduler, pacing,
+anti-bot watcher and classifier run unchanged, on a temporary SQLite
+database. An image check is answered by a simulated owner over the DM ``!verify`` command.
+
+``--speed`` divides every duration, on both the game and the bot side (cooldowns, latency,
+pacing bounds, the fisher loop interval), so the run covers ``seconds * speed`` of game time.
+Rates are reported per game hour. The worker's hire sleep is not accelerated, so only the
+fisher loop is driven.
+
+Pass ``--sell-policy`` more than once (e.g. ``--sell-policy trips:10 --sell-policy value:50000``)
+to run the same game once per policy and compare sell calls, slash calls and income per hour.
+"""
+import argparse
+import asyncio
+import itertools
+import logging
+import os
+import random
+import string
+import tempfile
+import time
+
+os.environ.setdefault("TELEGRAM_TOKEN", "simulated")
+os.environ.setdefault("CHAT_ID", "0")
+
+import discord
+
+from database.sqlite import SQLiteDatabase
+from modules.anti_bot import AntiBotWatcher
+from modules.dashboard import Dashboard
+from modules.interactions import InteractionRegistry
+from modules.pacing import PacingController
+from modules.scheduler import ActionScheduler
+from modules.sell_policy import build_policy
+from modules.commands.virtualfisher import VirtualFisher, VIRTUALFISHER_COMMANDS
+
+SIM_USER_ID = 1
+SIM_OWNER_ID = 2
+
+# Game seconds, divided by the speed factor
+GAME_COOLDOWNS = {
+    "fish": 3.5,
+    "sell": 3.0,
+    "buy": 3.0,
+    "verify": 0.0,
+}
+
+
+class GameConfig:
+    def __init__(self,
+                 speed: float = 1.0,
+                 cooldowns: dict[str, float] = None,
+                 latency: tuple[float, float] = (0.15, 0.6),
+                 anti_bot_chance: float = 0.01,
+                 image_chance: float = 0.3,
+                 crate_chance: float = 0.05,
+                 worker_report_chance: float = 0.1,
+                 owner_solve_delay: float = 30.0):
+        self.speed = speed
+        self.cooldowns = {**GAME_COOLDOWNS, **(cooldowns or {})}
+        self.latency = latency
+        self.anti_bot_chance = anti_bot_chance
+        self.image_chance = image_chance
+        self.crate_chance = crate_chance
+        self.worker_report_chance = worker_report_chance
+        self.owner_solve_delay = owner_solve_delay
+
+
+class SimUser:
+    __slots__ = ("id", "name")
+
+    def __init__(self, user_id: int, name: str):
+        self.id = user_id
+        self.name = name
+
+
+class SimFlags:
+    __slots__ = ("loading",)
+
+    def __init__(self, loading: bool = False):
+        self.loading = loading
+
+
+class SimInteraction:
+    __slots__ = ("id", "name", "channel", "user")
+
+    def __init__(self, interaction_id: int, name: str, channel, user: SimUser):
+        self.id = interaction_id
+        self.name = name
+        self.channel = channel
+        self.user = user
+
+
+class SimChannel:
+    __slots__ = ("id", "guild")
+
+    def __init__(self, channel_id: int):
+        self.id = channel_id
+        self.guild = None
+
+
+class SimMessage:
+    __slots__ = ("id", "channel", "interaction", "embeds", "content", "flags", "guild", "author", "mentions",
+                 "created_at", "edited_at", "simulator")
+
+    def __init__(self, simulator, message_id: int, channel, interaction=None, embeds=None,
+                 content: str = "", author=None):
+        self.simulator = simulator
+        self.id = message_id
+        self.channel = channel
+        self.interaction = interaction
+        self.embeds = embeds or []
+        self.content = content
+        self.flags = SimFlags()
+        self.guild = None
+        self.author = author
+        self.mentions = []
+        self.created_at = discord.utils.utcnow()
+        self.edited_at = None
+
+    async def forward(self, destination):
+        self.simulator.forwarded(self)
+
+    async def reply(self, content: str):
+        self.simulator.stats["owner_replies"] += 1
+
+
+class SimCommand:
+    """Stands in for a ``discord.SlashCommand``, invoking it asks the simulator."""
+
+    def __init__(self, simulator, command_id: int, name: str):
+        self.simulator = simulator
+        self.id = command_id
+        self.name = name
+
+    async def __call__(self, channel, **options) -> SimInteraction:
+        return self.simulator.invoke(self, channel, options)
+
+
+class SimNotifier:
+    def __init__(self):
+        self.stats = {"notifications": 0, "alerts": 0, "edits": 0}
+
+    def notify(self, kind: str, text: str, amount: int = 0, username: str = None, priority: int = 1):
+        self.stats["notifications"] += 1
+
+    async def send_alert(self, text: str) -> dict:
+        self.stats["alerts"] += 1
+        return {"result": {"message_id": self.stats["alerts"]}}
+
+    async def edit_alert(self, message_id: int, text: str):
+        self.stats["edits"] += 1
+
+
+class SimBot:
+    """The parts of ``modules.Bot`` the VirtualFisher cog uses, with the real helpers."""
+
+    def __init__(self, database, config: GameConfig):
+        speed = config.speed
+        self.user = SimUser(SIM_USER_ID, "simulated")
+        self.owner = SimUser(SIM_OWNER_ID, "owner")
+        self.command_prefix = "!"
+        self.account_name = "simulated"
+        self.settings_loaded = asyncio.Event()
+        self.settings_loaded.set()
+        self.database = database
+        self.notifier = SimNotifier()
+        self.dashboard = Dashboard()  # never started, touches cost nothing
+        self.interactions = InteractionRegistry(timeout=10.0)
+        self.scheduler = ActionScheduler(name="simulated")
+        self.anti_bot = AntiBotWatcher(self.scheduler)
+        self.pacing = PacingController(minimum=3.5 / speed, maximum=120 / speed, initial=30 / speed)
+
+
+class VirtualFisherSimulator:
+    """The game side: state of one player and the replies to its commands."""
+
+    def __init__(self, bot: SimBot, config: GameConfig):
+        self.bot = bot
+        self.config = config
+        self._ids = itertools.count(1)
+        self._last_use: dict[str, float] = {}
+        self._tasks: set[asyncio.Task] = set()
+        self.fish = 0
+        self.income = 0
+        self.worker_until = 0.0
+        self.code: str | None = None
+        self.code_image = False
+        self.code_issued = 0.0
+        self.solve_times: list[float] = []
+        self.cog: VirtualFisher | None = None
+        self.stats = {
+            "invocations": 0,
+            "trips": 0,
+            "cooldowns": 0,
+            "sold": 0,
+            "hired": 0,
+            "crates": 0,
+            "anti_bot_code": 0,
+            "anti_bot_image": 0,
+            "blocked": 0,
+            "verified": 0,
+            "wrong_code": 0,
+            "forwarded": 0,
+            "owner_replies": 0,
+        }
+
+    def commands(self) -> dict[str, SimCommand]:
+        """The cog attributes (``fish_command`` ...) mapped to simulated commands."""
+        return {attribute: SimCommand(self, command_id, attribute.removesuffix("_command"))
+                for command_id, attribute in VIRTUALFISHER_COMMANDS.items()}
+
+    def invoke(self, command: SimCommand, channel, options: dict) -> SimInteraction:
+        self.stats["invocations"] += 1
+        interaction = SimInteraction(next(self._ids), command.name, channel, self.bot.user)
+        embed = self._respond(command.name, options)
+        message = SimMessage(self, next(self._ids), channel, interaction=interaction, embeds=[embed])
+        latency = random.uniform(*self.config.latency) / self.config.speed
+        asyncio.get_running_loop().call_later(latency, self.deliver, message)
+        return interaction
+
+    def deliver(self, message: SimMessage):
+        """What ``Bot.on_message`` does with a gateway message."""
+        self.bot.anti_bot.feed(message, self.bot.user.id)
+        self.bot.interactions.feed(message)
+
+    def _respond(self, name: str, options: dict) -> discord.Embed:
+        now = time.monotonic()
+        if name == "verify":
+            return self._verify(options.get("answer"), now)
+        if self.code is not None:
+            self.stats["blocked"] += 1
+            return self._anti_bot_embed()
+
+        cooldown = self.config.cooldowns.get(name, 0.0) / self.config.speed
+        remaining = self._last_use.get(name, -cooldown) + cooldown - now
+        if remaining > 0:
+            self.stats["cooldowns"] += 1
+            return discord.Embed(title="Cooldown", description=f"Please wait **{remaining:.1f}s** before using this command again.")
+        self._last_use[name] = now
+
+        if name == "fish":
+            return self._fish(now)
+        if name == "sell":
+            return self._sell()
+        return self._buy(options.get("item", ""), now)
+
+    def _fish(self, now: float) -> discord.Embed:
+        if random.random() < self.config.anti_bot_chance:
+            self.code = "".join(random.choices(string.ascii_letters + string.digits, k=4))
+            self.code_image = random.random() < self.config.image_chance
+            self.code_issued = now
+            self.stats["anti_bot_image" if self.code_image else "anti_bot_code"] += 1
+            return self._anti_bot_embed()
+
+        self.stats["trips"] += 1
+        caught = random.randint(1, 6)
+        earned = caught * random.randint(150, 1300)
+        self.fish += caught
+        self.income += earned
+        lines = [f"You caught: <:common:912456000000000001> **{caught}** Common Fish",
+                 f"You earned **${earned:,}** and **{caught * 12} XP**"]
+        if random.random() < self.config.crate_chance:
+            self.stats["crates"] += 1
+            lines.append(f"You found a crate! You got {random.randint(1, 3)} {random.choice(('Gold', 'Emerald'))} Fish")
+        if now < self.worker_until and random.random() < self.config.worker_report_chance:
+            lines.append(f"Your workers are working hard! They caught a total of **{random.randint(10, 80)}** fish for you.")
+        return discord.Embed(title="Fishing", description="\n".join(lines))
+
+    def _sell(self) -> discord.Embed:
+        self.stats["sold"] += 1
+        fish, self.fish = self.fish, 0
+        self.income += fish * 400
+        return discord.Embed(title="Sold", description=f"You sold **{fish}** fish for **${fish * 400:,}**!")
+
+    def _buy(self, item: str, now: float) -> discord.Embed:
+        minutes = 30 if item == "Auto30m" else 10
+        self.stats["hired"] += 1
+        self.worker_until = max(self.worker_until, now) + minutes * 60 / self.config.speed
+        return discord.Embed(title="Shop", description=f"You hired a worker! They will fish for you for the next **{minutes}** minutes.")
+
+    def _anti_bot_embed(self) -> discord.Embed:
+        if self.code_image:
+            return discord.Embed(title="Anti-bot",
+                                 description="Please use **/verify** with the code in the image below to continue playing.")
+        return discord.Embed(title="Anti-bot",
+                             description=f"Code: **{self.code}**\n\nPlease use **/verify ``{self.code}``** to continue playing.")
+
+    def _verify(self, answer: str | None, now: float) -> discord.Embed:
+        if self.code is not None and answer == self.code:
+            self.stats["verified"] += 1
+            self.solve_times.append((now - self.code_issued) * self.config.speed)
+            self.code = None
+            return discord.Embed(title="Verified", description="You may now continue playing.")
+        self.stats["wrong_code"] += 1
+        return discord.Embed(title="Verify", description="That is not the right answer.")
+
+    def forwarded(self, message: SimMessage):
+        """The cog forwarded an image check to the owner, who answers over DM after a while."""
+        self.stats["forwarded"] += 1
+        task = asyncio.create_task(self._owner_solve(self.code))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _owner_solve(self, code: str):
+        await asyncio.sleep(self.config.owner_solve_delay / self.config.speed)
+        dm = SimMessage(self, next(self._ids), SimChannel(SIM_OWNER_ID), content=f"!verify {code}", author=self.bot.owner)
+        await self.cog.on_message(dm)
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+async def run(seconds: float, config: GameConfig, sell_policy: str = None) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        database = SQLiteDatabase(path=os.path.join(tmp, "sim.sqlite3"))
+        await database.connect()
+        await database.execute("INSERT INTO user (user_id, global_name) VALUES (%s, %s)", (SIM_USER_ID, "simulated"))
+
+        os.environ["SNAPSHOT_DIR"] = tmp
+        bot = SimBot(database, config)
+        cog = VirtualFisher(bot)
+        for name in bot.scheduler.cooldowns:
+            bot.scheduler.cooldowns[name] /= config.speed
+        cog.fisher_tasks.change_interval(seconds=5 / config.speed)
+        cog.sell_policy = build_policy(sell_policy, time_scale=1 / config.speed)
+        simulator = VirtualFisherSimulator(bot, config)
+        simulator.cog = cog
+        cog.channel = SimChannel(1000)
+        bot.anti_bot.watch(cog.channel.id, cog._anti_bot_resolve)
+        for attribute, command in simulator.commands().items():
+            setattr(cog, attribute, command)
+
+        await cog.on_ready()
+        await cog._reconcile_task
+        started = time.monotonic()
+        cog.fisher_tasks.start()
+        await asyncio.sleep(seconds)
+        cog.fisher_tasks.cancel()
+        elapsed = time.monotonic() - started
+
+        await simulator.close()
+        await cog.cog_unload()
+        await bot.anti_bot.close()
+        await bot.scheduler.close()
+        await database.close()
+
+    game_hours = elapsed * config.speed / 3600
+    solve_times = simulator.solve_times
+    per_hour = (lambda value: round(value / game_hours, 1)) if game_hours else (lambda value: 0.0)
+    return {
+        "sell_policy": sell_policy or repr(cog.sell_policy),
+        "game_hours": round(game_hours, 2),
+        "sells_per_game_hour": per_hour(simulator.stats["sold"]),
+        "slash_per_game_hour": per_hour(simulator.stats["invocations"]),
+        "income_per_game_hour": per_hour(simulator.income),
+        "unsold_fish": simulator.fish,
+        "trips_per_game_hour": per_hour(simulator.stats["trips"]),
+        "anti_bot_per_game_hour": per_hour(simulator.stats["anti_bot_code"] + simulator.stats["anti_bot_image"]),
+        "solve_avg_s": round(sum(solve_times) / len(solve_times), 2) if solve_times else None,
+        "solve_max_s": round(max(solve_times), 2) if solve_times else None,
+        "loop_errors": cog.loop_errors,
+        "last_error": cog.last_error,
+        "game": simulator.stats,
+        "scheduler": bot.scheduler.metrics(),
+        "pacing": bot.pacing.metrics(),
+        "interactions": bot.interactions.metrics(),
+        "anti_bot": bot.anti_bot.metrics(),
+        "notifier": bot.notifier.stats,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=30.0, help="wall clock seconds to run")
+    parser.add_argument("--speed", type=float, default=60.0, help="game seconds per wall clock second")
+    parser.add_argument("--anti-bot", type=float, default=0.01, help="chance a fish command gets an anti-bot check")
+    parser.add_argument("--image", type=float, default=0.3, help="share of anti-bot checks that are images")
+    parser.add_argument("--fish-cooldown", type=float, default=GAME_COOLDOWNS["fish"], help="game cooldown of /fish")
+    parser.add_argument("--latency", type=float, nargs=2, default=(0.15, 0.6), help="reply latency range in game seconds")
+    parser.add_argument("--sell-policy", action="append", help="SELL_POLICY spec, repeat to compare policies")
+    args = parser.parse_args()
+
+    config = GameConfig(speed=args.speed,
+                        cooldowns={"fish": args.fish_cooldown},
+                        latency=tuple(args.latency),
+                        anti_bot_chance=args.anti_bot,
+                        image_chance=args.image)
+    policies = args.sell_policy or [None]
+    if len(policies) == 1:
+        result = asyncio.run(run(args.seconds, config, policies[0]))
+        for key, value in result.items():
+            print(f"{key:<24} {value}")
+        return
+
+    print(f"{'policy':<34} {'sells/h':>8} {'slash/h':>8} {'trips/h':>8} {'income/h':>12} {'anti-bot/h':>10} {'unsold':>7}")
+    for policy in policies:
+        result = asyncio.run(run(args.seconds, config, policy))
+        print(f"{result['sell_policy']:<34} {result['sells_per_game_hour']:>8} {result['slash_per_game_hour']:>8} "
+              f"{result['trips_per_game_hour']:>8} {result['income_per_game_hour']:>12,.0f} "
+              f"{result['anti_bot_per_game_hour']:>10} {result['unsold_fish']:>7}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    main()
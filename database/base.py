@@ -0,0 +1,97 @@
+import functools
+import logging
+import os
+from .history import EventHistory
+from .query_stats import QueryStats, query_shape
+from .write_behind import WriteBehind
+
+logger = logging.getLogger(__name__)
+
+# Columns added to a table after it was first created. ``CREATE TABLE IF NOT EXISTS`` never
+# adds them to an existing table, ``migrate`` does: (table, column, definition valid in both backends)
+ADDED_COLUMNS = (
+    ("virtualfisher", "trips", "INT DEFAULT 0"),
+    ("virtualfisher", "balance", "BIGINT DEFAULT 0"),
+    ("virtualfisher", "gold_fish", "INT DEFAULT 0"),
+    ("virtualfisher", "emerald_fish", "INT DEFAULT 0"),
+)
+
+
+@functools.lru_cache(maxsize=8)
+def load_statements(sql_file_path: str) -> tuple[str, ...]:
+    """Read an SQL file and split it into statements, cached so it is only parsed once."""
+    with open(sql_file_path, "r") as file:
+        sql = file.read()
+    return tuple(query.strip() for query in sql.split(";") if query.strip())
+
+
+def batch_shape(statements: list[tuple[str, tuple | None]]) -> str:
+    """Shape used to time a batch: the distinct statement shapes it contains."""
+    return "BATCH " + " | ".join(dict.fromkeys(query_shape(query) for query, _ in statements))
+
+
+class BaseDatabase:
+    """Plumbing shared by every storage backend.
+
+    Backends implement ``connect``, ``close``, ``execute``, ``execute_many``, ``execute_batch``,
+    ``transaction``, ``fetch``, ``table_columns`` and ``increment_statement`` with ``%s``
+    placeholders; the write-behind buffer, the event history, the schema file lookup,
+    migrations and query timing live here.
+    """
+    backend = ""
+    schema_file = "table.sql"
+
+    def __init__(self,
+                 flush_interval: float = 5.0,
+                 max_pending_writes: int = 50,
+                 durability: str = "interval",
+                 slow_query_ms: float = 250.0,
+                 log_sample_rate: float = 0.0,
+                 history_flush_interval: float = 10.0,
+                 history_max_buffered: int = 200,
+                 history_max_backlog: int = 10000):
+        self.query_stats = QueryStats(slow_query_ms=slow_query_ms, log_sample_rate=log_sample_rate)
+        self.write_behind = WriteBehind(self,
+                                        flush_interval=flush_interval,
+                                        max_pending=max_pending_writes,
+                                        durability=durability)
+        self.history = EventHistory(self,
+                                    flush_interval=history_flush_interval,
+                                    max_buffered=history_max_buffered,
+                                    max_backlog=history_max_backlog)
+
+    @property
+    def schema_path(self) -> str:
+        return os.path.join(os.path.dirname(os.path.abspath(__file__)), self.schema_file)
+
+    def is_connection_error(self, error: Exception) -> bool:
+        """Whether ``error`` means the database is unreachable rather than the statement being wrong."""
+        return False
+
+    async def migrate(self):
+        """Add the ``ADDED_COLUMNS`` that tables created by an older schema are missing."""
+        columns: dict[str, set[str]] = {}
+        for table, column, definition in ADDED_COLUMNS:
+            if table not in columns:
+                columns[table] = await self.table_columns(table)
+            if column in columns[table]:
+                continue
+            logger.warning(f"Adding missing column {table}.{column}")
+            await self.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+            columns[table].add(column)
+
+    async def queue_update(self, table: str, key, fields: dict, key_column: str = "user_id") -> None:
+        """Queue column updates for one row, they are written later as a single combined UPDATE."""
+        await self.write_behind.update(table, key, fields, key_column=key_column)
+
+    async def flush(self) -> None:
+        """Write all queued updates to the database now."""
+        await self.write_behind.flush()
+
+    def metrics(self) -> dict:
+        """Snapshot of the backend counters."""
+        return {
+            "backend": self.backend,
+            "write_behind": {**self.write_behind.stats, "pending_rows": self.write_behind.pending},
+            "history": self.history.stats,
+        }
@@ -4,16 +4,78 @@ import dotenv
 import os
 import logging
 import asyncio
+import contextlib
+import functools
+import random
+from .base import BaseDatabase, batch_shape, load_statements
+from .sqlite import SQLiteDatabase
 
 logger = logging.getLogger(__name__)
 
-class Database:
+# MySQL client errors that mean the connection is gone rather than the query being wrong:
+# 2003 can't connect, 2006 server has gone away, 2013 lost connection, 2055 lost connection (system error)
+CONNECTION_ERROR_CODES = (2003, 2006, 2013, 2055)
+
+@functools.lru_cache(maxsize=32)
+def increment_statement(table: str, keys: tuple[str, ...], counters: tuple[str, ...]) -> str:
+    """INSERT that adds ``counters`` onto an existing row with the same key (MySQL upsert)."""
+    columns = (*keys, *counters)
+    placeholders = ", ".join(["%s"] * len(columns))
+    updates = ", ".join(f"{counter} = {counter} + VALUES({counter})" for counter in counters)
+    return f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders}) ON DUPLICATE KEY UPDATE {updates}"
+
+
+class Transaction:
+    """Statements issued through one acquired connection inside ``Database.transaction()``."""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    async def execute(self, query: str, args: tuple = None) -> int:
+        """Execute a query and return the number of affected rows."""
+        async with self.conn.cursor() as cursor:
+            return await cursor.execute(query, args)
+
+    async def execute_many(self, query: str, args_seq: list[tuple]) -> int:
+        """Execute a query once per argument tuple, multi-row INSERTs are sent as one statement."""
+        async with self.conn.cursor() as cursor:
+            return await cursor.executemany(query, args_seq)
+
+    async def fetch(self, query: str, args: tuple = None, one: bool = False) -> dict | list[dict] | None:
+        async with self.conn.cursor(aiomysql.DictCursor) as cursor:
+            await cursor.execute(query, args)
+            if one:
+                return await cursor.fetchone()
+            return await cursor.fetchall()
+
+
+class Database(BaseDatabase):
+    backend = "mysql"
+    increment_statement = staticmethod(increment_statement)
+
     def __init__(self,
                  host:str = None,
                  port:int = None,
                  user:str = None,
                  password:str = None,
-                 database:str = None):
+                 database:str = None,
+                 flush_interval: float = 5.0,
+                 max_pending_writes: int = 50,
+                 durability: str = "interval",
+                 slow_query_ms: float = 250.0,
+                 log_sample_rate: float = 0.0,
+                 history_flush_interval: float = 10.0,
+                 history_max_buffered: int = 200,
+                 history_max_backlog: int = 10000,
+                 health_check_interval: float = 30.0):
+        super().__init__(flush_interval=flush_interval,
+                         max_pending_writes=max_pending_writes,
+                         durability=durability,
+                         slow_query_ms=slow_query_ms,
+                         log_sample_rate=log_sample_rate,
+                         history_flush_interval=history_flush_interval,
+                         history_max_buffered=history_max_buffered,
+                         history_max_backlog=history_max_backlog)
         self.host = host
         self.port = port
         self.user = user
@@ -22,6 +84,20 @@ class Database:
         self.pool = None
         self.max_retries = 3
         self.retry_delay = 1  # seconds
+        self.max_retry_delay = 10  # seconds
+        self.health_check_interval = health_check_interval  # seconds, 0 disables the probe
+        self.max_health_check_delay = 300  # seconds
+        self._health_task: asyncio.Task | None = None
+        self._reconnect_lock = asyncio.Lock()
+        self.stats = {
+            "retries": 0,
+            "reconnects": 0,
+            "reconnect_failures": 0,
+            "connection_errors": 0,
+            "failed_operations": 0,
+            "health_checks": 0,
+            "health_failures": 0,
+        }
 
     async def _is_connection_alive(self) -> bool:
         """Check if the database connection pool is alive."""
@@ -37,42 +113,92 @@ class Database:
         except (pymysql.err.OperationalError, aiomysql.Error, Exception):
             return False
 
-    async def _reconnect(self):
-        """Reconnect to the database."""
-        logger.warning("Attempting to reconnect to database...")
+    @staticmethod
+    def _is_connection_error(error: Exception) -> bool:
+        """Tell connection failures apart from errors caused by the query itself."""
+        if isinstance(error, pymysql.err.InterfaceError):
+            return True
+        error_code = error.args[0] if error.args else None
+        return error_code in CONNECTION_ERROR_CODES
 
-        if self.pool:
+    def is_connection_error(self, error: Exception) -> bool:
+        return isinstance(error, pymysql.err.Error) and self._is_connection_error(error)
+
+    async def table_columns(self, table: str) -> set[str]:
+        return {row["Field"] for row in await self.fetch(f"SHOW COLUMNS FROM {table}") or ()}
+
+    @staticmethod
+    def _backoff_delay(base: float, attempt: int, cap: float) -> float:
+        """Exponential backoff with +-50% jitter so several clients don't retry in lockstep."""
+        return min(cap, base * (2 ** attempt)) * random.uniform(0.5, 1.5)
+
+    async def _reconnect(self, stale_pool=None):
+        """Reconnect to the database.
+
+        When ``stale_pool`` is given and another caller already replaced it, nothing is done,
+        so a burst of failing queries only rebuilds the pool once.
+        """
+        async with self._reconnect_lock:
+            if stale_pool is not None and self.pool is not stale_pool:
+                return
+
+            logger.warning("Attempting to reconnect to database...")
+            self.stats["reconnects"] += 1
+
+            if self.pool is None:
+                try:
+                    await self.connect()
+                except Exception:
+                    self.stats["reconnect_failures"] += 1
+                    raise
+                return
+
+            # The stale pool stays in place until a new one exists, so a failed reconnect still
+            # raises from the next query instead of finding no pool and skipping it
             try:
-                self.pool.close()
-                await self.pool.wait_closed()
+                new_pool = await self._create_pool()
             except Exception as e:
-                logger.error(f"Error closing old pool: {e}")
+                self.stats["reconnect_failures"] += 1
+                logger.error(f"Failed to create database connection pool: {e}")
+                raise
 
-        await self.connect()
+            old_pool, self.pool = self.pool, new_pool
+            logger.info("Database connection pool recreated successfully.")
+            try:
+                old_pool.close()
+                await old_pool.wait_closed()
+            except Exception as e:
+                logger.error(f"Error closing old pool: {e}")
 
     async def _execute_with_retry(self, operation, *args, **kwargs):
-        """Execute database operation with retry logic for connection errors."""
+        """Execute database operation with retry logic for connection errors.
+
+        The pool is not probed up front; a dead connection shows up as one of the
+        ``CONNECTION_ERROR_CODES`` and only then the pool is rebuilt and the operation retried.
+        """
         last_exception = None
 
         for attempt in range(self.max_retries):
+            pool = self.pool
             try:
-                if not await self._is_connection_alive():
+                if pool is None:
                     await self._reconnect()
+                    pool = self.pool
 
                 return await operation(*args, **kwargs)
 
             except (pymysql.err.OperationalError, aiomysql.Error) as e:
                 last_exception = e
-                error_code = getattr(e, 'args', [None])[0] if hasattr(e, 'args') and e.args else None
 
-                # Check for connection-related errors
-                if error_code in (2006, 2013, 2055):  # MySQL server has gone away, Lost connection, etc.
+                if self._is_connection_error(e):
+                    self.stats["connection_errors"] += 1
                     logger.warning(f"Connection error (attempt {attempt + 1}/{self.max_retries}): {e}")
 
                     if attempt < self.max_retries - 1:
-                        await asyncio.sleep(self.retry_delay * (attempt + 1))  # Exponential backoff
+                        self.stats["retries"] += 1
+                        await asyncio.sleep(self._backoff_delay(self.retry_delay, attempt, self.max_retry_delay))
                         try:
-                            await self._reconnect()
+                            await self._reconnect(stale_pool=pool)
                         except Exception as reconnect_error:
                             logger.error(f"Reconnection failed: {reconnect_error}")
                     continue
@@ -85,9 +211,54 @@ class Database:
                 raise e
 
         # If all retries failed
+        self.stats["failed_operations"] += 1
         logger.error(f"All retry attempts failed. Last error: {last_exception}")
         raise last_exception
 
+    def start_health_check(self):
+        """Start the background health probe, if an interval is configured."""
+        if self.health_check_interval <= 0:
+            return
+        if self._health_task is not None and not self._health_task.done():
+            return
+        self._health_task = asyncio.create_task(self._health_check_loop(), name="database-health-check")
+
+    async def _health_check_loop(self):
+        """Probe the pool every ``health_check_interval`` seconds and rebuild it when it is dead.
+
+        Failed probes back off exponentially (with jitter) up to ``max_health_check_delay``.
+        """
+        failures = 0
+        while True:
+            if failures:
+                delay = self._backoff_delay(self.health_check_interval, failures - 1, self.max_health_check_delay)
+            else:
+                delay = self.health_check_interval * random.uniform(0.9, 1.1)
+            await asyncio.sleep(delay)
+
+            self.stats["health_checks"] += 1
+            pool = self.pool
+            if await self._is_connection_alive():
+                failures = 0
+                continue
+
+            failures += 1
+            self.stats["health_failures"] += 1
+            logger.warning(f"Database health check failed ({failures} in a row), reconnecting")
+            try:
+                await self._reconnect(stale_pool=pool)
+            except Exception as e:
+                logger.error(f"Reconnection from health check failed: {e}")
+
+    def metrics(self) -> dict:
+        """Snapshot of connection, retry and write-behind counters."""
+        return {
+            **super().metrics(),
+            **self.stats,
+            "pool_size": self.pool.size if self.pool else 0,
+            "pool_free": self.pool.freesize if self.pool else 0,
+        }
+
     async def check_tables(self):
         """Check if the required tables exist in the database."""
         if not self.pool:
@@ -104,6 +275,8 @@ class Database:
                             "virtualfisher" not in table_names
                             or "user" not in table_names
                             or "settings" not in table_names
+                            or "virtualfisher_event" not in table_names
+                            or "virtualfisher_rollup" not in table_names
                     ):
                         logger.warning("Some tables does not exist, creating it.")
                         await self.create_tables()
@@ -115,29 +288,49 @@ class Database:
         except Exception as e:
             logger.error(f"Error checking tables: {e}")
 
+    async def _create_pool(self):
+        return await aiomysql.create_pool(
+            host=self.host,
+            port=self.port,
+            user=self.user,
+            password=self.password,
+            db=self.db,
+            autocommit=True,
+            # Connection pool settings for better reliability
+            minsize=1,
+            maxsize=10,
+            pool_recycle=3600,  # Recycle connections every hour
+            charset='utf8mb4'
+        )
+
     async def connect(self):
         """Initialize database connection pool."""
         try:
-            self.pool = await aiomysql.create_pool(
-                host=self.host,
-                port=self.port,
-                user=self.user,
-                password=self.password,
-                db=self.db,
-                autocommit=True,
-                # Connection pool settings for better reliability
-                minsize=1,
-                maxsize=10,
-                pool_recycle=3600,  # Recycle connections every hour
-                charset='utf8mb4'
-            )
+            self.pool = await self._create_pool()
             logger.info("Database connection pool created successfully.")
             await self.check_tables()
+            try:
+                await self.migrate()
+            except Exception as e:
+                logger.error(f"Error migrating tables: {e}")
+            self.write_behind.start()
+            self.history.start()
+            self.start_health_check()
         except Exception as e:
             logger.error(f"Failed to create database connection pool: {e}")
             raise
 
     async def close(self):
+        if self._health_task is not None:
+            self._health_task.cancel()
+            try:
+                await self._health_task
+            except asyncio.CancelledError:
+                pass
+            self._health_task = None
+
+        await self.history.close()
+        await self.write_behind.close()
         if self.pool:
             self.pool.close()
             await self.pool.wait_closed()
@@ -150,7 +343,7 @@ class Database:
             return
 
         async def _execute_operation():
-            logger.info(f"Executing query: {query} with args: {args}")
+            self.query_stats.log_query("Executing query", query, args)
             async with self.pool.acquire() as conn:
                 async with conn.cursor() as cursor:
                     if args:
@@ -158,7 +351,82 @@ class Database:
                     else:
                         await cursor.execute(query)
 
-        await self._execute_with_retry(_execute_operation)
+        with self.query_stats.timed(query):
+            await self._execute_with_retry(_execute_operation)
+
+    async def execute_many(self, query: str, args_seq: list[tuple]) -> None:
+        """Execute one query for every argument tuple using a single connection.
+
+        aiomysql rewrites ``INSERT ... VALUES`` into one multi-row statement, so bulk inserts
+        cost one round trip instead of one per row.
+        """
+        if not self.pool:
+            logger.error("Database pool is not initialized. Call connect() first.")
+            return
+        if not args_seq:
+            return
+
+        async def _execute_many_operation():
+            self.query_stats.log_query(f"Executing query {len(args_seq)} times", query)
+            async with self.pool.acquire() as conn:
+                async with conn.cursor() as cursor:
+                    await cursor.executemany(query, args_seq)
+
+        with self.query_stats.timed(query):
+            await self._execute_with_retry(_execute_many_operation)
+
+    async def execute_batch(self, statements: list[tuple[str, tuple | None]]) -> None:
+        """Run several ``(query, args)`` statements on one connection inside a single transaction.
+
+        Unlike ``transaction()`` the whole batch is known up front, so it is retried as a unit
+        on connection errors.
+        """
+        if not self.pool:
+            logger.error("Database pool is not initialized. Call connect() first.")
+            return
+        if not statements:
+            return
+
+        async def _execute_batch_operation():
+            self.query_stats.log_query(f"Executing batch of {len(statements)} statements", statements)
+            async with self.pool.acquire() as conn:
+                await conn.begin()
+                try:
+                    async with conn.cursor() as cursor:
+                        for query, args in statements:
+                            await cursor.execute(query, args)
+                    await conn.commit()
+                except BaseException:
+                    with contextlib.suppress(Exception):
+                        await conn.rollback()
+                    raise
+
+        with self.query_stats.timed(batch_shape(statements)):
+            await self._execute_with_retry(_execute_batch_operation)
+
+    @contextlib.asynccontextmanager
+    async def transaction(self):
+        """Acquire one connection and run the statements of the ``async with`` block in a transaction.
+
+        Commits when the block exits normally and rolls back on any exception. The block is
+        not replayed on connection errors, use ``execute_batch`` for retryable batches.
+        """
+        if not self.pool:
+            await self._reconnect()
+
+        with self.query_stats.timed("TRANSACTION"):
+            async with self.pool.acquire() as conn:
+                await conn.begin()
+                try:
+                    yield Transaction(conn)
+                except BaseException as e:
+                    with contextlib.suppress(Exception):
+                        await conn.rollback()
+                    if isinstance(e, (pymysql.err.OperationalError, aiomysql.Error)) and self._is_connection_error(e):
+                        self.stats["connection_errors"] += 1
+                    raise
+                else:
+                    await conn.commit()
 
     async def fetch(self, query: str, args: tuple = None, one: bool = False) -> dict | list[dict] | None:
         """Fetch data from database."""
@@ -167,7 +435,7 @@ class Database:
             return None
 
         async def _fetch_operation():
-            logger.info(f"Fetching data with query: {query} with args: {args}")
+            self.query_stats.log_query("Fetching data with query", query, args)
             async with self.pool.acquire() as conn:
                 async with conn.cursor(aiomysql.DictCursor) as cursor:
                     if args:
@@ -182,16 +450,15 @@ class Database:
                         result = await cursor.fetchall()
                         return result
 
-        return await self._execute_with_retry(_fetch_operation)
+        with self.query_stats.timed(query):
+            return await self._execute_with_retry(_fetch_operation)
 
     async def create_tables(self):
         """Create database tables from SQL file."""
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        sql_file_path = os.path.join(script_dir, "table.sql")
+        sql_file_path = self.schema_path
 
         try:
-            with open(sql_file_path, "r") as file:
-                sql = file.read()
+            queries = load_statements(sql_file_path)
         except FileNotFoundError:
             logger.error(f"SQL file not found: {sql_file_path}")
             return
@@ -199,25 +466,55 @@ class Database:
             logger.error(f"Error reading SQL file: {e}")
             return
 
-        queries = sql.split(";")
-        for query in queries:
-            query = query.strip()
-            if query:
-                try:
-                    await self.execute(query)
-                except Exception as e:
-                    logger.error(f"Error executing query: {query}\nError: {e}")
-
-dotenv.load_dotenv(".env")
+        try:
+            await self.execute_batch([(query, None) for query in queries])
+            return
+        except Exception as e:
+            logger.error(f"Error creating tables in one batch, falling back to one statement at a time: {e}")
 
-try:
-    db = Database(
+        for query in queries:
+            try:
+                await self.execute(query)
+            except Exception as e:
+                logger.error(f"Error executing query: {query}\nError: {e}")
+
+def create_database() -> BaseDatabase:
+    """Build the storage backend selected by ``DB_BACKEND`` (``mysql`` or ``sqlite``)."""
+    backend = os.getenv("DB_BACKEND", "mysql").lower()
+    common_settings = {
+        "flush_interval": float(os.getenv("DB_FLUSH_INTERVAL", 5)),
+        "max_pending_writes": int(os.getenv("DB_MAX_PENDING_WRITES", 50)),
+        "durability": os.getenv("DB_DURABILITY", "interval"),
+        "slow_query_ms": float(os.getenv("DB_SLOW_QUERY_MS", 250)),
+        "log_sample_rate": float(os.getenv("DB_LOG_SAMPLE_RATE", 0)),
+        "history_flush_interval": float(os.getenv("DB_HISTORY_FLUSH_INTERVAL", 10)),
+        "history_max_buffered": int(os.getenv("DB_HISTORY_MAX_BUFFERED", 200)),
+        "history_max_backlog": int(os.getenv("DB_HISTORY_MAX_BACKLOG", 10000)),
+    }
+
+    if backend == "sqlite":
+        return SQLiteDatabase(
+            path=os.getenv("DB_PATH") or SQLiteDatabase.default_path(),
+            readers=int(os.getenv("DB_READERS", 4)),
+            **common_settings
+        )
+    if backend != "mysql":
+        raise ValueError(f"Unknown DB_BACKEND {backend!r}, expected 'mysql' or 'sqlite'")
+
+    return Database(
         host=os.getenv("DB_HOST"),
         port=int(os.getenv("DB_PORT")) if os.getenv("DB_PORT") else 3306,
         user=os.getenv("DB_USERNAME"),
         password=os.getenv("DB_PASSWORD"),
-        database=os.getenv("DB_NAME")
+        database=os.getenv("DB_NAME"),
+        health_check_interval=float(os.getenv("DB_HEALTH_CHECK_INTERVAL", 30)),
+        **common_settings
     )
+
+dotenv.load_dotenv(".env")
+
+try:
+    db = create_database()
 except ValueError as e:
-    logger.error(f"Invalid port number in environment variables: {e}")
+    logger.error(f"Invalid database settings in environment variables: {e}")
     db = None
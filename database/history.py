@@ -0,0 +1,143 @@
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Rollup periods and their bucket size in seconds
+ROLLUP_PERIODS = {
+    "hour": 3600,
+    "day": 86400,
+}
+
+
+class EventHistory:
+    """Append-only VirtualFisher event log with incrementally maintained rollups.
+
+    ``record`` only appends to an in-memory buffer. ``flush`` writes the buffered rows to
+    ``virtualfisher_event`` with one multi-row INSERT and adds their counts and amounts to the
+    hourly/daily buckets in ``virtualfisher_rollup`` in the same transaction, so range queries
+    read a handful of rollup rows no matter how large the event table grows.
+
+    Events whose flush failed stay buffered for the next one. While the database is
+    unreachable the buffer holds at most ``max_backlog`` events, the oldest are dropped.
+    """
+
+    def __init__(self, database, flush_interval: float = 10.0, max_buffered: int = 200, max_backlog: int = 10000):
+        self.database = database
+        self.flush_interval = flush_interval
+        self.max_buffered = max_buffered
+        self.max_backlog = max_backlog
+        self._buffer: list[tuple[int, int, str, int]] = []
+        self._flush_lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+        self._threshold_flush: asyncio.Task | None = None
+        self.stats = {
+            "recorded": 0,
+            "flushes": 0,
+            "events_written": 0,
+            "failures": 0,
+            "dropped": 0,
+        }
+
+    def start(self):
+        """Start the periodic flush task. Calling it again while running is a no-op."""
+        if self._task is not None and not self._task.done():
+            return
+        self._task = asyncio.create_task(self._flush_loop(), name="database-history")
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Periodic history flush failed: {e}")
+
+    def record(self, user_id: int, kind: str, amount: int = 0, ts: int = None):
+        """Buffer one event, a full buffer is flushed in the background."""
+        self._buffer.append((user_id, int(ts if ts is not None else time.time()), kind, amount))
+        self.stats["recorded"] += 1
+        self._trim()
+
+        if len(self._buffer) >= self.max_buffered and (
+                self._threshold_flush is None or self._threshold_flush.done()):
+            self._threshold_flush = asyncio.create_task(self.flush())
+
+    @staticmethod
+    def _rollup_rows(events: list[tuple[int, int, str, int]]) -> list[tuple]:
+        """Pre-aggregate a batch of events into one increment per rollup bucket."""
+        buckets: dict[tuple, list[int]] = {}
+        for user_id, ts, kind, amount in events:
+            for period, size in ROLLUP_PERIODS.items():
+                totals = buckets.setdefault((user_id, period, ts - ts % size, kind), [0, 0])
+                totals[0] += 1
+                totals[1] += amount
+        return [(*key, count, amount) for key, (count, amount) in buckets.items()]
+
+    async def flush(self):
+        """Write buffered events and their rollup increments in one transaction."""
+        async with self._flush_lock:
+            if not self._buffer:
+                return
+
+            events, self._buffer = self._buffer, []
+            rollup_statement = self.database.increment_statement(
+                "virtualfisher_rollup",
+                keys=("user_id", "resolution", "bucket", "kind"),
+                counters=("events", "amount"),
+            )
+            try:
+                async with self.database.transaction() as transaction:
+                    await transaction.execute_many(
+                        "INSERT INTO virtualfisher_event (user_id, ts, kind, amount) VALUES (%s, %s, %s, %s)",
+                        events
+                    )
+                    await transaction.execute_many(rollup_statement, self._rollup_rows(events))
+                self.stats["events_written"] += len(events)
+            except Exception as e:
+                self.stats["failures"] += 1
+                self._buffer[:0] = events
+                self._trim()
+                logger.error(f"History flush of {len(events)} events failed, keeping {len(self._buffer)} buffered "
+                             f"({self.stats['dropped']} dropped so far): {e}")
+
+            self.stats["flushes"] += 1
+
+    def _trim(self):
+        overflow = len(self._buffer) - self.max_backlog
+        if overflow > 0:
+            del self._buffer[:overflow]
+            self.stats["dropped"] += overflow
+
+    async def close(self):
+        """Stop the periodic task and flush whatever is still buffered."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        await self.flush()
+
+    async def totals(self, user_id: int, kind: str, since: int, until: int = None, period: str = "hour") -> list[dict]:
+        """Per-bucket event count and amount for ``kind`` between ``since`` and ``until`` (unix seconds)."""
+        if period not in ROLLUP_PERIODS:
+            raise ValueError(f"Unknown rollup period {period!r}, expected one of {tuple(ROLLUP_PERIODS)}")
+
+        until = int(until if until is not None else time.time())
+        size = ROLLUP_PERIODS[period]
+        return await self.database.fetch(
+            "SELECT bucket, events, amount FROM virtualfisher_rollup "
+            "WHERE user_id = %s AND resolution = %s AND kind = %s AND bucket >= %s AND bucket <= %s "
+            "ORDER BY bucket",
+            (user_id, period, kind, int(since) - int(since) % size, until)
+        ) or []
+
+    async def rate_per_hour(self, user_id: int, kind: str, hours: int = 168) -> float:
+        """Average amount of ``kind`` per hour over the last ``hours`` hours, read from hourly rollups."""
+        now = int(time.time())
+        rows = await self.totals(user_id, kind, since=now - hours * 3600, until=now)
+        return sum(row["amount"] for row in rows) / hours if hours else 0.0
@@ -0,0 +1,109 @@
+import collections
+import contextlib
+import functools
+import logging
+import random
+import re
+import time
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+_LITERALS = re.compile(r"'(?:[^'\\]|\\.)*'|\b\d+(?:\.\d+)?\b")
+
+
+@functools.lru_cache(maxsize=1024)
+def query_shape(query: str) -> str:
+    """Normalise a query so every call of the same statement lands in one bucket.
+
+    Whitespace is collapsed and inline literals are replaced by ``?``; parameters passed
+    separately are never part of the shape.
+    """
+    return _LITERALS.sub("?", _WHITESPACE.sub(" ", query).strip())
+
+
+class ShapeStats:
+    """Counters and a bounded latency sample for one query shape."""
+    __slots__ = ("count", "errors", "total", "max", "samples")
+
+    def __init__(self, sample_size: int):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples = collections.deque(maxlen=sample_size)
+
+    def percentile(self, fraction: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class QueryStats:
+    """In-memory timing of database calls, grouped by query shape.
+
+    Percentiles are computed over the last ``sample_size`` calls of each shape. Calls slower
+    than ``slow_query_ms`` are logged at WARNING. Routine query logging goes to DEBUG, except
+    for a ``log_sample_rate`` fraction of calls which are logged at INFO.
+    """
+
+    def __init__(self, slow_query_ms: float = 250.0, log_sample_rate: float = 0.0, sample_size: int = 512):
+        self.slow_query_ms = slow_query_ms
+        self.log_sample_rate = log_sample_rate
+        self.sample_size = sample_size
+        self.shapes: dict[str, ShapeStats] = {}
+
+    def log_query(self, action: str, query: str, args=None):
+        """Log a query lazily, the message is only formatted if a handler will emit it."""
+        if self.log_sample_rate and random.random() < self.log_sample_rate:
+            logger.info("%s: %s with args: %s", action, query, args)
+        else:
+            logger.debug("%s: %s with args: %s", action, query, args)
+
+    def record(self, shape: str, elapsed: float, error: bool = False):
+        stats = self.shapes.get(shape)
+        if stats is None:
+            stats = self.shapes[shape] = ShapeStats(self.sample_size)
+
+        stats.count += 1
+        stats.total += elapsed
+        stats.samples.append(elapsed)
+        if elapsed > stats.max:
+            stats.max = elapsed
+        if error:
+            stats.errors += 1
+
+        if elapsed * 1000 >= self.slow_query_ms:
+            logger.warning("Slow query (%.1f ms): %s", elapsed * 1000, shape)
+
+    @contextlib.contextmanager
+    def timed(self, query: str):
+        """Time the wrapped database call and record it under the shape of ``query``."""
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.record(query_shape(query), time.perf_counter() - start, error=True)
+            raise
+        self.record(query_shape(query), time.perf_counter() - start)
+
+    def top(self, limit: int = 10) -> list[dict]:
+        """Query shapes ordered by total time spent, with latencies in milliseconds."""
+        ordered = sorted(self.shapes.items(), key=lambda item: item[1].total, reverse=True)
+        return [
+            {
+                "shape": shape,
+                "count": stats.count,
+                "errors": stats.errors,
+                "total_ms": stats.total * 1000,
+                "p50_ms": stats.percentile(0.50) * 1000,
+                "p95_ms": stats.percentile(0.95) * 1000,
+                "p99_ms": stats.percentile(0.99) * 1000,
+                "max_ms": stats.max * 1000,
+            }
+            for shape, stats in ordered[:limit]
+        ]
+
+    def reset(self):
+        self.shapes.clear()
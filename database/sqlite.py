@@ -0,0 +1,240 @@
+import asyncio
+import contextlib
+import functools
+import logging
+import os
+import sqlite3
+import aiosqlite
+from .base import BaseDatabase, batch_shape, load_statements
+
+logger = logging.getLogger(__name__)
+
+
+@functools.lru_cache(maxsize=512)
+def to_sqlite(query: str) -> str:
+    """Translate the ``%s`` placeholders used across the code base to SQLite's ``?``."""
+    return query.replace("%s", "?")
+
+
+@functools.lru_cache(maxsize=32)
+def increment_statement(table: str, keys: tuple[str, ...], counters: tuple[str, ...]) -> str:
+    """INSERT that adds ``counters`` onto an existing row with the same key (SQLite upsert)."""
+    columns = (*keys, *counters)
+    placeholders = ", ".join(["%s"] * len(columns))
+    updates = ", ".join(f"{counter} = {counter} + excluded.{counter}" for counter in counters)
+    return (f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders}) "
+            f"ON CONFLICT ({', '.join(keys)}) DO UPDATE SET {updates}")
+
+
+def _dict_factory(cursor, row) -> dict:
+    return {column[0]: value for column, value in zip(cursor.description, row)}
+
+
+class SQLiteTransaction:
+    """Statements issued through the writer connection inside ``SQLiteDatabase.transaction()``."""
+
+    def __init__(self, conn: aiosqlite.Connection):
+        self.conn = conn
+
+    async def execute(self, query: str, args: tuple = None) -> int:
+        """Execute a query and return the number of affected rows."""
+        cursor = await self.conn.execute(to_sqlite(query), args or ())
+        return cursor.rowcount
+
+    async def execute_many(self, query: str, args_seq: list[tuple]) -> int:
+        cursor = await self.conn.executemany(to_sqlite(query), args_seq)
+        return cursor.rowcount
+
+    async def fetch(self, query: str, args: tuple = None, one: bool = False) -> dict | list[dict] | None:
+        async with self.conn.execute(to_sqlite(query), args or ()) as cursor:
+            if one:
+                return await cursor.fetchone()
+            return await cursor.fetchall()
+
+
+class SQLiteDatabase(BaseDatabase):
+    """Local storage backend for small deployments, selected with ``DB_BACKEND=sqlite``.
+
+    The database runs in WAL mode with one dedicated writer connection (writes are serialised
+    through a lock) and a small pool of reader connections, so reads never wait on a write.
+    Queries use the same ``%s`` placeholders as the MySQL backend.
+    """
+    backend = "sqlite"
+    schema_file = "table_sqlite.sql"
+    increment_statement = staticmethod(increment_statement)
+
+    def __init__(self,
+                 path: str,
+                 readers: int = 4,
+                 flush_interval: float = 5.0,
+                 max_pending_writes: int = 50,
+                 durability: str = "interval",
+                 slow_query_ms: float = 250.0,
+                 log_sample_rate: float = 0.0,
+                 history_flush_interval: float = 10.0,
+                 history_max_buffered: int = 200,
+                 history_max_backlog: int = 10000):
+        super().__init__(flush_interval=flush_interval,
+                         max_pending_writes=max_pending_writes,
+                         durability=durability,
+                         slow_query_ms=slow_query_ms,
+                         log_sample_rate=log_sample_rate,
+                         history_flush_interval=history_flush_interval,
+                         history_max_buffered=history_max_buffered,
+                         history_max_backlog=history_max_backlog)
+        self.path = path
+        # An in-memory database only exists on the connection that created it.
+        self.reader_count = 0 if path == ":memory:" else max(1, readers)
+        self.writer: aiosqlite.Connection | None = None
+        self._readers: asyncio.Queue | None = None
+        self._reader_connections: list[aiosqlite.Connection] = []
+        self._write_lock = asyncio.Lock()
+
+    @staticmethod
+    def default_path() -> str:
+        return os.path.join(os.path.dirname(os.path.abspath(__file__)), "selfbot.sqlite3")
+
+    async def _open(self) -> aiosqlite.Connection:
+        conn = await aiosqlite.connect(self.path, isolation_level=None)
+        conn.row_factory = _dict_factory
+        await conn.execute("PRAGMA busy_timeout = 5000")
+        await conn.execute("PRAGMA foreign_keys = ON")
+        return conn
+
+    async def connect(self):
+        """Open the writer and reader connections and create missing tables."""
+        try:
+            self.writer = await self._open()
+            await self.writer.execute("PRAGMA journal_mode = WAL")
+            # WAL + NORMAL only syncs on checkpoints, a crash can lose the last commits but never corrupts.
+            await self.writer.execute("PRAGMA synchronous = NORMAL")
+            await self.create_tables()
+            await self.migrate()
+
+            self._readers = asyncio.Queue()
+            for _ in range(self.reader_count):
+                conn = await self._open()
+                self._reader_connections.append(conn)
+                self._readers.put_nowait(conn)
+            logger.info(f"SQLite database opened at {self.path} with {self.reader_count} readers.")
+            self.write_behind.start()
+            self.history.start()
+        except Exception as e:
+            logger.error(f"Failed to open SQLite database: {e}")
+            raise
+
+    async def close(self):
+        await self.history.close()
+        await self.write_behind.close()
+        for conn in self._reader_connections:
+            await conn.close()
+        self._reader_connections.clear()
+        if self.writer:
+            await self.writer.close()
+            self.writer = None
+            logger.info("SQLite database closed.")
+
+    def is_connection_error(self, error: Exception) -> bool:
+        # A locked or unreachable file, not a statement SQLite rejected
+        return isinstance(error, sqlite3.OperationalError) and ("locked" in str(error) or "unable to open" in str(error))
+
+    async def table_columns(self, table: str) -> set[str]:
+        async with self.writer.execute(f"PRAGMA table_info({table})") as cursor:
+            return {row["name"] for row in await cursor.fetchall()}
+
+    async def create_tables(self):
+        """Create database tables from SQL file."""
+        try:
+            queries = load_statements(self.schema_path)
+        except Exception as e:
+            logger.error(f"Error reading SQL file: {e}")
+            return
+        await self.execute_batch([(query, None) for query in queries])
+
+    async def execute(self, query: str, args: tuple = None) -> None:
+        """Execute a query without returning results."""
+        if not self.writer:
+            logger.error("Database is not opened. Call connect() first.")
+            return
+
+        self.query_stats.log_query("Executing query", query, args)
+        with self.query_stats.timed(query):
+            async with self._write_lock:
+                await self.writer.execute(to_sqlite(query), args or ())
+
+    async def execute_many(self, query: str, args_seq: list[tuple]) -> None:
+        """Execute one query for every argument tuple inside a single transaction."""
+        if not self.writer:
+            logger.error("Database is not opened. Call connect() first.")
+            return
+        if not args_seq:
+            return
+
+        self.query_stats.log_query(f"Executing query {len(args_seq)} times", query)
+        with self.query_stats.timed(query):
+            async with self._transaction() as transaction:
+                await transaction.execute_many(query, args_seq)
+
+    async def execute_batch(self, statements: list[tuple[str, tuple | None]]) -> None:
+        """Run several ``(query, args)`` statements inside a single transaction."""
+        if not self.writer:
+            logger.error("Database is not opened. Call connect() first.")
+            return
+        if not statements:
+            return
+
+        self.query_stats.log_query(f"Executing batch of {len(statements)} statements", statements)
+        with self.query_stats.timed(batch_shape(statements)):
+            async with self._transaction() as transaction:
+                for query, args in statements:
+                    await transaction.execute(query, args)
+
+    @contextlib.asynccontextmanager
+    async def transaction(self):
+        """Run the statements of the ``async with`` block in one write transaction.
+
+        The writer lock is held for the whole block, so don't call ``execute`` on the
+        database itself from inside it.
+        """
+        with self.query_stats.timed("TRANSACTION"):
+            async with self._transaction() as transaction:
+                yield transaction
+
+    @contextlib.asynccontextmanager
+    async def _transaction(self):
+        async with self._write_lock:
+            await self.writer.execute("BEGIN IMMEDIATE")
+            try:
+                yield SQLiteTransaction(self.writer)
+            except BaseException:
+                with contextlib.suppress(Exception):
+                    await self.writer.execute("ROLLBACK")
+                raise
+            else:
+                await self.writer.execute("COMMIT")
+
+    async def fetch(self, query: str, args: tuple = None, one: bool = False) -> dict | list[dict] | None:
+        """Fetch data from database."""
+        if not self.writer:
+            logger.error("Database is not opened. Call connect() first.")
+            return None
+
+        self.query_stats.log_query("Fetching data with query", query, args)
+        with self.query_stats.timed(query):
+            if not self.reader_count:
+                async with self._write_lock:
+                    return await SQLiteTransaction(self.writer).fetch(query, args, one)
+
+            conn = await self._readers.get()
+            try:
+                return await SQLiteTransaction(conn).fetch(query, args, one)
+            finally:
+                self._readers.put_nowait(conn)
+
+    def metrics(self) -> dict:
+        return {
+            **super().metrics(),
+            "path": self.path,
+            "readers": self.reader_count,
+            "readers_idle": self._readers.qsize() if self._readers else 0,
+        }
@@ -13,6 +13,10 @@ CREATE TABLE if not exists `virtualfisher` (
     `clan` varchar(255) DEFAULT 'no clan',
     `biome` varchar(255) DEFAULT 'River',
     `trip` int DEFAULT '0' NULL,
+    `trips` int DEFAULT '0',
+    `balance` bigint DEFAULT '0',
+    `gold_fish` int DEFAULT '0',
+    `emerald_fish` int DEFAULT '0',
     PRIMARY KEY (`id`),
     KEY `user_id_idx` (`user_id`),
     CONSTRAINT `virtualfisher_user_id`
@@ -31,4 +35,24 @@ CREATE TABLE IF NOT EXISTS`settings` (
     CONSTRAINT `settings_user_id`
         FOREIGN KEY (`user_id`)
             REFERENCES `user` (`user_id`)
-)
\ No newline at end of file
+);
+
+CREATE TABLE IF NOT EXISTS `virtualfisher_event` (
+    `id` bigint NOT NULL AUTO_INCREMENT,
+    `user_id` bigint NOT NULL,
+    `ts` bigint NOT NULL,
+    `kind` varchar(32) NOT NULL,
+    `amount` bigint NOT NULL DEFAULT '0',
+    PRIMARY KEY (`id`),
+    KEY `user_ts_idx` (`user_id`, `ts`)
+);
+
+CREATE TABLE IF NOT EXISTS `virtualfisher_rollup` (
+    `user_id` bigint NOT NULL,
+    `resolution` varchar(8) NOT NULL,
+    `bucket` bigint NOT NULL,
+    `kind` varchar(32) NOT NULL,
+    `events` int NOT NULL DEFAULT '0',
+    `amount` bigint NOT NULL DEFAULT '0',
+    PRIMARY KEY (`user_id`, `resolution`, `kind`, `bucket`)
+)
@@ -0,0 +1,51 @@
+CREATE TABLE IF NOT EXISTS `user` (
+    `user_id` INTEGER NOT NULL PRIMARY KEY,
+    `global_name` TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS `virtualfisher` (
+    `id` INTEGER PRIMARY KEY AUTOINCREMENT,
+    `user_id` INTEGER NOT NULL REFERENCES `user` (`user_id`),
+    `level` INTEGER DEFAULT 0,
+    `money` INTEGER DEFAULT 0,
+    `clan` TEXT DEFAULT 'no clan',
+    `biome` TEXT DEFAULT 'River',
+    `trip` INTEGER DEFAULT 0,
+    `trips` INTEGER DEFAULT 0,
+    `balance` INTEGER DEFAULT 0,
+    `gold_fish` INTEGER DEFAULT 0,
+    `emerald_fish` INTEGER DEFAULT 0
+);
+
+CREATE INDEX IF NOT EXISTS `virtualfisher_user_id_idx` ON `virtualfisher` (`user_id`);
+
+CREATE TABLE IF NOT EXISTS `settings` (
+    `id` INTEGER PRIMARY KEY AUTOINCREMENT,
+    `user_id` INTEGER NOT NULL REFERENCES `user` (`user_id`),
+    `prefix` TEXT DEFAULT '!',
+    `owner_id` INTEGER DEFAULT NULL,
+    `server_id` INTEGER DEFAULT NULL
+);
+
+CREATE INDEX IF NOT EXISTS `settings_user_id_idx` ON `settings` (`user_id`)
+;
+
+CREATE TABLE IF NOT EXISTS `virtualfisher_event` (
+    `id` INTEGER PRIMARY KEY AUTOINCREMENT,
+    `user_id` INTEGER NOT NULL,
+    `ts` INTEGER NOT NULL,
+    `kind` TEXT NOT NULL,
+    `amount` INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE INDEX IF NOT EXISTS `virtualfisher_event_user_ts_idx` ON `virtualfisher_event` (`user_id`, `ts`);
+
+CREATE TABLE IF NOT EXISTS `virtualfisher_rollup` (
+    `user_id` INTEGER NOT NULL,
+    `resolution` TEXT NOT NULL,
+    `bucket` INTEGER NOT NULL,
+    `kind` TEXT NOT NULL,
+    `events` INTEGER NOT NULL DEFAULT 0,
+    `amount` INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (`user_id`, `resolution`, `kind`, `bucket`)
+)
@@ -0,0 +1,158 @@
+import asyncio
+import functools
+import logging
+
+logger = logging.getLogger(__name__)
+
+DURABILITY_MODES = ("interval", "immediate")
+
+
+@functools.lru_cache(maxsize=256)
+def update_statement(table: str, columns: tuple[str, ...], key_column: str) -> str:
+    """Build (and cache) the UPDATE statement for one set of dirty columns."""
+    assignments = ", ".join(f"{column} = %s" for column in columns)
+    return f"UPDATE {table} SET {assignments} WHERE {key_column} = %s"
+
+
+class WriteBehind:
+    """Buffer per-row field updates in memory and flush them as one combined UPDATE per row.
+
+    Updates for the same ``(table, key_column, key)`` are merged, so ten trips followed by a
+    sale only cost a single ``UPDATE ... SET trips = %s, balance = %s`` when the buffer flushes.
+    The buffer is flushed on a timer, when ``max_pending`` updates have been queued and on close.
+
+    ``durability`` controls how long dirty values may live only in memory:
+    ``"interval"`` (default) waits for the timer or size threshold, ``"immediate"`` flushes
+    after every update (write-through, but still through the same combined statement).
+
+    When the batch fails the rows are written one by one, so one bad row doesn't hold back
+    the others. Rows that fail because the database is unreachable stay queued; a row the
+    database rejects itself is retried ``max_row_attempts`` times and then dropped.
+    """
+
+    def __init__(self,
+                 database,
+                 flush_interval: float = 5.0,
+                 max_pending: int = 50,
+                 durability: str = "interval",
+                 max_row_attempts: int = 3):
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"Invalid durability mode {durability!r}, expected one of {DURABILITY_MODES}")
+
+        self.database = database
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.durability = durability
+        self.max_row_attempts = max_row_attempts
+        self._pending: dict[tuple[str, str, object], dict] = {}
+        # Row key -> flushes in a row the database rejected it
+        self._row_failures: dict[tuple[str, str, object], int] = {}
+        self._queued_since_flush = 0
+        self._flush_lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+        self.stats = {
+            "queued": 0,
+            "flushes": 0,
+            "rows_written": 0,
+            "failures": 0,
+            "rows_dropped": 0,
+        }
+
+    @property
+    def pending(self) -> int:
+        """Number of rows that currently have unflushed changes."""
+        return len(self._pending)
+
+    def start(self):
+        """Start the periodic flush task. Calling it again while running is a no-op."""
+        if self._task is not None and not self._task.done():
+            return
+        self._task = asyncio.create_task(self._flush_loop(), name="database-write-behind")
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Periodic write-behind flush failed: {e}")
+
+    async def update(self, table: str, key, fields: dict, key_column: str = "user_id"):
+        """Merge ``fields`` into the pending changes of one row."""
+        if not fields:
+            return
+
+        row = self._pending.setdefault((table, key_column, key), {})
+        row.update(fields)
+        self._queued_since_flush += 1
+        self.stats["queued"] += 1
+
+        if self.durability == "immediate" or self._queued_since_flush >= self.max_pending:
+            await self.flush()
+
+    async def flush(self):
+        """Write every pending row as one UPDATE per row, all in a single batch."""
+        async with self._flush_lock:
+            if not self._pending:
+                return
+
+            pending, self._pending = self._pending, {}
+            self._queued_since_flush = 0
+
+            statements = {
+                row_key: (update_statement(row_key[0], tuple(fields), row_key[1]), (*fields.values(), row_key[2]))
+                for row_key, fields in pending.items()
+            }
+            try:
+                await self.database.execute_batch(list(statements.values()))
+                self.stats["rows_written"] += len(statements)
+                self._row_failures.clear()
+            except Exception as e:
+                self.stats["failures"] += 1
+                if self.database.is_connection_error(e):
+                    logger.error(f"Write-behind flush of {len(statements)} rows failed, keeping them queued: {e}")
+                    self._requeue(pending)
+                else:
+                    logger.error(f"Write-behind flush of {len(statements)} rows failed, writing them one by one: {e}")
+                    await self._flush_rows(pending, statements)
+
+            self.stats["flushes"] += 1
+
+    async def _flush_rows(self, pending: dict, statements: dict):
+        for row_key, (query, args) in statements.items():
+            try:
+                await self.database.execute(query, args)
+            except Exception as e:
+                if self.database.is_connection_error(e):
+                    self._requeue({row_key: pending[row_key]})
+                    continue
+                attempts = self._row_failures.get(row_key, 0) + 1
+                if attempts >= self.max_row_attempts:
+                    self._row_failures.pop(row_key, None)
+                    self.stats["rows_dropped"] += 1
+                    logger.error(f"Dropping write-behind row {row_key} {pending[row_key]} after {attempts} failed flushes: {e}")
+                    continue
+                self._row_failures[row_key] = attempts
+                self._requeue({row_key: pending[row_key]})
+            else:
+                self._row_failures.pop(row_key, None)
+                self.stats["rows_written"] += 1
+
+    def _requeue(self, pending: dict):
+        # Values queued while we were flushing are newer, keep those.
+        for row_key, fields in pending.items():
+            row = self._pending.setdefault(row_key, {})
+            for column, value in fields.items():
+                row.setdefault(column, value)
+
+    async def close(self):
+        """Stop the periodic task and flush whatever is still pending."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        await self.flush()
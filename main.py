@@ -1,20 +1,28 @@
 import os
 import asyncio
+import contextlib
+import signal
 import discord
 from dotenv import load_dotenv
-from modules import bot, setup_logging, setup_cogs, setup_events
+from modules import bot, setup_logging, setup_cogs, setup_events, Runtime, load_accounts
+from modules.http import close_session
+from modules.telegram import notif
+from modules.notifications import notifier
 from database.database import db
 
 logger = setup_logging()
 load_dotenv(".env")
 DISCORD_TOKEN = os.getenv("DISCORD_TOKEN")
 WEBHOOK_URL = os.getenv("WEBHOOK_URL")
+ACCOUNTS_FILE = os.getenv("ACCOUNTS_FILE")
+runtime: Runtime | None = None
 
 async def run_bot():
     try:
         logger.info("Starting database Connection!")
         await db.connect()
         logger.info("Database connection established successfully!.")
+        notifier.start()
         await setup_cogs()
         setup_events()
         if not DISCORD_TOKEN:
@@ -26,6 +34,36 @@ async def run_bot():
         await bot.close()
         await asyncio.sleep(5)
 
+async def run_accounts():
+    accounts = load_accounts(ACCOUNTS_FILE)
+    if not accounts:
+        logger.error(f"No usable accounts found in {ACCOUNTS_FILE}!")
+        return
+    logger.info(f"Starting {len(accounts)} account(s) from {ACCOUNTS_FILE}")
+    global runtime
+    runtime = Runtime(accounts)
+    await runtime.start()
+
+async def main():
+    # docker stop sends SIGTERM, turn it into a cancellation so shutdown() still flushes the buffers
+    with contextlib.suppress(NotImplementedError):
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+    await (run_accounts() if ACCOUNTS_FILE else run_bot())
+
+async def shutdown():
+    if runtime is not None:
+        # Closes every account first, then the same shared resources as below
+        await runtime.close()
+        return
+    # Unload the cogs (final snapshot) and stop the bot's tasks before the pool goes away
+    if not bot.is_closed():
+        await bot.close()
+    # Write out whatever the write-behind buffer still holds
+    await db.close()
+    await notifier.close()
+    await notif.close()
+    await close_session()
+
 def exception_handler(loop, context):
     exception = context.get("exception")
     if isinstance(exception, (asyncio.CancelledError, KeyboardInterrupt)) or 'KeyboardInterrupt' in str(context):
@@ -39,8 +77,9 @@ if __name__ == "__main__":
     asyncio.set_event_loop(event)
     event.set_exception_handler(exception_handler)
     try:
-        event.run_until_complete(run_bot())
-    except KeyboardInterrupt:
+        event.run_until_complete(main())
+    except (KeyboardInterrupt, asyncio.CancelledError):
         pass
     finally:
+        event.run_until_complete(shutdown())
         event.close()
\ No newline at end of file
@@ -2,3 +2,4 @@ from .bot import bot, Bot
 from .setup_logging import setup_logging
 from .setup_cogs import setup_cogs
 from .events import setup_events
+from .runtime import Runtime, load_accounts
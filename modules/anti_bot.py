@@ -0,0 +1,143 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable
+
+import discord
+
+from .classifier import classifier, EmbedEvent
+from .scheduler import ActionScheduler
+
+logger = logging.getLogger(__name__)
+
+AntiBotHandler = Callable[[EmbedEvent, discord.Embed, discord.Message], Awaitable]
+
+
+class AntiBotWatcher:
+    """Catch anti-bot checks straight from gateway events and hold every action until solved.
+
+    ``Bot.on_message`` and ``Bot.on_message_edit`` feed every message into ``feed``, which
+    only looks further at embeds in a watched channel that answer us. On a check it pauses
+    the account's scheduler and cancels the queued actions synchronously, before anything
+    else handles the event, then runs the channel's handler in the background. The handler
+    answers the check and calls ``resolve``, which resumes the scheduler; what was submitted
+    in the meantime runs in its usual priority order. ``trigger`` is also used when a check
+    is only found in a reply fetched over REST; a check is handled once per message.
+    """
+
+    def __init__(self, scheduler: ActionScheduler, max_seen: int = 64):
+        self.scheduler = scheduler
+        self.max_seen = max_seen
+        self._watched: dict[int, AntiBotHandler] = {}
+        self._seen: OrderedDict[int, None] = OrderedDict()
+        self._tasks: set[asyncio.Task] = set()
+        self.detected_at: float | None = None
+        self.solved_at: float | None = None
+        self.stats = {
+            "detected": 0,
+            "repeats": 0,
+            "cancelled": 0,
+            "solved": 0,
+            "resolved": 0,
+            "gateway_lag_ms": 0.0,
+            "last_solve_ms": 0.0,
+            "last_resolve_ms": 0.0,
+            "max_resolve_ms": 0.0,
+            "resolve_total_ms": 0.0,
+        }
+
+    @property
+    def active(self) -> bool:
+        return self.detected_at is not None
+
+    def watch(self, channel_id: int, handler: AntiBotHandler):
+        self._watched[channel_id] = handler
+
+    def unwatch(self, channel_id: int):
+        self._watched.pop(channel_id, None)
+
+    def feed(self, message: discord.Message, user_id: int):
+        """Look for a check addressed to ``user_id``, cheap for everything else."""
+        if not message.embeds or message.channel.id not in self._watched:
+            return
+        interaction = message.interaction
+        if interaction is not None:
+            if interaction.user.id != user_id:
+                return
+        elif not any(user.id == user_id for user in message.mentions):
+            return
+
+        for embed in message.embeds:
+            for event in classifier.classify_embed(embed):
+                if event.kind == "anti_bot":
+                    self.trigger(message, event, embed)
+                    return
+
+    def trigger(self, message: discord.Message, event: EmbedEvent, embed: discord.Embed) -> bool:
+        """Pause and cancel everything for the check in ``message``, False if it was already handled."""
+        if message.id in self._seen:
+            return False
+        self._seen[message.id] = None
+        while len(self._seen) > self.max_seen:
+            self._seen.popitem(last=False)
+        if self.active:
+            # The game repeats the prompt to commands that were already in flight
+            self.stats["repeats"] += 1
+            return False
+
+        self.detected_at = time.monotonic()
+        self.solved_at = None
+        self.scheduler.pause("anti-bot check")
+        cancelled = self.scheduler.cancel()
+        self.stats["detected"] += 1
+        self.stats["cancelled"] += cancelled
+        sent_at = message.edited_at or message.created_at
+        if sent_at is not None:
+            self.stats["gateway_lag_ms"] = round((discord.utils.utcnow() - sent_at).total_seconds() * 1000, 1)
+        logger.warning(f"Anti-bot check detected, paused and cancelled {cancelled} queued action(s)")
+
+        handler = self._watched.get(message.channel.id)
+        if handler is not None:
+            task = asyncio.create_task(self._run(handler, event, embed, message), name="anti-bot")
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        return True
+
+    async def _run(self, handler: AntiBotHandler, event: EmbedEvent, embed: discord.Embed, message: discord.Message):
+        try:
+            await handler(event, embed, message)
+        except Exception as e:
+            logger.error(f"Anti-bot handler failed, staying paused until the check is answered: {e}")
+
+    def solved(self):
+        """The answer was sent."""
+        if self.detected_at is not None:
+            self.solved_at = time.monotonic()
+            self.stats["solved"] += 1
+            self.stats["last_solve_ms"] = round((self.solved_at - self.detected_at) * 1000, 1)
+
+    def resolve(self):
+        """The check is answered, resume every queued action."""
+        if self.detected_at is not None:
+            elapsed = round((time.monotonic() - self.detected_at) * 1000, 1)
+            self.stats["resolved"] += 1
+            self.stats["last_resolve_ms"] = elapsed
+            self.stats["max_resolve_ms"] = max(self.stats["max_resolve_ms"], elapsed)
+            self.stats["resolve_total_ms"] += elapsed
+            logger.info(f"Anti-bot check resolved after {elapsed:.0f}ms")
+        self.detected_at = None
+        self.scheduler.resume()
+
+    def metrics(self) -> dict:
+        resolved = self.stats["resolved"]
+        return {
+            **self.stats,
+            "active": self.active,
+            "avg_resolve_ms": round(self.stats["resolve_total_ms"] / resolved, 1) if resolved else 0.0,
+        }
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
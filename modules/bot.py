@@ -1,62 +1,162 @@
+import asyncio
 import logging
 import os
 
 import discord
 from discord.ext import commands
-from database.database import db, Database
+from discord.ext.commands.view import StringView
+from database.database import db
+from database.base import BaseDatabase
 from .telegram import notif, Telegram
+from .notifications import notifier, NotificationDispatcher
 from .embed import EmbedManager
+from .dashboard import Dashboard
+from .interactions import InteractionRegistry
+from .scheduler import ActionScheduler
+from .pacing import PacingController
+from .anti_bot import AntiBotWatcher
+from .command_runner import CommandRunner
 
 logger = logging.getLogger(__name__)
 
 class Bot(commands.Bot):
     def __init__(
             self,
-            database_conn: Database,
+            database_conn: BaseDatabase,
             telegram_notif: Telegram,
             *args,
+            account: dict = None,
+            notification_dispatcher: NotificationDispatcher = None,
             **kwargs
     ):
+        # Rate limits longer than this raise discord.RateLimited instead of sleeping, so pacing sees them
+        kwargs.setdefault("max_ratelimit_timeout", float(os.getenv("DISCORD_MAX_RATELIMIT_TIMEOUT", 30)))
         super().__init__(*args, **kwargs)
         self.database = database_conn
         self.telegram_notif = telegram_notif
+        # Rate limited, coalescing front of ``telegram_notif``; routine notifications go through here
+        self.notifier = notification_dispatcher or notifier
+        # Entry from the accounts file (name, token, webhook_url, owner_id, server_id), empty for a single account
+        self.account = account or {}
+        self.account_name = self.account.get("name", "default")
+        self.runtime = None
         self.embed = None
         self.message_embed = None
         self.data_embed = {}
+        # Cogs add their sections here, it edits the status embed once setup sent it
+        self.dashboard = Dashboard(interval=float(os.getenv("DASHBOARD_INTERVAL", 15)))
+        # Replies to our slash commands, resolved from gateway events
+        self.interactions = InteractionRegistry(timeout=float(os.getenv("INTERACTION_TIMEOUT", 10)))
+        # Every game action of this account goes through here, cogs register their cooldowns
+        self.scheduler = ActionScheduler(channel_concurrency=int(os.getenv("SCHEDULER_CHANNEL_CONCURRENCY", 1)),
+                                         name=self.account_name)
+        # Delay between fishing trips, learned from cooldown replies, 429s and anti-bot checks
+        self.pacing = PacingController(minimum=float(os.getenv("PACING_MIN_INTERVAL", 3.5)),
+                                       maximum=float(os.getenv("PACING_MAX_INTERVAL", 120)),
+                                       initial=float(os.getenv("PACING_INITIAL_INTERVAL", 30)),
+                                       jitter=float(os.getenv("PACING_JITTER", 0.25)),
+                                       break_chance=float(os.getenv("PACING_BREAK_CHANCE", 0.02)))
+        # Pauses the scheduler the moment an anti-bot check arrives on the gateway
+        self.anti_bot = AntiBotWatcher(self.scheduler)
+        # Set once setup() made sure the user and settings rows exist, cogs wait on it before their own rows
+        self.settings_loaded = asyncio.Event()
+        # Prefix commands run here as supervised tasks, so a slow one never holds up the next message
+        self.command_runner = CommandRunner(global_limit=int(os.getenv("COMMAND_CONCURRENCY", 4)),
+                                            per_command_limit=int(os.getenv("COMMAND_PER_COMMAND_CONCURRENCY", 1)),
+                                            max_queue=int(os.getenv("COMMAND_MAX_QUEUE", 5)))
+        # Filled by setup_hook and add_cog, parse() only reads them
+        self._user_id = 0
+        self._command_table: dict[str, tuple[commands.Command, str, bool, int | None]] = {}
+        self._background_tasks: set[asyncio.Task] = set()
         self.owner = None
 
 
+    async def setup_hook(self):
+        # Cached for parse(), rejecting everybody else's messages is a single integer compare
+        self._user_id = self.user.id
+
+    async def add_cog(self, cog: commands.Cog, /, **kwargs):
+        await super().add_cog(cog, **kwargs)
+        self._build_command_table()
+
+    async def remove_cog(self, name: str, /, **kwargs):
+        cog = await super().remove_cog(name, **kwargs)
+        self._build_command_table()
+        return cog
+
+    def _build_command_table(self):
+        """Command names and aliases -> (command, qualified name, inline, concurrency), read by parse().
+
+        Resolved here once instead of per message: qualified_name walks the parent chain on
+        every access.
+        """
+        self._command_table = {
+            name: (command, command.qualified_name, bool(command.extras.get("inline")), command.extras.get("concurrency"))
+            for name, command in self.all_commands.items()
+        }
+
+    async def _hide_command(self, message: discord.Message):
+        """Delete the command message and show typing while the command already runs."""
+        for what, action in (("delete command message", message.delete), ("send typing", message.channel.typing)):
+            try:
+                await action()
+            except discord.HTTPException as e:
+                logger.warning(f"Failed to {what}: {e}")
+
     async def parse(self, message: discord.Message):
-        if not message.guild:
+        if message.author.id != self._user_id:
             return
-
-        if message.author.id == self.user.id:
-            if message.content.startswith(self.command_prefix):
+        content = message.content
+        prefix = self.command_prefix
+        if not content.startswith(prefix) or message.guild is None:
+            return
+        # Kept out of parse(): its locals and closure would slow down every rejected message
+        await self._dispatch(message, content, prefix)
+
+    async def _dispatch(self, message: discord.Message, content: str, prefix: str):
+        try:
+            parts = content[len(prefix):].split()
+            if not parts:
+                return
+            command_name, args = parts[0], parts[1:]
+            logger.info(f"Get Command With Command Name: {prefix}{command_name}")
+            # Hiding the command and showing typing don't have to hold the command back
+            task = asyncio.create_task(self._hide_command(message))
+            self._background_tasks.add(task)
+            task.add_done_callback(self._background_tasks.discard)
+
+            entry = self._command_table.get(command_name)
+            if entry is None:
+                await message.channel.send("There is no command with that name!")
+                return
+            command, qualified_name, inline, concurrency = entry
+
+            ctx = commands.Context(message=message, bot=self, view=StringView(content), prefix=prefix,
+                                   command=command, invoked_with=command_name)
+            if inline:
+                # Answers about the runner itself (e.g. jobs) must not wait behind the commands it lists
                 try:
-                    await message.delete()
-                    parts = message.content[1:].split()
-                    command_name = parts[0]
-                    logger.info(f"Get Command With Command Name: {self.command_prefix}{command_name}")
-                    await message.channel.typing()
-                    command = self.get_command(command_name)
-                    ctx = await self.get_context(message)
-                    if command:
-                        try:
-                            args = parts[1] if len(parts) > 1 else ''
-                            if args:
-                                await command(ctx, args) # Although it is not the right type, it works.
-                            else:
-                                await command(ctx) # Although it is not the right type, it works.
-                        except Exception as e:
-                            logger.error(f"Receiving an error when attempting to send a command: {e}")
-                    else:
-                        await message.reply("There is no command with that name!")
+                    await command(ctx, *args) # Although it is not the right type, it works.
                 except Exception as e:
-                    logger.info(f"Error when processing message. Message received {message.content} with error {e}")
+                    logger.error(f"Receiving an error when attempting to send a command: {e}")
+                return
+
+            if not self.command_runner.submit(qualified_name, lambda: command(ctx, *args),
+                                              label=content, limit=concurrency):
+                await message.channel.send(f"Too many {prefix}{qualified_name} commands waiting, "
+                                           f"dropped `{content[:100]}`")
+        except Exception as e:
+            logger.info(f"Error when processing message. Message received {message.content} with error {e}")
 
     async def on_message(self, message):
+        self.anti_bot.feed(message, self._user_id)
+        self.interactions.feed(message)
         await self.parse(message)
 
+    async def on_message_edit(self, before, after):
+        self.anti_bot.feed(after, self._user_id)
+        self.interactions.feed(after, edited=True)
+
     async def setup(self):
         """Get settings and check user from database"""
 
@@ -71,6 +171,12 @@ class Bot(commands.Bot):
         if setting:
             self.command_prefix = setting["prefix"]
             self.owner = self.get_user(setting["owner_id"])
+        elif self.account.get("owner_id"):
+            logger.warning(f"Settings for user {self.user.display_name} not found in database, using the accounts file.")
+            owner_id = int(self.account["owner_id"])
+            server_id = int(self.account["server_id"]) if self.account.get("server_id") else None
+            await self.database.execute("INSERT INTO settings (user_id, owner_id, server_id) VALUES (%s, %s, %s)", (self.user.id, owner_id, server_id))
+            self.owner = self.get_user(owner_id)
         else:
             logger.warning(f"Settings for user {self.user.display_name} not found in database, asking the user to input.")
             ask_owner_id = int(input("Please enter your Discord user ID to set as owner/main account: "))
@@ -78,8 +184,10 @@ class Bot(commands.Bot):
             await self.database.execute("INSERT INTO settings (user_id, owner_id, server_id) VALUES (%s, %s, %s)", (self.user.id, ask_owner_id, ask_server_id))
             logger.warning(f"Prefix not found in settings, using default {self.command_prefix}, you can change it using {self.command_prefix}prefix <new_prefix> command.")
 
+        self.settings_loaded.set()
+
         logger.info("Setting up embed")
-        self.embed = EmbedManager(self, os.getenv("WEBHOOK_URL"))
+        self.embed = EmbedManager(self, self.account.get("webhook_url") or os.getenv("WEBHOOK_URL"))
         self.data_embed = {
             "author": {
                 "name": self.user.name,
@@ -87,14 +195,17 @@ class Bot(commands.Bot):
             },
             "title": "Bot is now online!",
             "description": f"Bot is now online and ready to use!\nUse `{self.command_prefix}help` to see the list of commands.",
-            "fields": [
-                {
-                    "name": "Virtual Fisher",
-                    "value": ""
-                }
-            ]
+            "fields": []
         }
         self.message_embed = await self.embed.create_embed(self.data_embed)
+        self.dashboard.start(self.embed, self.message_embed, self.data_embed)
+
+    async def close(self):
+        await self.command_runner.close()
+        await self.anti_bot.close()
+        await self.scheduler.close()
+        await self.dashboard.close()
+        await super().close()
 
 
 
@@ -104,6 +215,7 @@ bot = Bot(
     command_prefix="!",
     database_conn=db,
     telegram_notif=notif,
+    notification_dispatcher=notifier,
     help_command=None,
     status=discord.Status.online,
 )
\ No newline at end of file
@@ -0,0 +1,120 @@
+import re
+
+from discord import Embed
+
+
+def to_int(value: str) -> int:
+    return int(value.replace(",", ""))
+
+
+class EmbedEvent:
+    __slots__ = ("kind", "values", "keywords")
+
+    def __init__(self, kind: str, values: dict, keywords: tuple[str, ...]):
+        self.kind = kind
+        self.values = values
+        self.keywords = keywords  # the keywords that selected this event, e.g. ("$", "sold")
+
+    def __repr__(self) -> str:
+        return f"EmbedEvent({self.kind!r}, {self.values!r})"
+
+
+# Patterns run on the original (not lowercased) description, their first group is the value
+_TOTAL_FISH = re.compile(r"total of \*\*(\d+)\*\* fish").search
+_CODE = re.compile(r"Code: \*\*(\w+)\*\*").search
+_MINUTES = re.compile(r"the next \*\*(\d+)\*\* minutes").search
+_EMERALD_FISH = re.compile(r"You got (\d+) Emerald Fish").search
+_GOLD_FISH = re.compile(r"You got (\d+) Gold Fish").search
+_SOLD_FISH = re.compile(r"You sold \*\*([\d,]+)\*\* fish").search
+_MONEY = re.compile(r"\*\*?\$([\d,]+)\*\*?").search
+_SECONDS = re.compile(r"wait \*\*([\d.]+)s?\*\*").search
+
+
+class EmbedClassifier:
+    """Classify VirtualFisher embeds in one pass.
+
+    Title and description are lowercased once, then each message type is a keyword check
+    followed by its precompiled extraction patterns, in the order the cog handles them. A
+    value whose pattern doesn't match is left out. Add a message type by adding a branch
+    here and a handler for its kind in the cog (see benchmarks/bench_classifier.py).
+    """
+
+    def classify(self, title: str | None, description: str | None) -> list[EmbedEvent]:
+        title_lower = title.lower() if title else ""
+        text = description or ""
+        description_lower = text.lower()
+        events = []
+        if "working" in description_lower:
+            values = {}
+            match = _TOTAL_FISH(text)
+            if match is not None:
+                values["total_fish"] = int(match.group(1))
+            events.append(EmbedEvent("worker_fish", values, ("working",)))
+        if title is not None:
+            if "anti-bot" in title_lower or "code" in description_lower or "verify" in description_lower:
+                values = {}
+                match = _CODE(text)
+                if match is not None:
+                    values["code"] = match.group(1)
+                keywords = tuple(keyword for keyword in ("code", "verify") if keyword in description_lower)
+                if "anti-bot" in title_lower:
+                    keywords = ("anti-bot",) + keywords
+                events.append(EmbedEvent("anti_bot", values, keywords))
+            if "verified" in title_lower:
+                events.append(EmbedEvent("verified", {}, ("verified",)))
+        if "hired" in description_lower:
+            values = {}
+            match = _MINUTES(text)
+            if match is not None:
+                values["minutes"] = int(match.group(1))
+            events.append(EmbedEvent("worker_hired", values, ("hired",)))
+        emerald = "emerald" in description_lower
+        gold = "gold" in description_lower
+        if emerald or gold:
+            values = {}
+            match = _EMERALD_FISH(text)
+            if match is not None:
+                values["emerald_fish"] = int(match.group(1))
+            match = _GOLD_FISH(text)
+            if match is not None:
+                values["gold_fish"] = int(match.group(1))
+            events.append(EmbedEvent("exotic_fish", values,
+                                     ("emerald", "gold") if emerald and gold else ("emerald",) if emerald else ("gold",)))
+        if "you caught" in description_lower:
+            events.append(EmbedEvent("catch", {}, ("you caught",)))
+        money = None
+        if "you sold" in description_lower:
+            values = {}
+            match = _SOLD_FISH(text)
+            if match is not None:
+                values["fish"] = to_int(match.group(1))
+            match = _MONEY(text)
+            if match is not None:
+                values["money"] = money = to_int(match.group(1))
+            events.append(EmbedEvent("sold", values, ("you sold",)))
+        if "please wait" in description_lower:
+            values = {}
+            match = _SECONDS(text)
+            if match is not None:
+                values["seconds"] = float(match.group(1))
+            events.append(EmbedEvent("cooldown", values, ("please wait",)))
+        dollar = "$" in description_lower
+        sold = "sold" in description_lower
+        if dollar or sold:
+            values = {}
+            if money is None:
+                # A sale already read it
+                match = _MONEY(text)
+                if match is not None:
+                    money = to_int(match.group(1))
+            if money is not None:
+                values["money"] = money
+            events.append(EmbedEvent("money", values,
+                                     ("$", "sold") if dollar and sold else ("$",) if dollar else ("sold",)))
+        return events
+
+    def classify_embed(self, embed: Embed) -> list[EmbedEvent]:
+        return self.classify(embed.title, embed.description)
+
+
+classifier = EmbedClassifier()
@@ -0,0 +1,143 @@
+import asyncio
+import itertools
+import logging
+import time
+from collections import deque
+from typing import Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+
+class CommandJob:
+    __slots__ = ("id", "name", "label", "action", "limit", "queued_at", "started_at", "task")
+
+    def __init__(self, job_id: int, name: str, label: str, action: Callable[[], Awaitable], limit: int):
+        self.id = job_id
+        self.name = name
+        self.label = label
+        self.action = action
+        self.limit = limit
+        self.queued_at = time.monotonic()
+        self.started_at: float | None = None
+        self.task: asyncio.Task | None = None
+
+
+class CommandRunner:
+    """Run prefix commands as supervised tasks instead of inside the gateway handler.
+
+    At most ``global_limit`` commands run at once, and at most ``limit`` (``per_command_limit``
+    unless the command asks for another) of the same command. A command over its limit waits
+    in its own queue of ``max_queue`` jobs; ``submit`` returns False when that queue is full,
+    so the caller can tell the user the command was dropped. Queued jobs start in submission
+    order as slots free up. Failures are logged, and ``close`` cancels what is queued and
+    running.
+    """
+
+    def __init__(self, global_limit: int = 4, per_command_limit: int = 1, max_queue: int = 5):
+        self.global_limit = global_limit
+        self.per_command_limit = per_command_limit
+        self.max_queue = max_queue
+        self._queues: dict[str, deque[CommandJob]] = {}
+        self._running: dict[int, CommandJob] = {}
+        self._running_per_command: dict[str, int] = {}
+        self._ids = itertools.count(1)
+        self._closed = False
+        self.stats = {
+            "submitted": 0,
+            "started": 0,
+            "completed": 0,
+            "failed": 0,
+            "overflow": 0,
+            "cancelled": 0,
+            "wait_total": 0.0,
+            "wait_max": 0.0,
+        }
+
+    def submit(self, name: str, action: Callable[[], Awaitable], label: str = "", limit: int = None) -> bool:
+        """Run ``action`` as command ``name`` once there is room, False if its queue is full."""
+        if self._closed:
+            return False
+        queue = self._queues.setdefault(name, deque())
+        if len(queue) >= self.max_queue:
+            self.stats["overflow"] += 1
+            logger.warning(f"Command queue for {name} is full ({len(queue)} waiting), dropping {label or name}")
+            return False
+        queue.append(CommandJob(next(self._ids), name, label or name, action, limit or self.per_command_limit))
+        self.stats["submitted"] += 1
+        self._pump()
+        return True
+
+    def _pump(self):
+        """Start queued jobs, oldest first, while the global and per-command limits allow."""
+        while len(self._running) < self.global_limit:
+            job = None
+            for queue in self._queues.values():
+                head = queue[0] if queue else None
+                if head is None or self._running_per_command.get(head.name, 0) >= head.limit:
+                    continue
+                if job is None or head.id < job.id:
+                    job = head
+            if job is None:
+                return
+            self._queues[job.name].popleft()
+            self._start(job)
+
+    def _start(self, job: CommandJob):
+        job.started_at = time.monotonic()
+        self.stats["started"] += 1
+        wait = job.started_at - job.queued_at
+        self.stats["wait_total"] += wait
+        self.stats["wait_max"] = max(self.stats["wait_max"], wait)
+        self._running[job.id] = job
+        self._running_per_command[job.name] = self._running_per_command.get(job.name, 0) + 1
+        job.task = asyncio.create_task(self._execute(job), name=f"command-{job.name}-{job.id}")
+
+    async def _execute(self, job: CommandJob):
+        try:
+            await job.action()
+        except asyncio.CancelledError:
+            self.stats["cancelled"] += 1
+            raise
+        except Exception as e:
+            self.stats["failed"] += 1
+            logger.error(f"Receiving an error when attempting to send a command {job.label}: {e}")
+        else:
+            self.stats["completed"] += 1
+        finally:
+            del self._running[job.id]
+            self._running_per_command[job.name] -= 1
+            if not self._closed:
+                self._pump()
+
+    def jobs(self) -> list[dict]:
+        """Running then queued jobs, with seconds since they started or were queued."""
+        now = time.monotonic()
+        running = [{"id": job.id, "name": job.name, "label": job.label, "state": "running",
+                    "elapsed": now - job.started_at} for job in self._running.values()]
+        queued = [{"id": job.id, "name": job.name, "label": job.label, "state": "queued",
+                   "elapsed": now - job.queued_at} for queue in self._queues.values() for job in queue]
+        return running + sorted(queued, key=lambda job: job["id"])
+
+    def metrics(self) -> dict:
+        started = self.stats["started"]
+        return {
+            "running": len(self._running),
+            "queued": sum(len(queue) for queue in self._queues.values()),
+            "submitted": self.stats["submitted"],
+            "completed": self.stats["completed"],
+            "failed": self.stats["failed"],
+            "overflow": self.stats["overflow"],
+            "cancelled": self.stats["cancelled"],
+            "wait_avg_ms": round(self.stats["wait_total"] / started * 1000, 1) if started else 0.0,
+            "wait_max_ms": round(self.stats["wait_max"] * 1000, 1),
+        }
+
+    async def close(self):
+        self._closed = True
+        for queue in self._queues.values():
+            self.stats["cancelled"] += len(queue)
+            queue.clear()
+        tasks = [job.task for job in self._running.values()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
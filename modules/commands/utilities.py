@@ -6,9 +6,26 @@ from discord import Embed, Message
 import json
 import re
 import modules
+from modules.inventory import parse_inventory, is_inventory
 
 logger = logging.getLogger(__name__)
 
+# Inventory attribute -> key in the JSON scrapvf has always sent
+SCRAPVF_KEYS = {
+    "clan": "clan",
+    "balance": "balance",
+    "level": "level",
+    "xp": "xp",
+    "rod": "current_rod",
+    "biome": "current_biome",
+    "pet": "pet",
+    "bait": "bait",
+    "fish": "fish_inventory",
+    "exotic": "exotic_fish",
+    "special": "special",
+    "fish_value": "fish_value",
+}
+
 class Utilities(commands.Cog):
     def __init__(self, bot: modules.Bot):
         self.bot = bot
@@ -68,21 +85,29 @@ class Utilities(commands.Cog):
             logger.warning("Got nothing from worker fish")
             return
 
-        self.bot.telegram_notif.send_message(f"```Markdown\n# Worker fish notification\n\n- You got: {total_fish.group(1)} Fish\n\n> Time: {datetime.now().strftime("%I:%M:%S %p")}\n```")
+        self.bot.notifier.notify("worker_fish", f"```Markdown\n# Worker fish notification\n\n- You got: {total_fish.group(1)} Fish\n\n> Time: {datetime.now().strftime("%I:%M:%S %p")}\n```",
+                                 amount=int(total_fish.group(1)),
+                                 username=self.bot.user.name)
 
     async def _anti_bot_resolve(self, embed: Embed, message: Message):
         """Anti bot message example:
         Code: **D8fQ**\n\nPlease use **/verify ``D8fQ``** to continue playing."""
         embed_dict = json.dumps(embed.to_dict(), indent=4)
-        notif = self.bot.telegram_notif.send_message(f"⚠️Anti-Bot Message detected⚠️\n```json\n{embed_dict}\n```")
+        notif = await self.bot.notifier.send_alert(f"⚠️Anti-Bot Message detected⚠️\n```json\n{embed_dict}\n```")
         code_search = re.search(r"Code: \*\*(\w+)\*\*", embed.description)
         if code_search:
             code = code_search.group(1)
-            self.bot.telegram_notif.edit_message(int(notif["result"]["message_id"]),
-                                                 f"⚠️Anti-Bot Message detected⚠️\n```json\n{embed_dict}\n```\nFound Code: `{code}`")
+            await self._update_alert(notif, f"⚠️Anti-Bot Message detected⚠️\n```json\n{embed_dict}\n```\nFound Code: `{code}`")
         else:
             await message.forward(self.bot.owner)
 
+    async def _update_alert(self, notif: dict | None, text: str):
+        """Edit the alert sent earlier, or send a new one when that send got no answer."""
+        if notif is None:
+            await self.bot.notifier.send_alert(text)
+        else:
+            await self.bot.notifier.edit_alert(int(notif["result"]["message_id"]), text)
+
     @commands.command(name="antibot checker", aliases=["ac"])
     async def antibot_checker(self, ctx: commands.Context):
         if ctx.message.reference is None:
@@ -99,16 +124,65 @@ class Utilities(commands.Cog):
                 and ("anti-bot" in embed.title.lower() or
                      "code" in embed.description.lower())
         ):
-            notif = self.bot.telegram_notif.send_message(f"⚠️Anti-Bot Message detected⚠️\n```json\n{embed_dict}\n```")
+            notif = await self.bot.notifier.send_alert(f"⚠️Anti-Bot Message detected⚠️\n```json\n{embed_dict}\n```")
             code_search = re.search(r'Code: \*\*(\w+)\*\*', embed.description)
             await asyncio.sleep(1)
             if code_search:
                 code = code_search.group(1)
-                self.bot.telegram_notif.edit_message(int(notif["result"]["message_id"]),
-                                                     f"⚠️Anti-Bot Message detected⚠️\n```json\n{embed_dict}\n```\nFound Code: `{code}`")
+                await self._update_alert(notif, f"⚠️Anti-Bot Message detected⚠️\n```json\n{embed_dict}\n```\nFound Code: `{code}`")
             else:
-                self.bot.telegram_notif.edit_message(int(notif["result"]["message_id"]),
-                                                     f"⚠️Anti-Bot Message detected⚠️\n```json\n{embed_dict}\n```\nNo Code Found in the message")
+                await self._update_alert(notif, f"⚠️Anti-Bot Message detected⚠️\n```json\n{embed_dict}\n```\nNo Code Found in the message")
+
+    @commands.command(name="dbstats", aliases=["dbs"])
+    async def dbstats(self, ctx: commands.Context, limit: str = "5"):
+        """Tampilkan query database yang paling banyak memakan waktu."""
+        limit = int(limit) if limit.isdigit() else 5
+        top_queries = self.bot.database.query_stats.top(limit)
+        if not top_queries:
+            await ctx.channel.send("No database queries recorded yet.")
+            return
+
+        lines = []
+        for stats in top_queries:
+            shape = stats["shape"] if len(stats["shape"]) <= 80 else stats["shape"][:77] + "..."
+            lines.append(
+                f"{shape}\n"
+                f"  count={stats['count']} errors={stats['errors']} total={stats['total_ms']:.0f}ms "
+                f"p50={stats['p50_ms']:.1f}ms p95={stats['p95_ms']:.1f}ms p99={stats['p99_ms']:.1f}ms"
+            )
+        metrics = self.bot.database.metrics()
+        lines.append(f"\nbackend={metrics['backend']} write_behind={metrics['write_behind']}")
+        await ctx.channel.send("```\n" + "\n".join(lines)[:1900] + "\n```")
+
+    @commands.command(name="notifstats", aliases=["ns"])
+    async def notifstats(self, ctx: commands.Context):
+        """Tampilkan antrian dan statistik notifikasi Telegram."""
+        metrics = self.bot.notifier.metrics()
+        await ctx.channel.send("```\n" + "\n".join(f"{key}={value}" for key, value in metrics.items()) + "\n```")
+
+    @commands.command(name="antibotstats", aliases=["abs"])
+    async def antibotstats(self, ctx: commands.Context):
+        """Tampilkan statistik deteksi dan penyelesaian anti-bot."""
+        metrics = self.bot.anti_bot.metrics()
+        await ctx.channel.send("```\n" + "\n".join(f"{key}={value}" for key, value in metrics.items()) + "\n```")
+
+    @commands.command(name="jobs", aliases=["j"], extras={"inline": True})
+    async def jobs(self, ctx: commands.Context):
+        """Tampilkan command yang sedang berjalan dan mengantri beserta lamanya."""
+        runner = self.bot.command_runner
+        lines = [f"#{job['id']} {job['state']:<7} {job['elapsed']:>7.1f}s  {job['label'][:60]}" for job in runner.jobs()]
+        if not lines:
+            lines.append("No commands running.")
+        lines.append("\n" + " ".join(f"{key}={value}" for key, value in runner.metrics().items()))
+        await ctx.channel.send("```\n" + "\n".join(lines)[:1900] + "\n```")
+
+    @commands.command(name="accounts", aliases=["acc"])
+    async def accounts(self, ctx: commands.Context):
+        """Tampilkan akun yang berjalan di proses ini beserta pemakaian memorinya."""
+        if self.bot.runtime is None:
+            await ctx.channel.send("Running a single account, start with ACCOUNTS_FILE to use the multi-account runtime.")
+            return
+        await ctx.channel.send("```\n" + "\n".join(self.bot.runtime.format_memory_report())[:1900] + "\n```")
 
     @commands.command(name="scrap",aliases=['sc'])
     async def scrap(self, ctx: commands.Context):
@@ -133,78 +207,9 @@ class Utilities(commands.Cog):
         fetch_message = await ctx.channel.fetch_message(ctx.message.reference.message_id)
         if fetch_message.embeds:
             for embed in fetch_message.embeds:
-                title_lower = (embed.title or "").lower()
-                if "inventory" in title_lower:
-                    description = (embed.description or "")
-                    # Parse the VirtualFisher database
-                    vf_data = {
-                        "clan": "",
-                        "balance": "",
-                        "level": "",
-                        "xp": "",
-                        "current_rod": "",
-                        "current_biome": "",
-                        "pet": "",
-                        "bait": "",
-                        "fish_inventory": {},
-                        "exotic_fish": {},
-                        "special": {}
-                    }
-
-                    lines = description.split('\n')
-                    current_section = None
-
-                    for line in lines:
-                        line = line.strip()
-                        if not line:
-                            continue
-
-                        # Parse basic info
-                        if line.startswith("Clan:"):
-                            vf_data["clan"] = line.split("**")[1]
-                        elif line.startswith("Balance:"):
-                            vf_data["balance"] = line.split("**")[1].replace(".", "")
-                        elif line.startswith("**Level"):
-                            parts = line.split(",")
-                            vf_data["level"] = parts[0].split("**")[1]
-                            if len(parts) > 1:
-                                vf_data["xp"] = parts[1].strip()
-                        elif line.startswith("Currently using"):
-                            vf_data["current_rod"] = line.split("**")[1]
-                        elif line.startswith("Current biome:"):
-                            vf_data["current_biome"] = line.split("**")[1]
-                        elif line.startswith("Pet:"):
-                            vf_data["pet"] = line.split("**")[1]
-                        elif line.startswith("Bait:"):
-                            bait_parts = line.split("**")
-                            if len(bait_parts) >= 2:
-                                vf_data["bait"] = bait_parts[1]
-
-                        # Detect sections
-                        elif line == "**Fish Inventory**":
-                            current_section = "fish_inventory"
-                        elif line == "**Exotic Fish**":
-                            current_section = "exotic_fish"
-                        elif line == "**Special**":
-                            current_section = "special"
-                        elif line.startswith("Fish Value:"):
-                            vf_data["fish_value"] = line.split("**")[1]
-
-                        # Parse fish database
-                        elif current_section and line.startswith("**") and "**" in line[2:]:
-                            try:
-                                # Extract quantity and fish name
-                                parts = line.split("**")
-                                if len(parts) >= 3:
-                                    quantity = parts[1]
-                                    fish_name = parts[2].strip()
-                                    # Remove emoji and extra spaces
-                                    fish_name = ' '.join(fish_name.split()[1:]) if fish_name.split() else fish_name
-                                    vf_data[current_section][fish_name] = quantity
-                            except:
-                                continue
-
-                    # Convert to JSON
+                if is_inventory(embed):
+                    inventory = parse_inventory(embed.description)
+                    vf_data = {key: getattr(inventory, attribute) for attribute, key in SCRAPVF_KEYS.items()}
                     json_data = json.dumps(vf_data, indent=2, ensure_ascii=False)
                     await ctx.channel.send(f"```json\n{json_data}\n```")
         else:
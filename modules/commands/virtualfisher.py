@@ -1,15 +1,41 @@
 import datetime
 import logging
-import random
+import os
+import time
 import modules
 import asyncio
-import re
 import json
+import discord
 from discord.ext import commands, tasks
 from discord import TextChannel, SlashCommand, Interaction, Message, Embed
+from modules.classifier import classifier, EmbedEvent
+from modules.scheduler import PRIORITY_URGENT, PRIORITY_HIGH, PRIORITY_NORMAL, JobCancelled
+from modules.slash_cache import slash_cache
+from modules.inventory import parse_inventory, parse_catch, is_inventory
+from modules.sell_policy import InventoryEstimate, build_policy
+from modules.snapshot import StateSnapshot
 
 logger = logging.getLogger(__name__)
 
+# Seconds VirtualFisher makes you wait between two uses of a command
+VIRTUALFISHER_COOLDOWNS = {
+    "fish": 3.5,
+    "sell": 3.0,
+    "buy": 3.0,
+    "verify": 0.0,
+}
+
+# VirtualFisher slash command id -> cog attribute holding it
+VIRTUALFISHER_COMMANDS = {
+    912432960643416115: "fish_command",
+    912432960643416116: "sell_command",
+    912432961222238220: "verify_command",
+    912432961134166090: "buy_command",
+}
+
+# Columns that only ever grow, a snapshot may restore them when it is ahead of the database
+VIRTUALFISHER_COUNTERS = ("trip", "trips", "level")
+
 # noinspection PyTypeChecker
 class VirtualFisher(commands.Cog):
     def __init__(self, bot: modules.Bot) -> None:
@@ -20,6 +46,110 @@ class VirtualFisher(commands.Cog):
         self.fish_command: SlashCommand = None
         self.buy_command: SlashCommand = None
         self.verify_command: SlashCommand = None
+        self.bot.scheduler.cooldowns.update(VIRTUALFISHER_COOLDOWNS)
+        # Unsold fish, and when they are worth a sell command
+        self.inventory = InventoryEstimate()
+        self.sell_policy = build_policy(os.getenv("SELL_POLICY"))
+        # Telegram message (digested per NOTIFY_COALESCE_WINDOW) for every payout, off by default
+        self.notify_money = bool(int(os.getenv("NOTIFY_MONEY", 0)))
+        # Shown on the status dashboard
+        self.last_trip: datetime.datetime = None
+        self.worker_until: datetime.datetime = None
+        self.loop_errors = 0
+        self.last_error: str = None
+        self.bot.dashboard.add_section("Virtual Fisher", self._dashboard_fields)
+        # Warm restart: state from the last snapshot now, the database row is reconciled in on_ready
+        self.snapshot = StateSnapshot(StateSnapshot.default_path(f"virtualfisher_{self.bot.account_name}"),
+                                      interval=float(os.getenv("SNAPSHOT_INTERVAL", 30)))
+        self._resume_state: dict | None = None
+        self._reconcile_task: asyncio.Task | None = None
+        self._restore(self.snapshot.load())
+        # Event kind from the classifier -> handler(event, embed, message)
+        self._handlers = {
+            "worker_fish": self._worker_check,
+            "anti_bot": self._anti_bot_seen,
+            "worker_hired": self._worker_hired,
+            "exotic_fish": self._exotic_fish,
+            "catch": self._catch,
+            "sold": self._sold,
+            "cooldown": self._cooldown,
+            "money": self._money,
+        }
+
+    async def cog_unload(self):
+        self.bot.dashboard.remove_section("Virtual Fisher")
+        if self.channel is not None:
+            self.bot.anti_bot.unwatch(self.channel.id)
+        if self._reconcile_task is not None:
+            self._reconcile_task.cancel()
+        # Saved while the loops still run, so the next start resumes them
+        await self.snapshot.close()
+        self.fisher_tasks.cancel()
+        self.worker_tasks.cancel()
+
+    def _snapshot_state(self) -> dict:
+        return {
+            "user_id": self.bot.user.id if self.bot.user else None,
+            "data": self.data,
+            "channel_id": self.channel.id if self.channel is not None else None,
+            "fisher": self.fisher_tasks.is_running(),
+            "worker": self.worker_tasks.is_running(),
+            "worker_until": self.worker_until.timestamp() if self.worker_until is not None else None,
+            "last_trip": self.last_trip.timestamp() if self.last_trip is not None else None,
+            "inventory": {"fish": self.inventory.fish, "price_per_fish": self.inventory.price_per_fish},
+            "pacing": {"interval": self.bot.pacing.interval, "floor": self.bot.pacing.floor},
+        }
+
+    def _restore(self, state: dict | None):
+        """Take over the last snapshot, before the bot is even logged in."""
+        if not state:
+            return
+        self.data = state.get("data")
+        self._resume_state = state
+        if state.get("worker_until"):
+            self.worker_until = datetime.datetime.fromtimestamp(state["worker_until"])
+        if state.get("last_trip"):
+            self.last_trip = datetime.datetime.fromtimestamp(state["last_trip"])
+        inventory = state.get("inventory") or {}
+        self.inventory.fish = inventory.get("fish", 0)
+        self.inventory.price_per_fish = inventory.get("price_per_fish", self.inventory.price_per_fish)
+        pacing = state.get("pacing") or {}
+        self.bot.pacing.floor = pacing.get("floor", self.bot.pacing.floor)
+        self.bot.pacing.interval = pacing.get("interval", self.bot.pacing.interval)
+
+    def _dashboard_fields(self) -> list[dict]:
+        if self.data is None:
+            return [{"name": "Virtual Fisher", "value": "Waiting for data"}]
+
+        fisher = "Running" if self.fisher_tasks.is_running() else "Stopped"
+        if self.last_trip is not None:
+            fisher += f", last trip {self.last_trip.strftime('%H:%M:%S')}"
+        worker = "Running" if self.worker_tasks.is_running() else "Stopped"
+        if self.worker_until is not None and self.worker_until > datetime.datetime.now():
+            worker += f", hired until {self.worker_until.strftime('%H:%M')}"
+        scheduler = self.bot.scheduler.metrics()
+        pacing = self.bot.pacing.metrics()
+        fisher += f"\n{pacing['trips_per_hour']} trips/h, every ~{pacing['interval']:.0f}s"
+        health = (f"{self.loop_errors} error(s), backlog {scheduler['backlog']}, "
+                  f"lag {scheduler['lag_avg_ms']:.0f}ms avg / {scheduler['lag_max_ms']:.0f}ms max")
+        if scheduler["paused"]:
+            health += f", paused: {scheduler['paused']}"
+        anti_bot = self.bot.anti_bot.metrics()
+        if anti_bot["detected"]:
+            health += (f"\nAnti-bot: {anti_bot['detected']} check(s), "
+                       f"resolved in {anti_bot['avg_resolve_ms']:.0f}ms avg / {anti_bot['max_resolve_ms']:.0f}ms max")
+        if self.last_error:
+            health += f", last: {self.last_error[:100]}"
+        return [
+            {"name": "Virtual Fisher",
+             "value": f"Trips: **{self.data['trips']:,}**\n"
+                      f"Balance: **${self.data['balance']:,}**\n"
+                      f"Gold Fish: **{self.data['gold_fish']:,}** | Emerald Fish: **{self.data['emerald_fish']:,}**\n"
+                      f"Unsold: ~**${self.inventory.value:,.0f}** ({self.inventory.fish:,} fish)"},
+            {"name": "Fisher", "value": fisher, "inline": True},
+            {"name": "Worker", "value": worker, "inline": True},
+            {"name": "Loop Health", "value": health},
+        ]
 
     @tasks.loop(seconds=5)
     async def fisher_tasks(self):
@@ -29,46 +159,92 @@ class VirtualFisher(commands.Cog):
                 return
 
             self.data["trips"] += 1
-            interaction = await self.fish_command.__call__(self.channel)
+            interaction = await self._slash("fish", self.fish_command, delay=self.bot.pacing.next_delay())
             await self._check_interaction(interaction)
-            if self.data["trips"] % 10 == 0:
-                interaction = await self.sell_command.__call__(self.channel, amount="all")
+            self.bot.pacing.success()
+            if self.sell_policy.should_sell(self.inventory):
+                logger.info(f"Selling fish: {self.sell_policy.reason(self.inventory)}")
+                interaction = await self._slash("sell", self.sell_command, priority=PRIORITY_HIGH, amount="all")
                 await self._check_interaction(interaction)
 
-            await self.bot.database.execute("UPDATE virtualfisher SET trips = %s WHERE user_id = %s",
-                                            (self.data["trips"], self.bot.user.id))
-            await asyncio.sleep(random.randint( 20, 120))
+            await self.bot.database.queue_update("virtualfisher", self.bot.user.id,
+                                                 {"trips": self.data["trips"]})
+            self.bot.database.history.record(self.bot.user.id, "trip", 1)
+            self.last_trip = datetime.datetime.now()
+            self.bot.dashboard.touch()
+        except JobCancelled as e:
+            logger.info(f"Fisher action {e} was cancelled, waiting for the scheduler to resume")
         except Exception as e:
             logger.error(f"There is error in fisher tasks {e}")
-            await asyncio.sleep(random.randint(20, 120))
+            self.loop_errors += 1
+            self.last_error = str(e)
+            self.bot.dashboard.touch()
 
     @tasks.loop(seconds=5)
     async def worker_tasks(self):
         try:
             if self.data["emerald_fish"] >= 8:
-                interaction = await self.buy_command.__call__(self.channel, item="Auto30m")
+                interaction = await self._slash("buy", self.buy_command, priority=PRIORITY_HIGH, item="Auto30m")
                 self.data["emerald_fish"] -= 8
-                await self.bot.database.execute("UPDATE virtualfisher SET emerald_fish = %s WHERE user_id = %s",
-                                                (self.data["emerald_fish"], self.bot.user.id))
+                await self.bot.database.queue_update("virtualfisher", self.bot.user.id,
+                                                     {"emerald_fish": self.data["emerald_fish"]})
                 delay = await self._check_interaction(interaction)
                 await asyncio.sleep(delay)
             elif self.data["gold_fish"] >= 8:
-                interaction = await self.buy_command.__call__(self.channel, item="Auto10m")
+                interaction = await self._slash("buy", self.buy_command, priority=PRIORITY_HIGH, item="Auto10m")
                 self.data["gold_fish"] -= 8
-                await self.bot.database.execute("UPDATE virtualfisher SET gold_fish = %s WHERE user_id = %s",
-                                                (self.data["gold_fish"], self.bot.user.id))
+                await self.bot.database.queue_update("virtualfisher", self.bot.user.id,
+                                                     {"gold_fish": self.data["gold_fish"]})
                 delay = await self._check_interaction(interaction)
                 await asyncio.sleep(delay)
             else:
                 logger.info("Not enough exotic fish to buy worker, stopping now")
                 self.worker_tasks.stop()
+            self.bot.dashboard.touch()
+        except JobCancelled as e:
+            logger.info(f"Worker action {e} was cancelled, waiting for the scheduler to resume")
         except Exception as e:
             logger.error(f"There is error in worker tasks {e}")
-            pass
+            self.loop_errors += 1
+            self.last_error = str(e)
+            self.bot.dashboard.touch()
+
+    async def _slash(self,
+                     name: str,
+                     command: SlashCommand,
+                     priority: int = PRIORITY_NORMAL,
+                     delay: float = 0.0,
+                     urgent: bool = False,
+                     retry: bool = True,
+                     **options) -> Interaction:
+        """Run a slash command in the fishing channel through the account's scheduler.
+
+        A command rejected as outdated is refetched and sent once more.
+        """
+        try:
+            return await self.bot.scheduler.run(name,
+                                                lambda: command.__call__(self.channel, **options),
+                                                channel_id=self.channel.id,
+                                                delay=delay,
+                                                priority=priority,
+                                                urgent=urgent)
+        except discord.RateLimited as e:
+            self.bot.pacing.rate_limited(e.retry_after)
+            raise
+        except discord.HTTPException as e:
+            if e.status == 429:
+                self.bot.pacing.rate_limited(float(e.response.headers.get("Retry-After", 5)))
+            elif retry and slash_cache.is_stale(e):
+                logger.warning(f"Slash command {command.name} is outdated, refreshing it: {e}")
+                await self._load_slash_commands(self.channel, refresh=True)
+                command = getattr(self, VIRTUALFISHER_COMMANDS[command.id])
+                return await self._slash(name, command, priority=priority, delay=delay, urgent=urgent, retry=False,
+                                         **options)
+            raise
 
     async def _check_interaction(self, interaction: Interaction):
         try:
-            interaction_message = await self.channel.fetch_message(interaction.message.id)
+            interaction_message = await self.bot.interactions.wait(interaction)
             if interaction_message is None:
                 logger.warning("Message not found")
                 return None
@@ -78,47 +254,19 @@ class VirtualFisher(commands.Cog):
                 return None
 
             for embed in interaction_message.embeds:
-                if (
-                        embed.description is not None
-                        and "working" in embed.description.lower()
-                ):
-                    await self._worker_check(embed)
-                if (
-                        embed.title is not None
-                        and ("anti-bot" in embed.title.lower() or
-                             "code" in embed.description.lower() or
-                             "verify" in embed.description.lower())
-                ):
-                    logger.warning("Anti-Bot message detected")
-                    await self._anti_bot_resolve(embed, interaction_message)
-                if (
-                    embed.description is not None
-                    and "hired" in embed.description.lower()
-                ):
-                    logger.info("Hired worker message detected")
-                    delay = await self._worker_hired(embed)
-                    if delay is not None:
-                        return delay
-                    return 1900  # Default delay if no delay found
-                if (
-                    embed.description is not None
-                    and ("emerald" in embed.description.lower() or
-                         "gold" in embed.description.lower())
-                ):
-                    logger.info("Exotic fish message detected")
-                    await self._exotic_fish(embed)
-
-                if (
-                    embed.description is not None
-                    and ("$" in embed.description.lower() or
-                         "sold" in embed.description.lower())
-                ):
-                    await self._money(embed)
+                for event in classifier.classify_embed(embed):
+                    handler = self._handlers.get(event.kind)
+                    if handler is None:
+                        continue
+                    # Only a hired worker returns something: the delay until the next purchase
+                    result = await handler(event, embed, interaction_message)
+                    if result is not None:
+                        return result
 
         except Exception as e:
             logger.error(f"Error in check interaction: {e}")
 
-    async def _money(self, embed: Embed):
+    async def _money(self, event: EmbedEvent, embed: Embed, message: Message):
         notif = {
             "title": "Money Notification",
             "username": self.bot.user.name,
@@ -127,23 +275,39 @@ class VirtualFisher(commands.Cog):
             "total_balance": self.data["balance"],
             "time": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         }
-        money_search = re.search(r"\*\*?\$([\d,]+)\*\*?", embed.description)
-        if money_search is not None:
-            money = int(money_search.group(1).replace(",", ""))
+        money = event.values.get("money")
+        if money is not None:
             notif["balance"] = self.data["balance"]
             notif["get_money"] = money
             notif["total_balance"] += money
             self.data["balance"] = notif["total_balance"]
 
-            await self.bot.database.execute("UPDATE virtualfisher SET balance = %s WHERE user_id = %s",
-                                            (self.data["balance"], self.bot.user.id))
+            await self.bot.database.queue_update("virtualfisher", self.bot.user.id,
+                                                 {"balance": self.data["balance"]})
+            self.bot.database.history.record(self.bot.user.id, "money", money)
+            if self.notify_money:
+                self.bot.notifier.notify("sale" if "sold" in event.keywords else "money",
+                                         f"```json\n{json.dumps(notif, indent=4)}\n```",
+                                         amount=money,
+                                         username=self.bot.user.name)
         else:
             logger.warning("Money embed is detected but no money found in description")
 
-    async def _worker_hired(self, embed: Embed):
-        search = re.search(r"the next \*\*(\d+)\*\* minutes", embed.description)
-        if search is not None:
-            delay = int(search.group(1))
+    async def _catch(self, event: EmbedEvent, embed: Embed, message: Message):
+        self.inventory.add_trip(parse_catch(embed.description))
+
+    async def _sold(self, event: EmbedEvent, embed: Embed, message: Message):
+        self.inventory.record_sale(event.values.get("fish"), event.values.get("money"))
+
+    async def _cooldown(self, event: EmbedEvent, embed: Embed, message: Message):
+        seconds = event.values.get("seconds")
+        logger.info(f"Command is on cooldown for {seconds}s")
+        self.bot.pacing.please_wait(seconds or 0.0)
+
+    async def _worker_hired(self, event: EmbedEvent, embed: Embed, message: Message):
+        logger.info("Hired worker message detected")
+        delay = event.values.get("minutes")
+        if delay is not None:
             text = {
                 "title": "Worker Hired",
                 "username": self.bot.user.name,
@@ -151,29 +315,46 @@ class VirtualFisher(commands.Cog):
                 "delay": delay * 60,
                 "time": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             }
-            self.bot.telegram_notif.send_message(f"```json\n{json.dumps(text, indent=4)}\n```")
+            self.bot.notifier.notify("worker_hired", f"```json\n{json.dumps(text, indent=4)}\n```",
+                                     username=self.bot.user.name)
+            self.worker_until = datetime.datetime.now() + datetime.timedelta(minutes=delay)
+            self.bot.dashboard.touch()
             return delay * 60  # Convert minutes to seconds
         else:
             logger.warning("No delay found in worker hired message, using default")
             return 1900
 
-    async def _worker_check(self, embed: Embed):
-        total_fish = re.search(r"total of \*\*(\d+)\*\* fish", embed.description)
-        if total_fish:
+    async def _worker_check(self, event: EmbedEvent, embed: Embed, message: Message):
+        total_fish = event.values.get("total_fish")
+        if total_fish is not None:
             notif = {
                 "title": "Fish from Worker Notification",
                 "username": self.bot.user.name,
-                "total_fish": int(total_fish.group(1)),
+                "total_fish": total_fish,
                 "time": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             }
-            self.bot.telegram_notif.send_message(f"```json\n{json.dumps(notif, indent=4)}\n```")
+            self.bot.database.history.record(self.bot.user.id, "worker_fish", notif["total_fish"])
+            self.bot.notifier.notify("worker_fish", f"```json\n{json.dumps(notif, indent=4)}\n```",
+                                     amount=notif["total_fish"],
+                                     username=self.bot.user.name)
         else:
             logger.warning("Got nothing from worker fish")
             return
 
-    async def _anti_bot_resolve(self, embed: Embed, message: Message):
+    async def _anti_bot_seen(self, event: EmbedEvent, embed: Embed, message: Message):
+        # Normally the watcher caught it on the gateway already, this covers replies fetched over REST
+        self.bot.anti_bot.trigger(message, event, embed)
+
+    async def _anti_bot_resolve(self, event: EmbedEvent, embed: Embed, message: Message):
         """Anti bot message example:
-        Code: **D8fQ**\n\nPlease use **/verify ``D8fQ``** to continue playing."""
+        Code: **D8fQ**\n\nPlease use **/verify ``D8fQ``** to continue playing.
+
+        Runs from the anti-bot watcher, which already paused the scheduler and cancelled the
+        queued actions. A text code is answered before anything else; the scheduler resumes
+        only once the game replied "Verified". Otherwise the check goes to the owner, who
+        answers with !verify in DM. The alert is sent in any case, with the error if any.
+        """
+        self.bot.pacing.anti_bot()
         notif_message = {
             "title": "Anti-Bot Message Detected",
             "username": self.bot.user.name,
@@ -186,78 +367,104 @@ class VirtualFisher(commands.Cog):
             "time": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         }
 
-        notif = self.bot.telegram_notif.send_message(f"```json\n{json.dumps(notif_message, indent=4)}\n```")
-        code_search = re.search(r"Code: \*\*(\w+)\*\*", embed.description)
-        if code_search:
-            code = code_search.group(1)
-            self.bot.telegram_notif.edit_message(int(notif["result"]["message_id"]),
-                                                 f"```json\n{json.dumps(notif_message, indent=4)}\n```")
-            await self.verify_command.__call__(self.channel, answer=code)
-            await self.fisher_tasks.start()
+        code = event.values.get("code")
+        try:
+            if code:
+                notif_message["code"] = code
+                interaction = await self._slash("verify", self.verify_command, priority=PRIORITY_URGENT,
+                                                urgent=True, answer=code)
+                self.bot.anti_bot.solved()
+                notif_message["solved_ms"] = self.bot.anti_bot.stats["last_solve_ms"]
+                if await self._verified(interaction):
+                    self.bot.anti_bot.resolve()
+                    notif_message["verified"] = "Yes"
+                else:
+                    # Stays paused until the owner answers with !verify in DM
+                    notif_message["verified"] = "No, forward message to owner for manual solve"
+                    await message.forward(self.bot.owner)
+            else:
+                notif_message["isimage"]["status"] = "Yes"
+                notif_message["isimage"]["message"] = "Image is detected, forward message to owner for manual solve"
+
+                # Stays paused until the owner answers with !verify in DM
+                await message.forward(self.bot.owner)
+        except Exception as e:
+            notif_message["error"] = f"{type(e).__name__}: {e}, still paused, answer with !verify in DM"
+            raise
+        finally:
+            await self.bot.notifier.send_alert(f"```json\n{json.dumps(notif_message, indent=4)}\n```")
+
+    async def _verified(self, interaction: Interaction) -> bool:
+        """Whether the game accepted the answer to ``interaction``'s /verify."""
+        reply = await self.bot.interactions.wait(interaction)
+        if reply is None:
+            logger.warning("No reply to /verify, staying paused")
+            return False
+        return any(event.kind == "verified" for embed in reply.embeds for event in classifier.classify_embed(embed))
+
+    async def _load_slash_commands(self, channel: TextChannel, refresh: bool = False):
+        """Resolve the VirtualFisher commands from the disk cache, fetching them only on a miss or ``refresh``."""
+        if not refresh and all(getattr(self, attribute) for attribute in VIRTUALFISHER_COMMANDS.values()):
+            return
 
-        else:
-            notif_message["isimage"]["status"] = "Yes"
-            notif_message["isimage"]["message"] = "Image is detected, forward message to owner for manual solve"
-
-            self.bot.telegram_notif.edit_message(int(notif["result"]["message_id"]),
-                                                 f"```json\n{json.dumps(notif_message, indent=4)}\n```")
-            self.fisher_tasks.stop()
-            await message.forward(self.bot.owner)
-
-    async def _load_slash_commands(self, channel: TextChannel):
-        slash_commands = await channel.application_commands()
-        if not (
-                self.sell_command
-                or self.fish_command
-                or self.verify_command
-        ):
-            for cmd in slash_commands:
-                if cmd.id == 912432960643416115:
-                    self.fish_command = cmd
-                elif cmd.id == 912432960643416116:
-                    self.sell_command = cmd
-                elif cmd.id == 912432961222238220:
-                    self.verify_command = cmd
-                elif cmd.id == 912432961134166090:
-                    self.buy_command = cmd
-                if self.fish_command and self.sell_command and self.verify_command and self.buy_command:
-                    break
-
-    async def _exotic_fish(self, embed: Embed):
-        emerald_fish = re.search(r"You got (\d+) Emerald Fish", embed.description)
-        gold_fish = re.search(r"You got (\d+) Gold Fish", embed.description)
-
-        if emerald_fish:
-            self.data["emerald_fish"] += int(emerald_fish.group(1))
-            await self.bot.database.execute("UPDATE virtualfisher SET emerald_fish = %s WHERE user_id = %s",
-                                            (self.data["emerald_fish"], self.bot.user.id))
+        resolved = None if refresh else slash_cache.get(channel, self.bot._connection, set(VIRTUALFISHER_COMMANDS))
+        if resolved is None:
+            slash_commands = await channel.application_commands()
+            resolved = {cmd.id: cmd for cmd in slash_commands if cmd.id in VIRTUALFISHER_COMMANDS}
+            if len(resolved) == len(VIRTUALFISHER_COMMANDS):
+                await slash_cache.store(channel, list(resolved.values()))
+            else:
+                await slash_cache.invalidate(channel)
+
+        for command_id, attribute in VIRTUALFISHER_COMMANDS.items():
+            setattr(self, attribute, resolved.get(command_id))
+
+    async def _exotic_fish(self, event: EmbedEvent, embed: Embed, message: Message):
+        logger.info("Exotic fish message detected")
+        emerald_fish = event.values.get("emerald_fish")
+        gold_fish = event.values.get("gold_fish")
+
+        if emerald_fish is not None:
+            self.data["emerald_fish"] += emerald_fish
+            await self.bot.database.queue_update("virtualfisher", self.bot.user.id,
+                                                 {"emerald_fish": self.data["emerald_fish"]})
+            self.bot.database.history.record(self.bot.user.id, "emerald_fish", emerald_fish)
             notif = {"title": "You Found Crate",
                         "username": self.bot.user.name,
                      "containing":
-                         {"emerald_fish": emerald_fish.group(1)},
+                         {"emerald_fish": emerald_fish},
                      "exotic_fish":
                          {"emerald_fish": self.data["emerald_fish"],
                           "gold_fish": self.data["gold_fish"]}
                      }
-            self.bot.telegram_notif.send_message(f"```json\n{json.dumps(notif, indent=4)}\n```")
-
-        if gold_fish:
-            self.data["gold_fish"] += int(gold_fish.group(1))
-            await self.bot.database.execute("UPDATE virtualfisher SET gold_fish = %s WHERE user_id = %s",
-                                            (self.data["gold_fish"], self.bot.user.id))
+            self.bot.notifier.notify("crate", f"```json\n{json.dumps(notif, indent=4)}\n```",
+                                     amount=emerald_fish,
+                                     username=self.bot.user.name)
+
+        if gold_fish is not None:
+            self.data["gold_fish"] += gold_fish
+            await self.bot.database.queue_update("virtualfisher", self.bot.user.id,
+                                                 {"gold_fish": self.data["gold_fish"]})
+            self.bot.database.history.record(self.bot.user.id, "gold_fish", gold_fish)
             notif = {"title": "You Found Crate",
                      "username": self.bot.user.name,
                      "containing":
-                         {"gold_fish": gold_fish.group(1)},
+                         {"gold_fish": gold_fish},
                      "exotic_fish":
                          {"emerald_fish": self.data["emerald_fish"],
                           "gold_fish": self.data["gold_fish"]}
                      }
-            self.bot.telegram_notif.send_message(f"```json\n{json.dumps(notif, indent=4)}\n```")
+            self.bot.notifier.notify("crate", f"```json\n{json.dumps(notif, indent=4)}\n```",
+                                     amount=gold_fish,
+                                     username=self.bot.user.name)
 
     @commands.command(name="fisher")
     async def fisher(self, ctx: commands.Context):
+        if self.data is None:
+            await ctx.channel.send("VirtualFisher data is still loading, try again in a moment.")
+            return
         self.channel = ctx.channel
+        self.bot.anti_bot.watch(ctx.channel.id, self._anti_bot_resolve)
         if self.fisher_tasks.is_running():
             await ctx.channel.send("Fisher task is already running.")
             return
@@ -267,7 +474,7 @@ class VirtualFisher(commands.Cog):
             await ctx.channel.send("Failed to find slash command object")
             return
 
-        await self.fisher_tasks.start()
+        self.fisher_tasks.start()
         await ctx.channel.send("Fisher is starting")
 
     @commands.command(name="stopfisher", aliases=["sf"])
@@ -277,11 +484,16 @@ class VirtualFisher(commands.Cog):
             return
 
         self.fisher_tasks.stop()
+        self.bot.dashboard.touch()
         await ctx.channel.send("Fisher task has been stopped.")
 
     @commands.command(name="worker")
     async def worker(self, ctx: commands.Context):
+        if self.data is None:
+            await ctx.channel.send("VirtualFisher data is still loading, try again in a moment.")
+            return
         self.channel = ctx.channel
+        self.bot.anti_bot.watch(ctx.channel.id, self._anti_bot_resolve)
         if self.worker_tasks.is_running():
             await ctx.channel.send("Worker task is already running.")
             return
@@ -289,7 +501,7 @@ class VirtualFisher(commands.Cog):
         if not self.buy_command:
             await ctx.channel.send("Failed to find buy slash command object")
             return
-        await self.worker_tasks.start()
+        self.worker_tasks.start()
         await ctx.channel.send("Worker task is starting")
 
     @commands.command(name="stopworker", aliases=["sw"])
@@ -299,44 +511,40 @@ class VirtualFisher(commands.Cog):
             return
 
         self.worker_tasks.stop()
+        self.bot.dashboard.touch()
         await ctx.channel.send("Worker task has been stopped.")
 
     @commands.command(name="getvf", aliases=["gvf"])
     async def getvf(self, ctx: commands.Context):
+        if self.data is None:
+            await ctx.channel.send("VirtualFisher data is still loading, try again in a moment.")
+            return
         reply_message = await ctx.channel.fetch_message(ctx.message.reference.message_id)
         if not reply_message:
             await ctx.channel.send("Please reply to virtual fish inventory")
             return
 
-        # Regex pattern
-        money_pattern = r"Balance: \*\*?\$([\d,]+)\*\*?"
-        clan_patten = r"Clan: \*\*(\w+)\*\*"
-        biome_pattern = r"Current biome: <:\w+:\d+> \*\*(\w+)\*\*"
-        gold_fish_pattern = r"\*\*([\d,]+)\*\* <:\w+:\d+> Gold Fish"
-        emerald_fish_pattern = r"\*\*([\d,]+)\*\* <:\w+:\d+> Emerald Fish"
-
-        if not "inventory" in reply_message.embeds[0].title.lower():
+        if not reply_message.embeds or not is_inventory(reply_message.embeds[0]):
             await ctx.channel.send("Please reply to a valid virtual fish inventory message. That only has inventory embed in it")
             return
 
-        # Extracting data using regex
-        money_match = re.search(money_pattern, reply_message.embeds[0].description)
-        clan_match = re.search(clan_patten, reply_message.embeds[0].description)
-        biome_match = re.search(biome_pattern, reply_message.embeds[0].description)
-        gold_fish_match = re.search(gold_fish_pattern, reply_message.embeds[0].description)
-        emerald_fish_match = re.search(emerald_fish_pattern, reply_message.embeds[0].description)
-
-        self.data["balance"] = int(money_match.group(1).replace(",", "") if money_match else 0)
-        self.data["clan"] = clan_match.group(1) if clan_match else ""
-        self.data["biome"] = biome_match.group(1) if biome_match else ""
-        self.data["gold_fish"] = int(gold_fish_match.group(1).replace(",", "") if gold_fish_match else self.data["gold_fish"])
-        self.data["emerald_fish"] = int(emerald_fish_match.group(1).replace(",", "") if emerald_fish_match else self.data["emerald_fish"])
-
+        inventory = parse_inventory(reply_message.embeds[0].description)
+        self.data["balance"] = inventory.balance or 0
+        self.data["clan"] = inventory.clan or ""
+        self.data["biome"] = inventory.biome or ""
+        if inventory.level is not None:
+            self.data["level"] = inventory.level
+        if inventory.gold_fish is not None:
+            self.data["gold_fish"] = inventory.gold_fish
+        if inventory.emerald_fish is not None:
+            self.data["emerald_fish"] = inventory.emerald_fish
+        self.inventory.sync(inventory)
 
         notif = {
             "title": "Virtual Fisher Data Update",
             "data": {
                 "clan": self.data["clan"],
+                "level": self.data["level"],
                 "biome": self.data["biome"],
                 "gold_fish": self.data["gold_fish"],
                 "emerald_fish": self.data["emerald_fish"],
@@ -345,16 +553,29 @@ class VirtualFisher(commands.Cog):
             },
             "time": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         }
-        self.bot.telegram_notif.send_message(f"```json\n{json.dumps(notif, indent=4)}\n```")
-        await self.bot.database.execute("UPDATE virtualfisher SET balance = %s, clan = %s, biome = %s, gold_fish = %s, emerald_fish = %s WHERE user_id = %s",
-                                        (
-                                            self.data["balance"],
-                                            self.data["clan"],
-                                            self.data["biome"],
-                                            self.data["gold_fish"],
-                                            self.data["emerald_fish"],
-                                            self.bot.user.id
-                                        ))
+        self.bot.notifier.notify("data_update", f"```json\n{json.dumps(notif, indent=4)}\n```",
+                                 username=self.bot.user.name)
+        await self.bot.database.queue_update("virtualfisher", self.bot.user.id,
+                                             {
+                                                 "balance": self.data["balance"],
+                                                 "level": self.data["level"],
+                                                 "clan": self.data["clan"],
+                                                 "biome": self.data["biome"],
+                                                 "gold_fish": self.data["gold_fish"],
+                                                 "emerald_fish": self.data["emerald_fish"]
+                                             })
+        # Inventory sync is explicit, don't leave it sitting in the buffer
+        await self.bot.database.flush()
+
+    @commands.command(name="income")
+    async def income(self, ctx: commands.Context, days: str = "7"):
+        """Average income and trips per hour over the last few days, read from the history rollups."""
+        days = int(days) if days.isdigit() and int(days) > 0 else 7
+        await self.bot.database.history.flush()
+        hours = days * 24
+        money_per_hour = await self.bot.database.history.rate_per_hour(self.bot.user.id, "money", hours)
+        trips_per_hour = await self.bot.database.history.rate_per_hour(self.bot.user.id, "trip", hours)
+        await ctx.channel.send(f"Last {days} day(s): ${money_per_hour:,.0f} per hour, {trips_per_hour:.1f} trips per hour")
 
     @commands.Cog.listener()
     async def on_message(self, message: Message):
@@ -365,15 +586,28 @@ class VirtualFisher(commands.Cog):
             command_name = parts[0]
             if command_name == "verify":
                 code = parts[1] if len(parts) > 1 else ""
-                await self.verify_command.__call__(self.channel, answer=code)
-                await self.fisher_tasks.start()
-                await message.reply("Verification command sent. Fisher task will resume.")
+                interaction = await self._slash("verify", self.verify_command, priority=PRIORITY_URGENT,
+                                                urgent=True, answer=code)
+                self.bot.anti_bot.solved()
+                if not await self._verified(interaction):
+                    await message.reply("The code was not accepted, still paused. Try !verify again.")
+                    return
+                self.bot.anti_bot.resolve()
+                if not self.fisher_tasks.is_running():
+                    self.fisher_tasks.start()
+                await message.reply("Verified. Fisher task will resume.")
             else:
                 return
 
     @commands.Cog.listener()
     async def on_ready(self):
-        await asyncio.sleep(1)
+        # on_ready fires again after a reconnect, reconcile once
+        if self._reconcile_task is None:
+            self._reconcile_task = asyncio.create_task(self._reconcile(), name="virtualfisher-reconcile")
+
+    async def _reconcile(self):
+        """Bring the database row and the snapshot together, then resume what was running."""
+        await self.bot.settings_loaded.wait()
         logger.info("Setting up VirtualFisher Database")
         data = await self.bot.database.fetch("SELECT * FROM virtualfisher WHERE user_id = %s",
                                              (self.bot.user.id,),
@@ -382,14 +616,58 @@ class VirtualFisher(commands.Cog):
         # If no data, create a new entry
         if not data:
             logger.warning("Data not found, Creating VirtualFisher Database")
-            await self.bot.database.execute("INSERT INTO virtualfisher (user_id) VALUES (%s)",
-                                            (self.bot.user.id,))
-            data = await self.bot.database.fetch("SELECT * FROM virtualfisher WHERE user_id = %s",
-                                                 (self.bot.user.id,),
-                                                 one=True)
+            async with self.bot.database.transaction() as transaction:
+                await transaction.execute("INSERT INTO virtualfisher (user_id) VALUES (%s)",
+                                          (self.bot.user.id,))
+                data = await transaction.fetch("SELECT * FROM virtualfisher WHERE user_id = %s",
+                                               (self.bot.user.id,),
+                                               one=True)
+
+        state = self._resume_state
+        if state and state.get("user_id") not in (None, self.bot.user.id):
+            logger.warning("Snapshot belongs to another user, ignoring it")
+            state = self._resume_state = None
+            self.data = None
+
+        if self.data is None:
             self.data = data
         else:
-            self.data = data
+            # Write-behind flushes more often than the snapshot is saved, so the database wins.
+            # Only counters that never go down are taken from a snapshot that is ahead of it
+            ahead = {key: self.data[key] for key in VIRTUALFISHER_COUNTERS
+                     if key in data and isinstance(self.data.get(key), int) and self.data[key] > (data[key] or 0)}
+            self.data = {**data, **ahead}
+            if ahead:
+                logger.info(f"Snapshot is ahead of the database for {', '.join(ahead)}, writing it back")
+                await self.bot.database.queue_update("virtualfisher", self.bot.user.id, ahead)
+        self.bot.dashboard.touch()
+        self.snapshot.start(self._snapshot_state)
+
+        if state:
+            await self._resume(state)
+
+    async def _resume(self, state: dict):
+        if not (state.get("fisher") or state.get("worker")) or not state.get("channel_id"):
+            return
+        channel = self.bot.get_channel(state["channel_id"])
+        if channel is None:
+            logger.warning(f"Channel {state['channel_id']} from the snapshot is gone, not resuming")
+            return
+
+        self.channel = channel
+        self.bot.anti_bot.watch(channel.id, self._anti_bot_resolve)
+        await self._load_slash_commands(channel)
+        if state.get("fisher") and not self.fisher_tasks.is_running():
+            logger.info(f"Resuming fisher in #{channel}")
+            self.fisher_tasks.start()
+        if state.get("worker") and not self.worker_tasks.is_running():
+            # A worker hired before the restart is still working, buy the next one when it is done
+            remaining = (state.get("worker_until") or 0) - time.time()
+            logger.info(f"Resuming worker in #{channel} in {max(0, remaining):.0f}s")
+            if remaining > 0:
+                await asyncio.sleep(remaining)
+            if not self.worker_tasks.is_running():
+                self.worker_tasks.start()
 
 async def setup(bot: commands.Bot):
     await bot.add_cog(VirtualFisher(bot))
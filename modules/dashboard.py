@@ -0,0 +1,119 @@
+import asyncio
+import contextlib
+import copy
+import hashlib
+import json
+import logging
+import time
+from typing import Callable, Optional
+
+import discord
+from .embed import EmbedManager
+
+logger = logging.getLogger(__name__)
+
+
+class Dashboard:
+    """Keep the status embed sent by ``Bot.setup`` up to date.
+
+    Cogs register sections (a callable returning embed fields) and call ``touch`` whenever
+    their state changed. Touches are debounced into at most one edit per ``interval``
+    seconds, and an edit is skipped when the rendered payload hashes the same as the last
+    one that was sent, so bursts of changes cost one webhook call and no change costs none.
+    """
+
+    def __init__(self, interval: float = 15.0):
+        self.interval = interval
+        self.embed: Optional[EmbedManager] = None
+        self.message_id: Optional[int] = None
+        self.base: dict = {}
+        self.sections: dict[str, Callable[[], list[dict]]] = {}
+        self._last_hash: Optional[str] = None
+        self._last_edit = 0.0
+        self._dirty: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self.stats = {
+            "touches": 0,
+            "edits": 0,
+            "skipped": 0,
+            "failures": 0,
+        }
+
+    def add_section(self, name: str, provider: Callable[[], list[dict]]):
+        self.sections[name] = provider
+        self.touch()
+
+    def remove_section(self, name: str):
+        if self.sections.pop(name, None) is not None:
+            self.touch()
+
+    def start(self, embed: EmbedManager, message: discord.Message, base: dict):
+        """Start editing ``message`` (sent by ``embed``), ``base`` is the embed the sections are added to."""
+        if message is None:
+            logger.warning("Status embed was not sent, the dashboard stays disabled")
+            return
+        self.embed = embed
+        self.message_id = message.id
+        self.base = base
+        if self._dirty is None:
+            self._dirty = asyncio.Event()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="dashboard")
+        self.touch()
+
+    def touch(self):
+        """Mark the dashboard as changed, the edit itself happens in the background."""
+        self.stats["touches"] += 1
+        if self._dirty is not None:
+            self._dirty.set()
+
+    def render(self) -> dict:
+        payload = copy.deepcopy(self.base)
+        fields = payload.setdefault("fields", [])
+        for name, provider in self.sections.items():
+            try:
+                fields.extend(provider())
+            except Exception as e:
+                logger.error(f"Dashboard section {name} failed to render: {e}")
+                fields.append({"name": name, "value": "Unavailable"})
+        return payload
+
+    @staticmethod
+    def payload_hash(payload: dict) -> str:
+        return hashlib.blake2b(json.dumps(payload, sort_keys=True, default=str).encode(), digest_size=16).hexdigest()
+
+    async def refresh(self):
+        payload = self.render()
+        digest = self.payload_hash(payload)
+        if digest == self._last_hash:
+            self.stats["skipped"] += 1
+            return
+
+        self._last_edit = time.monotonic()
+        message = await self.embed.edit_embed(self.message_id, payload)
+        if message is None:
+            self.stats["failures"] += 1
+            return
+        self._last_hash = digest
+        self.stats["edits"] += 1
+
+    async def _run(self):
+        while True:
+            await self._dirty.wait()
+            # Debounce: everything touched until the next slot is folded into one edit
+            wait = self._last_edit + self.interval - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self._dirty.clear()
+            try:
+                await self.refresh()
+            except Exception as e:
+                self.stats["failures"] += 1
+                logger.error(f"Failed to refresh dashboard: {e}")
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
@@ -1,27 +1,49 @@
-import json
+import logging
 import discord
 import re
-from discord_webhook import DiscordWebhook, DiscordEmbed
 from discord.ext import commands
 from datetime import datetime, timezone
 from typing import Optional, Union
+from .http import get_session
+
+logger = logging.getLogger(__name__)
 
 class EmbedManager:
+    """Send and edit the status embed through a webhook.
+
+    The webhook talks to Discord over the shared aiohttp session and returns the message
+    straight from the webhook response (``wait=True``), so no extra fetch is needed. The
+    webhook object is built once and reused.
+    """
+
     def __init__(self, bot: commands.Bot, webhook_url: str):
         self.bot = bot
         self.webhook_url = webhook_url
-        self.webhook = DiscordWebhook(url=webhook_url)
         self.stored_message_id = None
+        self._webhook: Optional[discord.Webhook] = None
         webhook_pattern = r'https://discord\.com/api/webhooks/(\d+)/.*'
-        match = re.match(webhook_pattern, webhook_url)
-        if match:
-            self.channel_id = int(match.group(1))
-        else:
+        if not re.match(webhook_pattern, webhook_url):
             raise ValueError("Invalid webhook URL format")
 
-    def _build_embed(self, data: dict) -> DiscordEmbed:
-        """Build a DiscordEmbed object from data dictionary"""
-        embed = DiscordEmbed()
+    @property
+    def webhook(self) -> discord.Webhook:
+        if self._webhook is None or self._webhook.session is not get_session():
+            # Rebuilt only when the shared session was closed and recreated
+            self._webhook = discord.Webhook.from_url(self.webhook_url, session=get_session(), client=self.bot)
+        return self._webhook
+
+    def _build_embed(self, data: dict) -> discord.Embed:
+        """Build a discord.Embed object from data dictionary"""
+        color = data.get('color')
+        if isinstance(color, str):
+            color = int(color.lstrip('#'), 16)
+        embed = discord.Embed(
+            title=data.get('title'),
+            description=data.get('description'),
+            url=data.get('url'),
+            color=color,
+            timestamp=datetime.now(timezone.utc),
+        )
 
         # Author
         if 'author' in data:
@@ -31,17 +53,12 @@ class EmbedManager:
                 icon_url=author_data.get('icon_url'),
             )
 
-        # Basic properties
-        for prop in ['title', 'color', 'description', 'url']:
-            if prop in data:
-                setattr(embed, prop, data[prop])
-
-        # Fields
+        # Fields, Discord rejects empty values so they are sent as a zero-width space
         if 'fields' in data:
             for field in data['fields']:
-                embed.add_embed_field(
-                    name=field.get('name'),
-                    value=field.get('value'),
+                embed.add_field(
+                    name=field.get('name') or '\u200b',
+                    value=field.get('value') or '\u200b',
                     inline=field.get('inline', False)
                 )
 
@@ -59,65 +76,32 @@ class EmbedManager:
                 icon_url=footer_data.get('icon_url')
             )
 
-        embed.set_timestamp(datetime.now(timezone.utc))
         return embed
 
-    async def _fetch_message_from_response(self, response, message_id: str = None) -> Optional[discord.Message]:
-        """Fetch Discord message object from webhook response"""
-        if response.status_code != 200:
-            return None
+    def _remember(self, message: discord.WebhookMessage) -> discord.WebhookMessage:
+        self.stored_message_id = message.id
+        return message
 
+    async def create_embed(self, data: dict) -> Optional[discord.WebhookMessage]:
         try:
-            if not message_id:
-                message_data = json.loads(response.text)
-                message_id = message_data['id']
-
-            # Get the webhook channel
-            webhook = await self.bot.fetch_webhook(self.channel_id)
-            channel = webhook.channel
-
-            # Fetch the message object
-            if channel:
-                try:
-                    return await channel.fetch_message(int(message_id))
-                except (discord.NotFound, discord.HTTPException) as e:
-                    print(f"Error fetching message: {e}")
-                    return None
-
-        except (json.JSONDecodeError, KeyError) as e:
-            print(f"Error processing webhook response: {e}")
+            message = await self.webhook.send(embed=self._build_embed(data), wait=True)
+        except discord.HTTPException as e:
+            logger.error(f"Failed to send embed through webhook: {e}")
             return None
+        return self._remember(message)
 
-        return None
-
-    async def create_embed(self, data: dict) -> Optional[discord.Message]:
-        embed = self._build_embed(data)
-
-        self.webhook.remove_embeds()
-        self.webhook.add_embed(embed)
-        response = self.webhook.execute()
-        print(response)
-        if response.status_code == 200:
-            message_data = json.loads(response.text)
-            self.stored_message_id = message_data['id']
-
-        return await self._fetch_message_from_response(response)
-
-    async def edit_embed(self, message: Union[discord.Message, str], data: dict) -> Optional[discord.Message]:
+    async def edit_embed(self, message: Union[discord.Message, int, str], data: dict) -> Optional[discord.WebhookMessage]:
         if isinstance(message, discord.Message):
-            msg_id = str(message.id)
+            msg_id = message.id
         else:
             msg_id = message or self.stored_message_id
 
         if not msg_id:
             raise ValueError("No message ID provided or stored")
 
-        # Create webhook with message ID
-        self.webhook = DiscordWebhook(url=self.webhook_url, id=msg_id)
-        embed = self._build_embed(data)
-
-        self.webhook.remove_embeds()
-        self.webhook.add_embed(embed)
-        response = self.webhook.edit()
-
-        return await self._fetch_message_from_response(response, msg_id)
\ No newline at end of file
+        try:
+            edited = await self.webhook.edit_message(int(msg_id), embed=self._build_embed(data))
+        except discord.HTTPException as e:
+            logger.error(f"Failed to edit embed {msg_id} through webhook: {e}")
+            return None
+        return self._remember(edited)
@@ -1,13 +1,13 @@
 import logging
-from modules import bot
+from modules import bot, Bot
 
 logger = logging.getLogger(__name__)
 
 
-def setup_events():
+def setup_events(client: Bot = bot):
     logger.info("Setting up events")
 
-    @bot.event
+    @client.event
     async def on_ready():
-        await bot.setup()
-        logger.info(f"Bot is ready, prefix is set to: {bot.command_prefix}")
+        await client.setup()
+        logger.info(f"Bot is ready, prefix is set to: {client.command_prefix}")
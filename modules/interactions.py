@@ -0,0 +1,90 @@
+import asyncio
+import logging
+from collections import OrderedDict
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+
+class InteractionRegistry:
+    """Hand out the reply to a slash command as soon as the gateway delivers it.
+
+    ``Bot.on_message`` and ``Bot.on_message_edit`` feed every message that answers an
+    interaction into ``feed``. ``wait`` returns the reply for an interaction once it is
+    complete: a deferred reply (the "thinking..." state) is only used after the game bot
+    edited the real content in. Replies that arrive before anybody waits for them are kept
+    in a small cache, since Discord may send the message before the interaction succeeded.
+    When nothing arrives within ``timeout`` the message is looked up over REST instead.
+    """
+
+    def __init__(self, timeout: float = 10.0, history_limit: int = 10, max_recent: int = 256):
+        self.timeout = timeout
+        self.history_limit = history_limit
+        self.max_recent = max_recent
+        self._pending: dict[int, asyncio.Future] = {}
+        self._recent: OrderedDict[int, discord.Message] = OrderedDict()
+        self.stats = {
+            "gateway": 0,
+            "edits": 0,
+            "early": 0,
+            "timeouts": 0,
+            "rest_fallbacks": 0,
+            "missing": 0,
+        }
+
+    @staticmethod
+    def is_complete(message: discord.Message) -> bool:
+        return not message.flags.loading and bool(message.embeds or message.content)
+
+    def feed(self, message: discord.Message, edited: bool = False):
+        """Record a gateway message, cheap for everything that isn't an interaction reply."""
+        interaction = message.interaction
+        if interaction is None:
+            return
+
+        self._recent[interaction.id] = message
+        self._recent.move_to_end(interaction.id)
+        while len(self._recent) > self.max_recent:
+            self._recent.popitem(last=False)
+
+        future = self._pending.get(interaction.id)
+        if future is not None and not future.done() and self.is_complete(message):
+            self.stats["edits" if edited else "gateway"] += 1
+            future.set_result(message)
+
+    async def wait(self, interaction: discord.Interaction, timeout: float = None) -> discord.Message | None:
+        """The completed reply to ``interaction``, from the gateway or (after ``timeout``) over REST."""
+        message = self._recent.get(interaction.id)
+        if message is not None and self.is_complete(message):
+            self.stats["early"] += 1
+            return message
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending[interaction.id] = future
+        try:
+            return await asyncio.wait_for(future, timeout or self.timeout)
+        except asyncio.TimeoutError:
+            self.stats["timeouts"] += 1
+            logger.warning(f"No reply for interaction {interaction.id} ({interaction.name}) over the gateway, fetching it")
+            return await self._fetch(interaction)
+        finally:
+            self._pending.pop(interaction.id, None)
+
+    async def _fetch(self, interaction: discord.Interaction) -> discord.Message | None:
+        self.stats["rest_fallbacks"] += 1
+        try:
+            message = self._recent.get(interaction.id)
+            if message is not None:
+                # Seen but never completed, the edit event may have been missed
+                return await message.channel.fetch_message(message.id)
+            async for message in interaction.channel.history(limit=self.history_limit):
+                if message.interaction is not None and message.interaction.id == interaction.id:
+                    return message
+        except discord.HTTPException as e:
+            logger.error(f"Failed to fetch reply for interaction {interaction.id}: {e}")
+        self.stats["missing"] += 1
+        return None
+
+    def metrics(self) -> dict:
+        return {**self.stats, "pending": len(self._pending), "recent": len(self._recent)}
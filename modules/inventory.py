@@ -0,0 +1,116 @@
+import re
+
+from discord import Embed
+
+# One alternative per kind of line in the /inventory embed, all found in a single scan of
+# the description. The pattern is unanchored so the regex engine can skip ahead to the next
+# candidate on the alternatives' first characters; a match consumes the rest of its value,
+# so the "**" inside a header line is never mistaken for a fish count. Emojis
+# (<:name:id>) in front of a value are skipped, numbers may use "," or "." as separator.
+_EMOJI = r"(?:<a?:\w+:\d+>\s*)?"
+_NUMBER = r"\d[\d,.]*"
+_LINE = re.compile(
+    r"Clan: \*\*(?P<clan>[^*\n]+)"
+    rf"|Balance: \*\*?\$?(?P<balance>{_NUMBER})"
+    rf"|\*\*Level (?P<level>{_NUMBER})\*\*(?:[^\d\n]*(?P<xp>{_NUMBER}))?"
+    rf"|Currently using {_EMOJI}\*\*(?P<rod>[^*\n]+)"
+    rf"|Current biome: {_EMOJI}\*\*(?P<biome>[^*\n]+)"
+    rf"|Pet: {_EMOJI}\*\*(?P<pet>[^*\n]+)"
+    rf"|Bait: {_EMOJI}\*\*(?P<bait>[^*\n]+)"
+    rf"|Fish Value: \*\*\$?(?P<fish_value>{_NUMBER})"
+    r"|\*\*(?P<section>Fish Inventory|Exotic Fish|Special)\*\*"
+    rf"|\*\*(?P<count>{_NUMBER})\*\* {_EMOJI}(?P<name>[^\n]+)"
+)
+
+# "**3** Common Fish" entries on the "You caught:" line of a fishing reply, the emoji may
+# come before the count or between the count and the name, as in the inventory
+_CATCH = re.compile(rf"\*\*(?P<count>{_NUMBER})\*\* {_EMOJI}(?P<name>[^,\n<*]+)")
+
+_SECTIONS = {
+    "Fish Inventory": "fish",
+    "Exotic Fish": "exotic",
+    "Special": "special",
+}
+
+
+def to_int(value: str) -> int:
+    return int(value.replace(",", "").replace(".", ""))
+
+
+class Inventory:
+    """The parsed /inventory embed. Values missing from the embed stay None (or empty)."""
+    __slots__ = ("clan", "balance", "level", "xp", "rod", "biome", "pet", "bait", "fish_value",
+                 "fish", "exotic", "special")
+
+    def __init__(self):
+        self.clan: str | None = None
+        self.balance: int | None = None
+        self.level: int | None = None
+        self.xp: int | None = None
+        self.rod: str | None = None
+        self.biome: str | None = None
+        self.pet: str | None = None
+        self.bait: str | None = None
+        self.fish_value: int | None = None
+        # Fish name -> count, per section of the embed
+        self.fish: dict[str, int] = {}
+        self.exotic: dict[str, int] = {}
+        self.special: dict[str, int] = {}
+
+    def count(self, name: str) -> int | None:
+        """How many fish called ``name`` the embed lists, in whichever section comes first."""
+        for section in (self.fish, self.exotic, self.special):
+            if name in section:
+                return section[name]
+        return None
+
+    @property
+    def gold_fish(self) -> int | None:
+        return self.count("Gold Fish")
+
+    @property
+    def emerald_fish(self) -> int | None:
+        return self.count("Emerald Fish")
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self) -> str:
+        return f"Inventory(balance={self.balance!r}, level={self.level!r}, biome={self.biome!r})"
+
+
+def parse_inventory(description: str) -> Inventory:
+    """Parse the description of an inventory embed in one pass."""
+    inventory = Inventory()
+    section = None
+    for match in _LINE.finditer(description or ""):
+        kind = match.lastgroup
+        if kind == "name":
+            # Fish lines only count inside a section, like the header lines they resemble
+            if section is not None:
+                section[match["name"].rstrip()] = to_int(match["count"])
+        elif kind == "section":
+            section = getattr(inventory, _SECTIONS[match["section"]])
+        elif kind in ("level", "xp"):
+            inventory.level = to_int(match["level"])
+            if match["xp"] is not None:
+                inventory.xp = to_int(match["xp"])
+        elif kind in ("balance", "fish_value"):
+            setattr(inventory, kind, to_int(match[kind]))
+        else:
+            setattr(inventory, kind, match[kind].strip())
+    return inventory
+
+
+def parse_catch(description: str) -> dict[str, int]:
+    """Fish name -> count caught, from the description of a fishing reply."""
+    start = (description or "").find("You caught")
+    if start == -1:
+        return {}
+    end = description.find("\n", start)
+    line = description[start:] if end == -1 else description[start:end]
+    return {match["name"].strip(): to_int(match["count"]) for match in _CATCH.finditer(line)}
+
+
+def is_inventory(embed: Embed) -> bool:
+    return "inventory" in (embed.title or "").lower()
@@ -0,0 +1,317 @@
+import asyncio
+import itertools
+import logging
+import os
+import time
+
+import dotenv
+from .outbox import Outbox
+from .telegram import notif, Telegram, TelegramRateLimited, TelegramUnavailable
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_ALERT = 0  # anti-bot checks, always sent first and never coalesced or dropped
+PRIORITY_NORMAL = 1
+PRIORITY_DIGEST = 2
+
+# How a window of same-kind events is summarised, formatted with count, amount and username
+DIGEST_FORMATS = {
+    "sale": "{username}: {count} sales, +${amount:,}",
+    "money": "{username}: {count} payouts, +${amount:,}",
+    "crate": "{username}: {count} crates, +{amount:,} exotic fish",
+    "worker_hired": "{username}: {count} workers hired",
+    "worker_fish": "{username}: {count} worker reports, {amount:,} fish",
+    "data_update": "{username}: {count} data updates",
+}
+
+
+class TokenBucket:
+    """Allow ``rate`` sends per second with bursts of up to ``capacity``."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    async def acquire(self):
+        while True:
+            now = time.monotonic()
+            if now < self.blocked_until:
+                await asyncio.sleep(self.blocked_until - now)
+                continue
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def block(self, seconds: float):
+        """Stop handing out tokens for ``seconds``, used when Telegram answers 429."""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+        self.tokens = 0
+
+
+class Notification:
+    __slots__ = ("method", "payload", "kind", "priority", "future", "attempts", "entry_id")
+
+    def __init__(self, method: str, payload: dict, kind: str, priority: int,
+                 future: asyncio.Future = None, entry_id: int = None):
+        self.method = method
+        self.payload = payload
+        self.kind = kind
+        self.priority = priority
+        self.future = future
+        self.attempts = 0
+        self.entry_id = entry_id  # id in the outbox, None when it isn't persisted
+
+
+class Digest:
+    """Events of one kind collected during a coalescing window."""
+    __slots__ = ("kind", "username", "count", "amount", "last_text", "opened")
+
+    def __init__(self, kind: str, username: str):
+        self.kind = kind
+        self.username = username
+        self.count = 0
+        self.amount = 0
+        self.last_text = ""
+        self.opened = time.monotonic()
+
+    def render(self) -> str:
+        if self.count == 1:
+            return self.last_text
+        template = DIGEST_FORMATS.get(self.kind, "{username}: {count} " + self.kind + " events")
+        return template.format(username=self.username, count=self.count, amount=self.amount)
+
+
+class NotificationDispatcher:
+    """Background Telegram sender with a token bucket per chat, digests and priorities.
+
+    ``notify`` never waits: events of a kind listed in ``DIGEST_FORMATS`` are merged for
+    ``coalesce_window`` seconds into a single message, everything else goes straight to the
+    queue. ``request`` is for callers that need Telegram's answer (e.g. to edit the message
+    later) and is sent ahead of routine traffic. When the queue is full the newest routine
+    notification is dropped; alerts are never dropped.
+
+    With an ``outbox`` every queued notification is appended to disk first and acknowledged
+    once Telegram accepted it. While Telegram is unreachable the head of the queue is retried
+    with exponential backoff, and whatever is still undelivered at shutdown is replayed, in
+    order, by ``start`` on the next run.
+    """
+
+    def __init__(self,
+                 telegram: Telegram,
+                 rate_per_chat: float = 1.0,
+                 burst: int = 3,
+                 coalesce_window: float = 30.0,
+                 max_queue: int = 500,
+                 max_attempts: int = 5,
+                 outbox: Outbox = None,
+                 base_backoff: float = 1.0,
+                 max_backoff: float = 300.0,
+                 request_timeout: float = 15.0):
+        self.telegram = telegram
+        self.rate_per_chat = rate_per_chat
+        self.burst = burst
+        self.coalesce_window = coalesce_window
+        self.max_queue = max_queue
+        self.max_attempts = max_attempts
+        self.outbox = outbox
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.request_timeout = request_timeout
+        self._buckets: dict[object, TokenBucket] = {}
+        self._digests: dict[tuple[str, str], Digest] = {}
+        self._queue: asyncio.PriorityQueue | None = None
+        self._sequence = itertools.count()
+        self._worker: asyncio.Task | None = None
+        self._digest_task: asyncio.Task | None = None
+        self.stats = {
+            "queued": 0,
+            "sent": 0,
+            "coalesced": 0,
+            "dropped": 0,
+            "rate_limited": 0,
+            "retries": 0,
+            "failed": 0,
+        }
+
+    def start(self):
+        """Start the sender and replay the outbox, called once the event loop runs."""
+        self._ensure_started()
+
+    def _ensure_started(self):
+        if self._queue is None:
+            self._queue = asyncio.PriorityQueue()
+            if self.outbox is not None:
+                for entry in self.outbox.open():
+                    notification = Notification(entry.method, entry.payload, entry.kind, entry.priority,
+                                                entry_id=entry.id)
+                    self._queue.put_nowait((entry.priority, next(self._sequence), notification))
+                self.outbox.start()
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run(), name="notification-dispatcher")
+        if self._digest_task is None or self._digest_task.done():
+            self._digest_task = asyncio.create_task(self._flush_digests_loop(), name="notification-digests")
+
+    def _bucket(self, chat_id) -> TokenBucket:
+        bucket = self._buckets.get(chat_id)
+        if bucket is None:
+            bucket = self._buckets[chat_id] = TokenBucket(self.rate_per_chat, self.burst)
+        return bucket
+
+    def _enqueue(self, notification: Notification) -> bool:
+        self._ensure_started()
+        if notification.priority != PRIORITY_ALERT and self._queue.qsize() >= self.max_queue:
+            self.stats["dropped"] += 1
+            logger.warning(f"Notification queue is full, dropping {notification.kind} notification")
+            return False
+        if self.outbox is not None:
+            notification.entry_id = self.outbox.append(notification.method, notification.payload,
+                                                       notification.kind, notification.priority).id
+        self._queue.put_nowait((notification.priority, next(self._sequence), notification))
+        self.stats["queued"] += 1
+        return True
+
+    def notify(self, kind: str, text: str, amount: int = 0, username: str = "", priority: int = PRIORITY_NORMAL):
+        """Queue a fire-and-forget notification, merging it into a digest when ``kind`` supports it."""
+        if priority != PRIORITY_ALERT and kind in DIGEST_FORMATS and self.coalesce_window > 0:
+            self._ensure_started()
+            digest = self._digests.get((username, kind))
+            if digest is None:
+                digest = self._digests[(username, kind)] = Digest(kind, username)
+            else:
+                self.stats["coalesced"] += 1
+            digest.count += 1
+            digest.amount += amount
+            digest.last_text = text
+            return
+
+        self._enqueue(Notification("sendMessage", self.telegram._send_payload(text), kind, priority))
+
+    async def request(self, method: str, payload: dict, kind: str = "alert", priority: int = PRIORITY_ALERT) -> dict | None:
+        """Send through the queue and wait for Telegram's answer.
+
+        Returns ``None`` when the first attempt failed or took longer than ``request_timeout``;
+        the notification itself stays queued (and in the outbox) and is delivered later.
+        """
+        future = asyncio.get_running_loop().create_future()
+        if not self._enqueue(Notification(method, payload, kind, priority, future)):
+            return None
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), self.request_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"No answer from Telegram for {kind} notification after {self.request_timeout}s")
+            return None
+
+    async def send_alert(self, text: str) -> dict | None:
+        return await self.request("sendMessage", self.telegram._send_payload(text))
+
+    async def edit_alert(self, message_id: int, text: str) -> dict | None:
+        return await self.request("editMessageText", self.telegram._edit_payload(message_id, text))
+
+    def flush_digests(self, force: bool = False):
+        """Move digests whose window has passed (or all of them) onto the send queue."""
+        now = time.monotonic()
+        for key, digest in list(self._digests.items()):
+            if force or now - digest.opened >= self.coalesce_window:
+                del self._digests[key]
+                self._enqueue(Notification("sendMessage", self.telegram._send_payload(digest.render()),
+                                           digest.kind, PRIORITY_DIGEST))
+
+    async def _flush_digests_loop(self):
+        while True:
+            await asyncio.sleep(max(1.0, self.coalesce_window / 4))
+            self.flush_digests()
+
+    async def _run(self):
+        while True:
+            _, _, notification = await self._queue.get()
+            try:
+                await self._send(notification)
+            finally:
+                self._queue.task_done()
+
+    @staticmethod
+    def _resolve(notification: Notification, result: dict | None):
+        if notification.future is not None and not notification.future.done():
+            notification.future.set_result(result)
+
+    async def _send(self, notification: Notification):
+        bucket = self._bucket(notification.payload.get("chat_id"))
+        while True:
+            await bucket.acquire()
+            notification.attempts += 1
+            try:
+                result = await self.telegram.request(notification.method, notification.payload)
+            except (TelegramRateLimited, TelegramUnavailable) as e:
+                # Whoever waits for the answer gets None now, the notification itself is retried
+                self._resolve(notification, None)
+                if notification.entry_id is None and notification.attempts >= self.max_attempts:
+                    logger.error(f"{e}, giving up on {notification.kind} notification")
+                    self.stats["failed"] += 1
+                    return
+                if isinstance(e, TelegramRateLimited):
+                    self.stats["rate_limited"] += 1
+                    bucket.block(e.retry_after)
+                    logger.warning(f"{e}, {notification.kind} notification will be retried")
+                else:
+                    self.stats["retries"] += 1
+                    delay = min(self.max_backoff, self.base_backoff * 2 ** (notification.attempts - 1))
+                    logger.warning(f"{e}, retrying {notification.kind} notification in {delay:.0f}s")
+                    await asyncio.sleep(delay)
+                continue
+
+            if result is None:
+                # Telegram rejected it (bad markdown, deleted message...), retrying won't help
+                self.stats["failed"] += 1
+            else:
+                self.stats["sent"] += 1
+            if notification.entry_id is not None:
+                self.outbox.ack(notification.entry_id)
+            self._resolve(notification, result)
+            return
+
+    def metrics(self) -> dict:
+        return {
+            **self.stats,
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "pending_digests": len(self._digests),
+            "outbox": self.outbox.metrics() if self.outbox is not None else None,
+        }
+
+    async def close(self, timeout: float = 10.0):
+        """Send pending digests and wait (up to ``timeout``) for the queue to drain.
+
+        Notifications that are still undelivered stay in the outbox for the next start.
+        """
+        if self._queue is None:
+            return
+        self.flush_digests(force=True)
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"{self._queue.qsize()} notifications were not sent before shutdown")
+        for task in (self._worker, self._digest_task):
+            if task is not None:
+                task.cancel()
+        if self.outbox is not None:
+            await self.outbox.close()
+
+
+dotenv.load_dotenv(".env")
+notifier = NotificationDispatcher(
+    notif,
+    rate_per_chat=float(os.getenv("NOTIFY_RATE_PER_CHAT", 1.0)),
+    burst=int(os.getenv("NOTIFY_BURST", 3)),
+    coalesce_window=float(os.getenv("NOTIFY_COALESCE_WINDOW", 30)),
+    max_queue=int(os.getenv("NOTIFY_MAX_QUEUE", 500)),
+    outbox=Outbox(
+        path=os.getenv("OUTBOX_PATH") or None,
+        fsync_interval=float(os.getenv("OUTBOX_FSYNC_INTERVAL", 0.05)),
+        fsync_batch=int(os.getenv("OUTBOX_FSYNC_BATCH", 64))
+    )
+)
@@ -0,0 +1,202 @@
+import asyncio
+import contextlib
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxEntry:
+    __slots__ = ("id", "method", "payload", "kind", "priority")
+
+    def __init__(self, entry_id: int, method: str, payload: dict, kind: str, priority: int):
+        self.id = entry_id
+        self.method = method
+        self.payload = payload
+        self.kind = kind
+        self.priority = priority
+
+    def to_record(self) -> dict:
+        return {"id": self.id, "method": self.method, "payload": self.payload,
+                "kind": self.kind, "priority": self.priority}
+
+
+class Outbox:
+    """Append-only segment file holding notifications until Telegram accepted them.
+
+    Every notification is one JSON line, a delivered one gets a ``{"ack": id}`` line. Lines
+    are written to the OS right away but fsynced in batches (every ``fsync_interval`` seconds
+    or ``fsync_batch`` lines), so a burst costs one sequential append per notification. On
+    ``open`` the file is replayed: unacknowledged entries come back in the order they were
+    written and the segment is rewritten with only those entries. The same happens once
+    ``compact_after`` entries were acknowledged, so the file stays small.
+    """
+
+    def __init__(self,
+                 path: str = None,
+                 fsync_interval: float = 0.05,
+                 fsync_batch: int = 64,
+                 compact_after: int = 1000):
+        self.path = path or self.default_path()
+        self.fsync_interval = fsync_interval
+        self.fsync_batch = fsync_batch
+        self.compact_after = compact_after
+        self._file = None
+        self._pending: dict[int, OutboxEntry] = {}
+        self._next_id = 1
+        self._unsynced = 0
+        self._acked_since_compact = 0
+        self._sync_event: asyncio.Event | None = None
+        self._sync_task: asyncio.Task | None = None
+        self.stats = {
+            "appended": 0,
+            "acked": 0,
+            "fsyncs": 0,
+            "replayed": 0,
+            "compactions": 0,
+            "corrupt_lines": 0,
+        }
+
+    @staticmethod
+    def default_path(name: str = "notifications") -> str:
+        database_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "database")
+        return os.path.join(database_dir, f"{name}.outbox")
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def open(self) -> list[OutboxEntry]:
+        """Replay the segment and open it for appending, returns the undelivered entries in order."""
+        if self._file is not None:
+            return []
+
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as file:
+                for line in file:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # A torn write at the end of the file after a crash
+                        self.stats["corrupt_lines"] += 1
+                        continue
+                    if "ack" in record:
+                        self._pending.pop(record["ack"], None)
+                        continue
+                    entry = OutboxEntry(record["id"], record["method"], record["payload"],
+                                        record.get("kind", "replay"), record.get("priority", 1))
+                    self._pending[entry.id] = entry
+                    self._next_id = max(self._next_id, entry.id + 1)
+
+        self._rewrite()
+        self.stats["replayed"] += len(self._pending)
+        if self._pending:
+            logger.info(f"Replaying {len(self._pending)} undelivered notification(s) from {self.path}")
+        return list(self._pending.values())
+
+    def _rewrite(self):
+        """Atomically replace the segment with only the pending entries."""
+        if self._file is not None:
+            self._file.close()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            for entry in self._pending.values():
+                file.write(json.dumps(entry.to_record(), ensure_ascii=False) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, self.path)
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._unsynced = 0
+        self._acked_since_compact = 0
+
+    async def _compact(self):
+        """Like ``_rewrite``, but fsyncs off the event loop.
+
+        Entries appended or acknowledged while the fsync runs are carried over to the new
+        segment before it replaces the old one.
+        """
+        compacted = dict(self._pending)
+        tmp_path = f"{self.path}.tmp"
+        carried_over = 0
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            for entry in compacted.values():
+                file.write(json.dumps(entry.to_record(), ensure_ascii=False) + "\n")
+            file.flush()
+            await asyncio.to_thread(os.fsync, file.fileno())
+            for entry_id, entry in self._pending.items():
+                if entry_id not in compacted:
+                    file.write(json.dumps(entry.to_record(), ensure_ascii=False) + "\n")
+                    carried_over += 1
+            for entry_id in compacted:
+                if entry_id not in self._pending:
+                    file.write(json.dumps({"ack": entry_id}) + "\n")
+                    carried_over += 1
+        self._file.close()
+        os.replace(tmp_path, self.path)
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._unsynced = carried_over
+        self._acked_since_compact = 0
+
+    def start(self):
+        if self._sync_task is None or self._sync_task.done():
+            self._sync_event = asyncio.Event()
+            self._sync_task = asyncio.create_task(self._sync_loop(), name="outbox-sync")
+
+    def _write(self, record: dict):
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+        self._unsynced += 1
+        if self._unsynced >= self.fsync_batch and self._sync_event is not None:
+            self._sync_event.set()
+
+    def append(self, method: str, payload: dict, kind: str, priority: int) -> OutboxEntry:
+        entry = OutboxEntry(self._next_id, method, payload, kind, priority)
+        self._next_id += 1
+        self._write(entry.to_record())
+        self._pending[entry.id] = entry
+        self.stats["appended"] += 1
+        return entry
+
+    def ack(self, entry_id: int):
+        if self._pending.pop(entry_id, None) is None:
+            return
+        self._write({"ack": entry_id})
+        self.stats["acked"] += 1
+        self._acked_since_compact += 1
+
+    async def _sync_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._sync_event.wait(), self.fsync_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._sync_event.clear()
+            await self.sync()
+
+    async def sync(self):
+        if self._file is None:
+            return
+        if self._acked_since_compact >= self.compact_after:
+            await self._compact()
+            self.stats["compactions"] += 1
+            return
+        if self._unsynced:
+            self._unsynced = 0
+            await asyncio.to_thread(os.fsync, self._file.fileno())
+            self.stats["fsyncs"] += 1
+
+    async def close(self):
+        if self._sync_task is not None:
+            self._sync_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._sync_task
+            self._sync_task = None
+        if self._file is not None:
+            await self.sync()
+            self._file.close()
+            self._file = None
+
+    def metrics(self) -> dict:
+        return {**self.stats, "pending": self.pending, "unsynced": self._unsynced}
@@ -0,0 +1,109 @@
+import collections
+import logging
+import random
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class PacingController:
+    """Pick the delay before the next fishing trip from what the game and Discord tell us.
+
+    The interval shrinks a little after every clean trip and grows again when we are told
+    to slow down: a "please wait" reply teaches the real game cooldown (the delay we used
+    plus the time we were told to wait), a 429 holds everything for its ``retry_after`` and
+    an anti-bot check backs off like a 429. ``next_delay`` adds ``jitter`` (a fraction of
+    the interval) around it and, with ``break_chance``, a longer break up to ``maximum``,
+    so the cadence never settles into an exact period.
+    """
+
+    def __init__(self,
+                 minimum: float = 3.5,
+                 maximum: float = 120.0,
+                 initial: float = 30.0,
+                 jitter: float = 0.25,
+                 break_chance: float = 0.02,
+                 decrease: float = 0.95,
+                 backoff: float = 2.0,
+                 margin: float = 1.2):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.jitter = jitter
+        self.break_chance = break_chance
+        self.decrease = decrease
+        self.backoff = backoff
+        self.margin = margin
+        self.interval = min(max(initial, minimum), maximum)
+        # Lowest interval that is known to be safe, raised by "please wait" replies
+        self.floor = minimum
+        self.last_delay = 0.0
+        self._hold_until = 0.0
+        self._penalised = False
+        self._trips: collections.deque[float] = collections.deque()
+        self.stats = {
+            "trips": 0,
+            "please_wait": 0,
+            "rate_limited": 0,
+            "anti_bot": 0,
+            "breaks": 0,
+        }
+
+    def next_delay(self) -> float:
+        """Seconds to wait before the next trip, starts a new trip for the feedback methods."""
+        self._penalised = False
+        delay = self.interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+        if self.break_chance and random.random() < self.break_chance:
+            self.stats["breaks"] += 1
+            delay = random.uniform(delay, self.maximum)
+        delay = min(max(delay, self.floor), self.maximum)
+        delay = max(delay, self._hold_until - time.monotonic())
+        self.last_delay = delay
+        return delay
+
+    def success(self):
+        """The trip got a reply, counted and sped up only if nothing told us to slow down."""
+        if self._penalised:
+            return
+        self._trips.append(time.monotonic())
+        self.stats["trips"] += 1
+        self.interval = max(self.floor * self.margin, self.interval * self.decrease)
+
+    def please_wait(self, seconds: float):
+        """The game refused the command because it was still on cooldown for ``seconds``."""
+        self.stats["please_wait"] += 1
+        self._penalised = True
+        cooldown = self.last_delay + seconds
+        if cooldown > self.floor:
+            self.floor = min(cooldown, self.maximum)
+            logger.info(f"Learned game cooldown of {self.floor:.1f}s")
+        self._slow_down(self.floor * self.margin)
+
+    def rate_limited(self, retry_after: float):
+        self.stats["rate_limited"] += 1
+        self._penalised = True
+        self._hold_until = max(self._hold_until, time.monotonic() + retry_after)
+        self._slow_down(retry_after)
+        logger.warning(f"Rate limited for {retry_after:.1f}s, interval now {self.interval:.1f}s")
+
+    def anti_bot(self):
+        self.stats["anti_bot"] += 1
+        self._penalised = True
+        self._slow_down()
+
+    def _slow_down(self, at_least: float = 0.0):
+        self.interval = min(max(self.interval * self.backoff, at_least), self.maximum)
+
+    def trips_per_hour(self) -> int:
+        cutoff = time.monotonic() - 3600
+        while self._trips and self._trips[0] < cutoff:
+            self._trips.popleft()
+        return len(self._trips)
+
+    def metrics(self) -> dict:
+        return {
+            **self.stats,
+            "interval": round(self.interval, 1),
+            "floor": round(self.floor, 1),
+            "last_delay": round(self.last_delay, 1),
+            "trips_per_hour": self.trips_per_hour(),
+        }
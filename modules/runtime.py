@@ -0,0 +1,182 @@
+import asyncio
+import json
+import logging
+import os
+import time
+
+import discord
+from database.database import db
+from database.base import BaseDatabase
+from .bot import Bot
+from .events import setup_events
+from .http import close_session
+from .setup_cogs import setup_cogs
+from .telegram import notif, Telegram
+from .notifications import notifier, NotificationDispatcher
+
+logger = logging.getLogger(__name__)
+
+
+def load_accounts(path: str) -> list[dict]:
+    """Read the accounts file, a JSON list of ``{"name", "token" | "token_env", ...}`` entries.
+
+    ``token_env`` names an environment variable holding the token, so the file itself
+    can be committed without secrets. Optional keys: ``webhook_url``, ``owner_id``, ``server_id``.
+    """
+    with open(path, "r", encoding="utf-8") as file:
+        accounts = json.load(file)
+
+    resolved = []
+    for index, account in enumerate(accounts):
+        account = dict(account)
+        account.setdefault("name", f"account-{index + 1}")
+        if not account.get("token") and account.get("token_env"):
+            account["token"] = os.getenv(account["token_env"])
+        if not account.get("token"):
+            logger.error(f"Account {account['name']} has no token, skipping it")
+            continue
+        resolved.append(account)
+    return resolved
+
+
+def rss_bytes() -> tuple[int, str]:
+    """Resident memory of this process and whether it is the ``"current"`` or the ``"peak"`` RSS.
+
+    Without /proc only the peak is known (``ru_maxrss``); (0, "current") when neither can be read.
+    """
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE"), "current"
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024, "peak"
+    except ImportError:
+        return 0, "current"
+
+
+class Runtime:
+    """Run several selfbot accounts on one event loop.
+
+    Every account gets its own ``Bot`` with its own cogs (and so its own ``VirtualFisher``
+    state), while the database pool, the Telegram client and logging are shared. Accounts
+    are logged in one after another so the memory each one adds can be attributed to it.
+    """
+
+    def __init__(self,
+                 accounts: list[dict],
+                 database: BaseDatabase = db,
+                 telegram_notif: Telegram = notif,
+                 notification_dispatcher: NotificationDispatcher = notifier,
+                 startup_timeout: float = 60.0):
+        self.accounts = accounts
+        self.database = database
+        self.telegram_notif = telegram_notif
+        self.notifier = notification_dispatcher
+        self.startup_timeout = startup_timeout
+        self.bots: dict[str, Bot] = {}
+        self.tasks: dict[str, asyncio.Task] = {}
+        self.startup_memory: dict[str, int] = {}
+        self.started_at = time.monotonic()
+
+    def create_bot(self, account: dict) -> Bot:
+        client = Bot(
+            command_prefix="!",
+            database_conn=self.database,
+            telegram_notif=self.telegram_notif,
+            notification_dispatcher=self.notifier,
+            account=account,
+            help_command=None,
+            status=discord.Status.online,
+        )
+        client.runtime = self
+        return client
+
+    async def start(self):
+        """Connect the shared database, log every account in and run until all of them stop."""
+        logger.info("Starting database Connection!")
+        await self.database.connect()
+        self.notifier.start()
+
+        for account in self.accounts:
+            await self._start_account(account)
+
+        for line in self.format_memory_report():
+            logger.info(line)
+
+        if self.tasks:
+            await asyncio.gather(*self.tasks.values())
+
+    async def _start_account(self, account: dict):
+        name = account["name"]
+        before, _ = rss_bytes()
+
+        client = self.create_bot(account)
+        await setup_cogs(client)
+        setup_events(client)
+        self.bots[name] = client
+        self.tasks[name] = asyncio.create_task(self._run(client, account["token"]), name=f"bot-{name}")
+
+        deadline = time.monotonic() + self.startup_timeout
+        while not client.is_ready() and not self.tasks[name].done() and time.monotonic() < deadline:
+            await asyncio.sleep(0.5)
+        if not client.is_ready():
+            logger.warning(f"Account {name} was not ready after {self.startup_timeout}s, starting the next one")
+
+        self.startup_memory[name] = max(0, rss_bytes()[0] - before)
+
+    async def _run(self, client: Bot, token: str):
+        try:
+            await client.start(token=token, reconnect=True)
+        except discord.LoginFailure as e:
+            logger.error(f"Login failed for account {client.account_name}: {e}")
+        except discord.ClientException as e:
+            logger.error(f"Account {client.account_name} stopped: {e}")
+        finally:
+            if not client.is_closed():
+                await client.close()
+
+    async def close(self):
+        for client in self.bots.values():
+            if not client.is_closed():
+                await client.close()
+        await self.database.close()
+        await self.notifier.close()
+        await self.telegram_notif.close()
+        await close_session()
+
+    def memory_report(self) -> list[dict]:
+        """Memory and cache size per account.
+
+        ``startup_bytes`` is the RSS growth measured while the account logged in;
+        ``share_bytes`` is the process RSS divided evenly over the accounts, ``rss_kind`` says
+        whether that is the current or (where only that can be read) the peak RSS.
+        """
+        rss, kind = rss_bytes()
+        share = rss // len(self.bots) if self.bots else 0
+        return [
+            {
+                "name": name,
+                "user": str(client.user) if client.user else None,
+                "ready": client.is_ready(),
+                "startup_bytes": self.startup_memory.get(name, 0),
+                "share_bytes": share,
+                "rss_kind": kind,
+                "guilds": len(client.guilds),
+                "users": len(client.users),
+                "cached_messages": len(client.cached_messages),
+            }
+            for name, client in self.bots.items()
+        ]
+
+    def format_memory_report(self) -> list[str]:
+        rss, kind = rss_bytes()
+        lines = [f"{len(self.bots)} account(s), process {kind} RSS {rss / 2**20:.1f} MiB"]
+        for entry in self.memory_report():
+            lines.append(
+                f"{entry['name']} ({entry['user']}) ready={entry['ready']} "
+                f"startup={entry['startup_bytes'] / 2**20:.1f} MiB share={entry['share_bytes'] / 2**20:.1f} MiB "
+                f"guilds={entry['guilds']} users={entry['users']} messages={entry['cached_messages']}"
+            )
+        return lines
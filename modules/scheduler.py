@@ -0,0 +1,233 @@
+import asyncio
+import contextlib
+import itertools
+import logging
+import time
+from typing import Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_URGENT = 0  # verify: runs even while paused
+PRIORITY_HIGH = 1
+PRIORITY_NORMAL = 2
+PRIORITY_LOW = 3
+
+
+class JobCancelled(Exception):
+    """The job was cancelled while queued (e.g. by ``ActionScheduler.cancel``) or the scheduler is closed."""
+
+
+class Job:
+    __slots__ = ("name", "action", "channel_id", "due", "priority", "seq", "urgent", "future", "created")
+
+    def __init__(self, name: str, action: Callable[[], Awaitable], channel_id: int | None,
+                 due: float, priority: int, seq: int, urgent: bool, future: asyncio.Future):
+        self.name = name
+        self.action = action
+        self.channel_id = channel_id
+        self.due = due
+        self.priority = priority
+        self.seq = seq
+        self.urgent = urgent
+        self.future = future
+        self.created = time.monotonic()
+
+
+class ActionScheduler:
+    """Run one account's game actions (fish, sell, buy, verify) through a single queue.
+
+    A job becomes eligible once its ``due`` time passed, the game's cooldown for its name
+    (``cooldowns``) has elapsed since the last run of that name, and its channel runs fewer
+    than ``channel_concurrency`` jobs. Among eligible jobs the lowest ``priority`` (then the
+    oldest) starts first. ``pause`` holds everything back except urgent jobs, so an anti-bot
+    check can be answered while fishing waits. The backlog is a handful of jobs per account,
+    so the dispatcher simply rescans it whenever something changes.
+    """
+
+    def __init__(self, cooldowns: dict[str, float] = None, channel_concurrency: int = 1, name: str = ""):
+        self.cooldowns: dict[str, float] = dict(cooldowns or {})
+        self.channel_concurrency = channel_concurrency
+        self.name = name
+        self._jobs: list[Job] = []
+        self._running: dict[int | None, int] = {}
+        self._last_run: dict[str, float] = {}
+        self._sequence = itertools.count()
+        self._wakeup: asyncio.Event | None = None
+        self._dispatcher: asyncio.Task | None = None
+        self._tasks: set[asyncio.Task] = set()
+        self._paused_since: float | None = None
+        self._closed = False
+        self.pause_reason: str | None = None
+        self.stats = {
+            "submitted": 0,
+            "executed": 0,
+            "failed": 0,
+            "cancelled": 0,
+            "pauses": 0,
+            "paused_seconds": 0.0,
+            "lag_total": 0.0,
+            "lag_max": 0.0,
+        }
+
+    @property
+    def paused(self) -> bool:
+        return self._paused_since is not None
+
+    def _ensure_started(self):
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch(), name=f"scheduler-{self.name}")
+
+    def submit(self,
+               name: str,
+               action: Callable[[], Awaitable],
+               channel_id: int = None,
+               delay: float = 0.0,
+               priority: int = PRIORITY_NORMAL,
+               urgent: bool = False) -> asyncio.Future:
+        """Queue ``action`` and return a future with its result, raises ``JobCancelled`` once closed."""
+        if self._closed:
+            # Cogs unloading after close() must not spawn a dispatcher nothing would cancel
+            raise JobCancelled(name)
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        job = Job(name, action, channel_id, time.monotonic() + delay, priority, next(self._sequence), urgent, future)
+        self._jobs.append(job)
+        self.stats["submitted"] += 1
+        self._wakeup.set()
+        return future
+
+    async def run(self, name: str, action: Callable[[], Awaitable], **kwargs):
+        """Submit ``action`` and wait for its result, raises ``JobCancelled`` if it was cancelled."""
+        future = self.submit(name, action, **kwargs)
+        try:
+            return await future
+        except asyncio.CancelledError:
+            # Only the job was cancelled, not the caller: don't let that stop a tasks.loop
+            if future.cancelled() and not asyncio.current_task().cancelling():
+                raise JobCancelled(name) from None
+            raise
+
+    def pause(self, reason: str = ""):
+        if self._paused_since is None:
+            self._paused_since = time.monotonic()
+            self.stats["pauses"] += 1
+        self.pause_reason = reason
+        logger.warning(f"Scheduler {self.name} paused: {reason}")
+
+    def resume(self):
+        if self._paused_since is None:
+            return
+        self.stats["paused_seconds"] += time.monotonic() - self._paused_since
+        self._paused_since = None
+        self.pause_reason = None
+        logger.info(f"Scheduler {self.name} resumed with {len(self._jobs)} queued job(s)")
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def cancel(self, name: str = None) -> int:
+        """Cancel queued (not yet running) jobs, all of them or only those called ``name``."""
+        kept, cancelled = [], 0
+        for job in self._jobs:
+            if name is None or job.name == name:
+                job.future.cancel()
+                cancelled += 1
+            else:
+                kept.append(job)
+        self._jobs = kept
+        self.stats["cancelled"] += cancelled
+        return cancelled
+
+    def _ready_at(self, job: Job) -> float:
+        """When ``job`` may start as far as its due time and cooldown are concerned."""
+        last_run = self._last_run.get(job.name)
+        cooldown_end = last_run + self.cooldowns.get(job.name, 0.0) if last_run is not None else 0.0
+        return max(job.due, cooldown_end)
+
+    def _next_job(self, now: float) -> tuple[Job | None, float | None]:
+        best, wake_at = None, None
+        for job in self._jobs:
+            if job.future.done():
+                continue
+            if self.paused and not job.urgent:
+                continue
+            if self._running.get(job.channel_id, 0) >= self.channel_concurrency:
+                continue
+            ready_at = self._ready_at(job)
+            if ready_at > now:
+                wake_at = ready_at if wake_at is None else min(wake_at, ready_at)
+                continue
+            if best is None or (job.priority, job.seq) < (best.priority, best.seq):
+                best = job
+        return best, wake_at
+
+    async def _dispatch(self):
+        while True:
+            self._jobs = [job for job in self._jobs if not job.future.done()]
+            job, wake_at = self._next_job(time.monotonic())
+            if job is None:
+                self._wakeup.clear()
+                timeout = None if wake_at is None else max(0.0, wake_at - time.monotonic())
+                with contextlib.suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                continue
+
+            now = time.monotonic()
+            lag = max(0.0, now - self._ready_at(job))
+            self.stats["lag_total"] += lag
+            self.stats["lag_max"] = max(self.stats["lag_max"], lag)
+            self._jobs.remove(job)
+            self._running[job.channel_id] = self._running.get(job.channel_id, 0) + 1
+            self._last_run[job.name] = now
+            task = asyncio.create_task(self._execute(job), name=f"scheduler-{self.name}-{job.name}")
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _execute(self, job: Job):
+        try:
+            result = await job.action()
+        except asyncio.CancelledError:
+            job.future.cancel()
+            raise
+        except Exception as e:
+            self.stats["failed"] += 1
+            if not job.future.done():
+                job.future.set_exception(e)
+        else:
+            self.stats["executed"] += 1
+            if not job.future.done():
+                job.future.set_result(result)
+        finally:
+            self._running[job.channel_id] -= 1
+            self._wakeup.set()
+
+    def metrics(self) -> dict:
+        started = self.stats["executed"] + self.stats["failed"]
+        paused_seconds = self.stats["paused_seconds"]
+        if self._paused_since is not None:
+            paused_seconds += time.monotonic() - self._paused_since
+        now = time.monotonic()
+        return {
+            "backlog": len(self._jobs),
+            "overdue": sum(1 for job in self._jobs if self._ready_at(job) <= now),
+            "running": sum(self._running.values()),
+            "paused": self.pause_reason if self.paused else None,
+            "submitted": self.stats["submitted"],
+            "executed": self.stats["executed"],
+            "failed": self.stats["failed"],
+            "cancelled": self.stats["cancelled"],
+            "pauses": self.stats["pauses"],
+            "paused_seconds": round(paused_seconds, 1),
+            "lag_avg_ms": round(self.stats["lag_total"] / started * 1000, 1) if started else 0.0,
+            "lag_max_ms": round(self.stats["lag_max"] * 1000, 1),
+        }
+
+    async def close(self):
+        self._closed = True
+        self.cancel()
+        tasks = [task for task in (self._dispatcher, *self._tasks) if task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._dispatcher = None
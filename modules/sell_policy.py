@@ -0,0 +1,174 @@
+import time
+from abc import ABC, abstractmethod
+
+from .inventory import Inventory
+
+
+class InventoryEstimate:
+    """What the unsold fish are worth, followed from catch and sale replies.
+
+    Catches add their fish counts. A sale empties the estimate and teaches the average price
+    per fish (an exponential moving average over sales), which values the fish counted since.
+    An /inventory sync replaces the estimate with the parsed counts and fish value.
+    """
+
+    def __init__(self, price_per_fish: float = 100.0, smoothing: float = 0.3):
+        self.price_per_fish = price_per_fish
+        self.smoothing = smoothing
+        self.fish = 0
+        self.trips = 0
+        self.last_sale = time.monotonic()
+
+    @property
+    def value(self) -> float:
+        return self.fish * self.price_per_fish
+
+    def add_trip(self, caught: dict[str, int]):
+        self.trips += 1
+        self.fish += sum(caught.values())
+
+    def record_sale(self, fish: int | None, money: int | None):
+        if fish and money is not None:
+            price = money / fish
+            self.price_per_fish += self.smoothing * (price - self.price_per_fish)
+        self.fish = 0
+        self.trips = 0
+        self.last_sale = time.monotonic()
+
+    def sync(self, inventory: Inventory):
+        self.fish = sum(inventory.fish.values())
+        if self.fish and inventory.fish_value is not None:
+            self.price_per_fish = inventory.fish_value / self.fish
+
+
+class SellPolicy(ABC):
+    """Decides after each trip whether to sell. ``reason`` is logged when it does."""
+    name = ""
+
+    @abstractmethod
+    def should_sell(self, estimate: InventoryEstimate) -> bool:
+        ...
+
+    def reason(self, estimate: InventoryEstimate) -> str:
+        return self.name
+
+    def __repr__(self) -> str:
+        return self.name
+
+
+class EveryTrips(SellPolicy):
+    """Sell every ``trips`` trips, whatever the inventory is worth (the old behaviour)."""
+    name = "trips"
+
+    def __init__(self, trips: float = 10):
+        self.trips = int(trips)
+
+    def should_sell(self, estimate: InventoryEstimate) -> bool:
+        return estimate.trips >= self.trips
+
+    def __repr__(self) -> str:
+        return f"trips:{self.trips}"
+
+
+class ValueThreshold(SellPolicy):
+    name = "value"
+
+    def __init__(self, value: float = 50000):
+        self.value = value
+
+    def should_sell(self, estimate: InventoryEstimate) -> bool:
+        return estimate.value >= self.value
+
+    def reason(self, estimate: InventoryEstimate) -> str:
+        return f"estimated value ${estimate.value:,.0f} >= ${self.value:,.0f}"
+
+    def __repr__(self) -> str:
+        return f"value:{self.value:g}"
+
+
+class CountThreshold(SellPolicy):
+    name = "count"
+
+    def __init__(self, count: float = 400):
+        self.count = int(count)
+
+    def should_sell(self, estimate: InventoryEstimate) -> bool:
+        return estimate.fish >= self.count
+
+    def reason(self, estimate: InventoryEstimate) -> str:
+        return f"{estimate.fish} fish >= {self.count}"
+
+    def __repr__(self) -> str:
+        return f"count:{self.count}"
+
+
+class TimeBudget(SellPolicy):
+    """Sell at least every ``seconds``, so fish never sit unsold for long.
+
+    Trips since the last sale count too: when the catch replies could not be parsed the
+    estimate stays at 0 fish, and the inventory would otherwise never be sold.
+    """
+    name = "time"
+
+    def __init__(self, seconds: float = 1800):
+        self.seconds = seconds
+
+    def should_sell(self, estimate: InventoryEstimate) -> bool:
+        return (estimate.fish > 0 or estimate.trips > 0) and time.monotonic() - estimate.last_sale >= self.seconds
+
+    def reason(self, estimate: InventoryEstimate) -> str:
+        return f"unsold for {time.monotonic() - estimate.last_sale:.0f}s"
+
+    def __repr__(self) -> str:
+        return f"time:{self.seconds:g}"
+
+
+class AnyOf(SellPolicy):
+    """Sell as soon as one of ``policies`` wants to."""
+    name = "any"
+
+    def __init__(self, *policies: SellPolicy):
+        self.policies = policies
+        self._fired: SellPolicy | None = None
+
+    def should_sell(self, estimate: InventoryEstimate) -> bool:
+        for policy in self.policies:
+            if policy.should_sell(estimate):
+                self._fired = policy
+                return True
+        return False
+
+    def reason(self, estimate: InventoryEstimate) -> str:
+        return self._fired.reason(estimate) if self._fired is not None else self.name
+
+    def __repr__(self) -> str:
+        return ",".join(repr(policy) for policy in self.policies)
+
+
+# Name in a SELL_POLICY spec -> policy class, register new policies here
+POLICIES: dict[str, type[SellPolicy]] = {
+    "trips": EveryTrips,
+    "value": ValueThreshold,
+    "count": CountThreshold,
+    "time": TimeBudget,
+}
+
+DEFAULT_SELL_POLICY = "value:50000,count:400,time:1800"
+
+
+def build_policy(spec: str = DEFAULT_SELL_POLICY, time_scale: float = 1.0) -> SellPolicy:
+    """Build a policy from ``name:argument`` pairs, e.g. ``value:50000,time:1800``.
+
+    Several pairs sell when any of them is crossed. ``time_scale`` multiplies time budgets,
+    the simulator uses it to run policies at accelerated speed.
+    """
+    policies = []
+    for part in (spec or DEFAULT_SELL_POLICY).split(","):
+        name, _, argument = part.strip().partition(":")
+        if name not in POLICIES:
+            raise ValueError(f"Unknown sell policy {name!r}, expected one of {', '.join(POLICIES)}")
+        policy = POLICIES[name](float(argument)) if argument else POLICIES[name]()
+        if isinstance(policy, TimeBudget):
+            policy.seconds *= time_scale
+        policies.append(policy)
+    return policies[0] if len(policies) == 1 else AnyOf(*policies)
@@ -1,5 +1,5 @@
-from modules import bot
+from modules import bot, Bot
 
-async def setup_cogs():
-    await bot.load_extension("modules.commands.utilities")
-    await bot.load_extension("modules.commands.virtualfisher")
\ No newline at end of file
+async def setup_cogs(client: Bot = bot):
+    await client.load_extension("modules.commands.utilities")
+    await client.load_extension("modules.commands.virtualfisher")
\ No newline at end of file
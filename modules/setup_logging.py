@@ -5,14 +5,14 @@ from logging.handlers import RotatingFileHandler
 
 os.makedirs("log", exist_ok=True)
 log_timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-def setup_logging():
+def setup_logging(name: str = "bot"):
     # Create a root logger
     logger = logging.getLogger()
     logger.setLevel(logging.INFO)  # Can be changed to DEBUG as needed
 
     # Rotating File Handler (limits log file size)
     file_handler = RotatingFileHandler(
-        f"log/bot_{log_timestamp}.log",
+        f"log/{name}_{log_timestamp}.log",
         maxBytes=10*1024*1024,  # 10 MB per log file
         backupCount=5,  # Keep 5 backup log files
         encoding="utf-8"
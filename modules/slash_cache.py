@@ -0,0 +1,106 @@
+import asyncio
+import json
+import logging
+import os
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+
+class SlashCommandCache:
+    """Resolved slash commands kept on disk, so commands are usable right after a restart.
+
+    Entries are the raw command payloads (``SlashCommand._data``: id, version, application
+    id and options) per guild, or per channel outside guilds. They are trusted until an
+    invocation fails because the command changed (``is_stale``), then the caller refetches
+    the scope and stores it again. The file is small and read once, writes replace it
+    atomically off the event loop.
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path or self.default_path()
+        self._scopes: dict[str, dict[str, dict]] | None = None
+        self._lock: asyncio.Lock | None = None
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "invalidations": 0,
+        }
+
+    @staticmethod
+    def default_path() -> str:
+        database_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "database")
+        return os.path.join(database_dir, "slash_commands.json")
+
+    @staticmethod
+    def scope(channel: discord.abc.Messageable) -> int:
+        guild = getattr(channel, "guild", None)
+        return guild.id if guild is not None else channel.id
+
+    def _load(self) -> dict[str, dict[str, dict]]:
+        if self._scopes is None:
+            try:
+                with open(self.path, "r", encoding="utf-8") as file:
+                    self._scopes = json.load(file)
+            except FileNotFoundError:
+                self._scopes = {}
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable slash command cache {self.path}: {e}")
+                self._scopes = {}
+        return self._scopes
+
+    def get(self,
+            channel: discord.abc.Messageable,
+            state,
+            command_ids: set[int]) -> dict[int, discord.SlashCommand] | None:
+        """The cached commands in ``command_ids`` for the channel's scope, None unless all are cached."""
+        entries = self._load().get(str(self.scope(channel)), {})
+        if not all(str(command_id) in entries for command_id in command_ids):
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        return {command_id: discord.SlashCommand(state=state, data=entries[str(command_id)], channel=channel)
+                for command_id in command_ids}
+
+    async def store(self, channel: discord.abc.Messageable, commands: list[discord.SlashCommand]):
+        self._load()[str(self.scope(channel))] = {str(command.id): command._data for command in commands}
+        self.stats["stores"] += 1
+        await self._save()
+
+    async def invalidate(self, channel: discord.abc.Messageable):
+        if self._load().pop(str(self.scope(channel)), None) is not None:
+            self.stats["invalidations"] += 1
+            await self._save()
+
+    @staticmethod
+    def is_stale(error: discord.HTTPException) -> bool:
+        """Whether Discord rejected an invocation because the cached command is outdated or gone."""
+        text = (error.text or "").lower()
+        # 10063 Unknown application command, version errors come back as invalid form body
+        return error.code == 10063 or (error.status == 400 and "version" in text)
+
+    async def _save(self):
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            payload = json.dumps(self._scopes)
+            try:
+                await asyncio.to_thread(self._write, payload)
+            except OSError as e:
+                logger.error(f"Failed to write slash command cache {self.path}: {e}")
+
+    def _write(self, payload: str):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        # Every account and supervisor worker shares the file, each writes its own temporary one
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            file.write(payload)
+        os.replace(tmp_path, self.path)
+
+    def metrics(self) -> dict:
+        return {**self.stats, "scopes": len(self._scopes or {})}
+
+
+slash_cache = SlashCommandCache(os.getenv("SLASH_CACHE_PATH") or None)
@@ -0,0 +1,98 @@
+import asyncio
+import contextlib
+import hashlib
+import json
+import logging
+import os
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+
+class StateSnapshot:
+    """Periodic, atomic JSON snapshot of a cog's runtime state for warm restarts.
+
+    ``load`` reads the last snapshot synchronously, so the cog has its state before the
+    gateway or the database are up. ``start`` saves what ``provider`` returns every
+    ``interval`` seconds when it changed, ``close`` saves one last time. Every write goes to
+    a temporary file that replaces the snapshot, so a crash never leaves half a file.
+    """
+
+    def __init__(self, path: str, interval: float = 30.0):
+        self.path = path
+        self.interval = interval
+        self._provider: Callable[[], dict] | None = None
+        self._task: asyncio.Task | None = None
+        self._last_hash: str | None = None
+        self.stats = {
+            "saves": 0,
+            "skipped": 0,
+            "failures": 0,
+        }
+
+    @staticmethod
+    def default_path(name: str) -> str:
+        database_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "database")
+        return os.path.join(os.getenv("SNAPSHOT_DIR") or database_dir, f"{name}.snapshot.json")
+
+    def load(self) -> dict | None:
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                state = json.load(file)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable snapshot {self.path}: {e}")
+            return None
+        logger.info(f"Loaded snapshot {self.path}")
+        return state
+
+    def start(self, provider: Callable[[], dict]):
+        self._provider = provider
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name=f"snapshot-{os.path.basename(self.path)}")
+
+    async def save(self):
+        if self._provider is None:
+            return
+        try:
+            payload = json.dumps(self._provider(), sort_keys=True, default=str)
+        except Exception as e:
+            self.stats["failures"] += 1
+            logger.error(f"Failed to build snapshot {self.path}: {e}")
+            return
+
+        digest = hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+        if digest == self._last_hash:
+            self.stats["skipped"] += 1
+            return
+        try:
+            await asyncio.to_thread(self._write, payload)
+        except OSError as e:
+            self.stats["failures"] += 1
+            logger.error(f"Failed to write snapshot {self.path}: {e}")
+            return
+        self._last_hash = digest
+        self.stats["saves"] += 1
+
+    def _write(self, payload: str):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            file.write(payload)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, self.path)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.save()
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        await self.save()
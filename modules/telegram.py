@@ -1,52 +1,135 @@
 import os
+import asyncio
+import logging
 
-import requests
+import aiohttp
 import dotenv
+from .http import get_session
+
+logger = logging.getLogger(__name__)
+
+
+class TelegramRateLimited(Exception):
+    """Telegram answered 429, ``retry_after`` is how long (in seconds) it wants us to wait."""
+
+    def __init__(self, method: str, retry_after: float):
+        super().__init__(f"Telegram {method} rate limited, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class TelegramUnavailable(Exception):
+    """Telegram could not be reached (timeout, connection error, 5xx), the request may be retried."""
+
 
 class Telegram:
     def __init__(self,
                  token: str,
-                 chat_id: int):
+                 chat_id: int,
+                 timeout: float = 10,
+                 max_concurrency: int = 4):
         self.token = token
         self.chat_id = chat_id
         self.message_id = None
         self.base_url = f"https://api.telegram.org/bot{self.token}"
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.max_concurrency = max_concurrency
+        self._semaphore: asyncio.Semaphore | None = None
+        self._background: set[asyncio.Task] = set()
 
-    def send_message(self, message: str) -> dict | None:
-        url = f"{self.base_url}/sendMessage"
-        payload = {
+    async def request(self, method: str, payload: dict, session: aiohttp.ClientSession = None) -> dict | None:
+        """Call a Bot API method.
+
+        Raises ``TelegramRateLimited`` on 429 and ``TelegramUnavailable`` when Telegram can't be
+        reached, answers 5xx or something that isn't JSON, so callers can back off and retry;
+        other rejections (4xx) are permanent, they are logged and return ``None``.
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async with self._semaphore:
+            try:
+                async with (session or get_session()).post(f"{self.base_url}/{method}",
+                                                           json=payload,
+                                                           timeout=self.timeout) as response:
+                    if response.status >= 500:
+                        raise TelegramUnavailable(f"Telegram {method} failed with status {response.status}")
+                    data = await response.json(content_type=None)
+                    if response.status == 429:
+                        retry_after = (data.get("parameters") or {}).get("retry_after", 1)
+                        raise TelegramRateLimited(method, float(retry_after))
+                    if response.status != 200:
+                        logger.error(f"Telegram {method} failed with status {response.status}: {data}")
+                        return None
+                    return data
+            except ValueError as e:
+                raise TelegramUnavailable(f"Invalid answer from Telegram {method}: {e!r}") from e
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                raise TelegramUnavailable(f"Error calling Telegram {method}: {e!r}") from e
+
+    async def _post(self, method: str, payload: dict, session: aiohttp.ClientSession = None) -> dict | None:
+        try:
+            return await self.request(method, payload, session=session)
+        except (TelegramRateLimited, TelegramUnavailable) as e:
+            logger.error(str(e))
+            return None
+
+    def _send_payload(self, message: str) -> dict:
+        return {
             "chat_id": self.chat_id,
             "text": message,
             "parse_mode": "markdown",
         }
 
-        try:
-            response = requests.post(url, json=payload)
-            response.raise_for_status()
-            return response.json()
-        except requests.RequestException as e:
-            print(f"Error sending message to Telegram: {e}")
-            return None
-
-    def edit_message(self, message_id: int, new_message: str):
-        url = f"{self.base_url}/editMessageText"
-        payload = {
+    def _edit_payload(self, message_id: int, new_message: str) -> dict:
+        return {
             "chat_id": self.chat_id,
             "message_id": message_id,
             "text": new_message,
             "parse_mode": "markdown"
         }
 
+    async def send_message_async(self, message: str) -> dict | None:
+        return await self._post("sendMessage", self._send_payload(message))
+
+    async def edit_message_async(self, message_id: int, new_message: str) -> dict | None:
+        return await self._post("editMessageText", self._edit_payload(message_id, new_message))
+
+    def _run_or_schedule(self, method: str, payload: dict) -> dict | None:
+        """Call ``method`` without ever blocking a running event loop.
+
+        Inside a loop the call is scheduled in the background and ``None`` is returned;
+        outside of one it runs to completion on a short-lived session.
+        """
         try:
-            response = requests.post(url, json=payload)
-            response.raise_for_status()
-            return response.json()
-        except requests.RequestException as e:
-            print(f"Error editing message in Telegram: {e}")
-            return None
+            asyncio.get_running_loop()
+        except RuntimeError:
+            async def _run_standalone():
+                async with aiohttp.ClientSession() as session:
+                    return await self._post(method, payload, session=session)
+            return asyncio.run(_run_standalone())
+
+        task = asyncio.create_task(self._post(method, payload))
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        return None
+
+    def send_message(self, message: str) -> dict | None:
+        """Compatibility wrapper, use ``send_message_async`` when the result is needed."""
+        return self._run_or_schedule("sendMessage", self._send_payload(message))
+
+    def edit_message(self, message_id: int, new_message: str) -> dict | None:
+        """Compatibility wrapper, use ``edit_message_async`` when the result is needed."""
+        return self._run_or_schedule("editMessageText", self._edit_payload(message_id, new_message))
+
+    async def close(self):
+        """Wait for notifications still being sent in the background."""
+        if self._background:
+            await asyncio.gather(*self._background, return_exceptions=True)
 
 dotenv.load_dotenv(".env")
 notif = Telegram(
     token=os.getenv("TELEGRAM_TOKEN"),
-    chat_id=int(os.getenv("CHAT_ID"))
-)
\ No newline at end of file
+    chat_id=int(os.getenv("CHAT_ID")),
+    timeout=float(os.getenv("TELEGRAM_TIMEOUT", 10)),
+    max_concurrency=int(os.getenv("TELEGRAM_MAX_CONCURRENCY", 4))
+)
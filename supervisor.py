@@ -0,0 +1,229 @@
+import asyncio
+import contextlib
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import random
+import signal
+import time
+from dotenv import load_dotenv
+from modules import setup_logging, Runtime, load_accounts
+from modules.outbox import Outbox
+
+logger = logging.getLogger(__name__)
+load_dotenv(".env")
+ACCOUNTS_FILE = os.getenv("ACCOUNTS_FILE", "accounts.json")
+SUPERVISOR_WORKERS = int(os.getenv("SUPERVISOR_WORKERS") or os.cpu_count() or 1)
+HEALTH_INTERVAL = float(os.getenv("SUPERVISOR_HEALTH_INTERVAL", 30))
+HEALTH_FILE = os.path.join("log", "supervisor_health.json")
+
+# Counters from Database.metrics() that are summed over all workers
+SUMMED_DB_COUNTERS = ("retries", "reconnects", "reconnect_failures", "connection_errors", "failed_operations")
+
+
+def shard_accounts(accounts: list[dict], workers: int) -> list[list[dict]]:
+    """Spread accounts round-robin over at most ``workers`` shards."""
+    workers = max(1, min(workers, len(accounts)))
+    return [accounts[index::workers] for index in range(workers)]
+
+
+async def _report_health(index: int, runtime: Runtime, health_queue, interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            health_queue.put_nowait({
+                "worker": index,
+                "pid": os.getpid(),
+                "time": time.time(),
+                "accounts": runtime.memory_report(),
+                "database": runtime.database.metrics(),
+            })
+        except Exception as e:
+            logger.error(f"Failed to report worker health: {e}")
+
+
+async def _run_worker(index: int, accounts: list[dict], health_queue, interval: float):
+    # The supervisor stops workers with SIGTERM, turn it into a cancellation so buffers get flushed
+    with contextlib.suppress(NotImplementedError):
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+
+    runtime = Runtime(accounts)
+    if runtime.notifier.outbox is not None and not os.getenv("OUTBOX_PATH"):
+        # Workers must not share a segment file, each one replays its own
+        runtime.notifier.outbox.path = Outbox.default_path(f"notifications_worker{index}")
+    reporter = asyncio.create_task(_report_health(index, runtime, health_queue, interval))
+    try:
+        await runtime.start()
+    finally:
+        reporter.cancel()
+        await runtime.close()
+
+
+def worker_main(index: int, accounts: list[dict], health_queue, interval: float):
+    """Entry point of one worker process: run its shard of accounts on a single event loop."""
+    setup_logging(f"bot_worker{index}")
+    logger.info(f"Worker {index} starting {len(accounts)} account(s): {[account['name'] for account in accounts]}")
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # the supervisor decides when workers stop
+    asyncio.run(_run_worker(index, accounts, health_queue, interval))
+
+
+class WorkerSlot:
+    """One shard of accounts and the process currently running it."""
+
+    def __init__(self, index: int, accounts: list[dict]):
+        self.index = index
+        self.accounts = accounts
+        self.process: multiprocessing.Process | None = None
+        self.started_at = 0.0
+        self.restarts = 0
+        self.failures_in_row = 0
+        self.next_start = 0.0
+        self.finished = False
+        self.health: dict | None = None
+
+
+class Supervisor:
+    """Spawn one worker process per shard, restart crashed workers and merge their health reports.
+
+    A worker that exits with a non-zero code is restarted after an exponential, jittered
+    backoff; the backoff resets once a worker stayed up for ``stable_after`` seconds. A worker
+    that exits cleanly (all of its accounts stopped) is left stopped.
+    """
+
+    def __init__(self,
+                 shards: list[list[dict]],
+                 health_interval: float = HEALTH_INTERVAL,
+                 base_backoff: float = 5.0,
+                 max_backoff: float = 300.0,
+                 stable_after: float = 300.0):
+        self.context = multiprocessing.get_context("spawn")
+        self.health_queue = self.context.Queue()
+        self.slots = [WorkerSlot(index, shard) for index, shard in enumerate(shards)]
+        self.health_interval = health_interval
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.stable_after = stable_after
+        self.stopping = False
+
+    def _spawn(self, slot: WorkerSlot):
+        slot.process = self.context.Process(
+            target=worker_main,
+            args=(slot.index, slot.accounts, self.health_queue, self.health_interval),
+            name=f"selfbot-worker-{slot.index}",
+            daemon=False,
+        )
+        slot.process.start()
+        slot.started_at = time.monotonic()
+        logger.info(f"Started worker {slot.index} (pid {slot.process.pid}) with {len(slot.accounts)} account(s)")
+
+    def _check(self, slot: WorkerSlot):
+        now = time.monotonic()
+        if slot.finished:
+            return
+        if slot.process is None:
+            if now >= slot.next_start:
+                self._spawn(slot)
+            return
+        if slot.process.is_alive():
+            return
+
+        exit_code = slot.process.exitcode
+        slot.process = None
+        if exit_code == 0:
+            logger.warning(f"Worker {slot.index} stopped cleanly, not restarting it")
+            slot.finished = True
+            return
+
+        if now - slot.started_at >= self.stable_after:
+            slot.failures_in_row = 0
+        delay = min(self.max_backoff, self.base_backoff * 2 ** slot.failures_in_row) * random.uniform(0.5, 1.5)
+        slot.failures_in_row += 1
+        slot.restarts += 1
+        slot.next_start = now + delay
+        logger.error(f"Worker {slot.index} crashed with exit code {exit_code}, restarting in {delay:.0f}s")
+
+    def _drain_health(self):
+        while True:
+            try:
+                report = self.health_queue.get_nowait()
+            except queue.Empty:
+                return
+            self.slots[report["worker"]].health = report
+
+    def combined_health(self) -> dict:
+        """Merge the latest report of every worker into one view."""
+        workers = []
+        accounts = []
+        database = dict.fromkeys(SUMMED_DB_COUNTERS, 0)
+        for slot in self.slots:
+            health = slot.health or {}
+            workers.append({
+                "worker": slot.index,
+                "pid": slot.process.pid if slot.process else None,
+                "alive": bool(slot.process and slot.process.is_alive()),
+                "restarts": slot.restarts,
+                "accounts": [account["name"] for account in slot.accounts],
+                "last_report": health.get("time"),
+            })
+            accounts.extend(health.get("accounts", []))
+            for counter in SUMMED_DB_COUNTERS:
+                database[counter] += health.get("database", {}).get(counter, 0)
+
+        return {
+            "time": time.time(),
+            "workers_alive": sum(worker["alive"] for worker in workers),
+            "workers": workers,
+            "accounts_ready": sum(account["ready"] for account in accounts),
+            "accounts_total": sum(len(slot.accounts) for slot in self.slots),
+            "accounts": accounts,
+            "database": database,
+        }
+
+    def _write_health(self):
+        health = self.combined_health()
+        tmp_path = f"{HEALTH_FILE}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(health, file, indent=2)
+        os.replace(tmp_path, HEALTH_FILE)
+        logger.info(
+            f"Workers alive {health['workers_alive']}/{len(self.slots)}, "
+            f"accounts ready {health['accounts_ready']}/{health['accounts_total']}, "
+            f"db reconnects {health['database']['reconnects']}, retries {health['database']['retries']}"
+        )
+
+    def run(self):
+        signal.signal(signal.SIGTERM, lambda *_: setattr(self, "stopping", True))
+        next_report = time.monotonic() + self.health_interval
+        try:
+            while not self.stopping and not all(slot.finished for slot in self.slots):
+                for slot in self.slots:
+                    self._check(slot)
+                self._drain_health()
+                if time.monotonic() >= next_report:
+                    self._write_health()
+                    next_report = time.monotonic() + self.health_interval
+                time.sleep(1)
+        except KeyboardInterrupt:
+            logger.warning("The program is stopped by the user, stopping all workers.")
+        finally:
+            self.stop()
+
+    def stop(self):
+        for slot in self.slots:
+            if slot.process and slot.process.is_alive():
+                slot.process.terminate()
+        for slot in self.slots:
+            if slot.process:
+                slot.process.join(timeout=30)
+                if slot.process.is_alive():
+                    slot.process.kill()
+
+
+if __name__ == "__main__":
+    setup_logging("supervisor")
+    accounts = load_accounts(ACCOUNTS_FILE)
+    if not accounts:
+        raise SystemExit(f"No usable accounts found in {ACCOUNTS_FILE}")
+    Supervisor(shard_accounts(accounts, SUPERVISOR_WORKERS)).run()